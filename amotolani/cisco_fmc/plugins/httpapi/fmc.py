@@ -0,0 +1,141 @@
+DOCUMENTATION = r'''
+---
+author: Adelowo David (@amotolani)
+name: fmc
+short_description: HttpApi Plugin for Cisco FMC
+description:
+  - This HttpApi plugin provides methods to connect to Cisco FMC over its REST API.
+  - One authenticated, keep-alive HTTPS session per FMC is held by the persistent connection
+    and shared by every task, so tasks do not perform a TLS handshake or a login of their own.
+  - Use with C(ansible_connection=ansible.netcommon.httpapi) and C(ansible_network_os=amotolani.cisco_fmc.fmc).
+'''
+
+from urllib.parse import urlsplit
+
+import requests
+from ansible.errors import AnsibleConnectionFailure
+from ansible.plugins.httpapi import HttpApiBase
+
+API_PLATFORM_VERSION = 'api/fmc_platform/v1'
+BASE_HEADERS = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+
+
+class HttpApi(HttpApiBase):
+
+    MAX_REFRESHES = 3
+    MAX_RETRIES = 5
+
+    def __init__(self, connection):
+        super(HttpApi, self).__init__(connection)
+        self._session = None
+        self._username = None
+        self._password = None
+        self._access_token = None
+        self._refresh_token = None
+        self._refreshes = 0
+        self._domain_uuid = None
+        self._server_version = None
+
+    def login(self, username, password):
+        """
+        Generate the session tokens with HTTP basic auth.
+        """
+        self._username = username
+        self._password = password
+        self._generate_tokens()
+
+    def logout(self):
+        """
+        Revoke the session tokens and close the keep-alive connection.
+        """
+        if self._access_token is not None:
+            try:
+                self._post_auth('revokeaccess', headers={'X-auth-access-token': self._access_token})
+            except (requests.exceptions.RequestException, AnsibleConnectionFailure):
+                pass
+            self._access_token = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def get_session_info(self):
+        """
+        Details of the session needed by modules to build FMC API URLs.
+        :return: dict
+        """
+        if self._access_token is None:
+            self._generate_tokens()
+        if self._server_version is None:
+            status, body = self.send_request('GET', '/{}/info/serverversion'.format(API_PLATFORM_VERSION))[:2]
+            if status == 200 and body.get('items'):
+                self._server_version = body['items'][0]
+        return dict(host=urlsplit(self.connection._url).netloc, username=self._username,
+                    domain_uuid=self._domain_uuid, server_version=self._server_version)
+
+    def send_request(self, method, path, data=None):
+        """
+        Send a request over the persistent session.
+        Expired tokens are refreshed. Throttled (HTTP 429) requests are returned to the module with the Retry-After
+        of the FMC, the rate limit and the retries are handled by the request layer of the module (FmcRequestMixin),
+        so a request is retried in one place and within persistent_command_timeout.
+        :param method: HTTP method
+        :param path: URL path (with query string) on the FMC
+        :param data: JSON serializable request body
+        :return: tuple of HTTP status code, decoded JSON body and Retry-After seconds (or None)
+        """
+        url = self.connection._url + path
+        for attempt in range(self.MAX_RETRIES + 1):
+            headers = dict(BASE_HEADERS)
+            headers['X-auth-access-token'] = self._access_token
+            try:
+                response = self.session.request(method.upper(), url, json=data, headers=headers,
+                                                verify=self.connection.get_option('validate_certs'),
+                                                timeout=self.connection.get_option('persistent_command_timeout'))
+            except requests.exceptions.RequestException as err:
+                raise AnsibleConnectionFailure('Could not connect to {}: {}'.format(url, err))
+            if response.status_code == 401 and attempt < self.MAX_RETRIES:
+                self._generate_tokens(refresh=True)
+                continue
+            break
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        retry_after = response.headers.get('Retry-After')
+        return response.status_code, body, int(retry_after) if retry_after and retry_after.isdigit() else None
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = requests.Session()
+        return self._session
+
+    def _generate_tokens(self, refresh=False):
+        response = None
+        if refresh and self._refresh_token is not None and self._refreshes < self.MAX_REFRESHES:
+            response = self._post_auth('refreshtoken', headers={'X-auth-access-token': self._access_token,
+                                                                'X-auth-refresh-token': self._refresh_token})
+            if response.ok and response.headers.get('X-auth-access-token'):
+                self._refreshes += 1
+            else:
+                response = None
+        if response is None:
+            response = self._post_auth('generatetoken', auth=(self._username, self._password))
+            if not response.ok or not response.headers.get('X-auth-access-token'):
+                raise AnsibleConnectionFailure('Connection to FMC failed. Reason: {} {}'.format(
+                    response.status_code, response.reason))
+            self._refreshes = 0
+        self._access_token = response.headers.get('X-auth-access-token')
+        self._refresh_token = response.headers.get('X-auth-refresh-token')
+        self._domain_uuid = response.headers.get('DOMAIN_UUID')
+
+    def _post_auth(self, endpoint, headers=None, auth=None):
+        url = '{}/{}/auth/{}'.format(self.connection._url, API_PLATFORM_VERSION, endpoint)
+        request_headers = dict(BASE_HEADERS)
+        request_headers.update(headers or {})
+        try:
+            return self.session.post(url, headers=request_headers, auth=auth,
+                                     verify=self.connection.get_option('validate_certs'),
+                                     timeout=self.connection.get_option('persistent_command_timeout'))
+        except requests.exceptions.RequestException as err:
+            raise AnsibleConnectionFailure('Unable to establish network connection to FMC: {}'.format(err))
@@ -0,0 +1,271 @@
+from bisect import bisect_left
+
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.objects import resolve_networks
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.validation import literal_type
+
+ACCESS_POLICIES_PATH = 'policy/accesspolicies'
+
+# Access Rule fields sent back to FMC when a rule is updated,
+# read-only fields (metadata, links, comment history) are left out
+RULE_FIELDS = [
+    'id', 'name', 'type', 'action', 'enabled', 'sendEventsToFMC', 'logFiles', 'logBegin', 'logEnd', 'variableSet',
+    'originalSourceNetworks', 'vlanTags', 'users', 'sourceNetworks', 'destinationNetworks', 'sourcePorts',
+    'destinationPorts', 'ipsPolicy', 'urls', 'sourceZones', 'destinationZones', 'applications', 'filePolicy',
+    'sourceSecurityGroupTags', 'destinationSecurityGroupTags', 'enableSyslog', 'sourceDynamicObjects',
+    'destinationDynamicObjects'
+]
+MULTI_OBJ_CONFIGS = [
+    'vlanTags', 'sourceNetworks', 'destinationNetworks', 'sourcePorts', 'destinationPorts', 'sourceZones',
+    'destinationZones', 'applications', 'sourceSecurityGroupTags', 'destinationSecurityGroupTags'
+]
+
+# Rule options holding a list of object names: option -> (FMC field, key of the object list, collections searched)
+RULE_MEMBER_OPTIONS = {
+    'vlan_tags': ('vlanTags', 'objects', ['object/vlantags']),
+    'source_ports': ('sourcePorts', 'objects', ['object/protocolportobjects', 'object/portobjectgroups']),
+    'destination_ports': ('destinationPorts', 'objects', ['object/protocolportobjects', 'object/portobjectgroups']),
+    'source_zones': ('sourceZones', 'objects', ['object/securityzones']),
+    'destination_zones': ('destinationZones', 'objects', ['object/securityzones']),
+    'applications': ('applications', 'applications', ['object/applications']),
+    'source_security_group_tags': ('sourceSecurityGroupTags', 'objects', ['object/securitygrouptags']),
+    'destination_security_group_tags': ('destinationSecurityGroupTags', 'objects', ['object/securitygrouptags'])
+}
+# Rule options holding network object names and literals: option -> FMC field
+RULE_NETWORK_OPTIONS = {
+    'source_networks': 'sourceNetworks',
+    'destination_networks': 'destinationNetworks'
+}
+# Rule options holding the name of a single object: option -> (FMC field, collection searched)
+RULE_POLICY_OPTIONS = {
+    'intrusion_policy': ('ipsPolicy', 'policy/intrusionpolicies'),
+    'file_policy': ('filePolicy', 'policy/filepolicies'),
+    'variable_set': ('variableSet', 'object/variablesets')
+}
+# Rule options holding a plain value: option -> FMC field
+RULE_VALUE_OPTIONS = {
+    'action': 'action',
+    'enabled': 'enabled',
+    'log_begin': 'logBegin',
+    'log_end': 'logEnd',
+    'enable_syslog': 'enableSyslog',
+    'send_events_to_fmc': 'sendEventsToFMC'
+}
+
+# Values of the plain options reset by build_rule(replace=True) when they are not set
+RULE_VALUE_DEFAULTS = {
+    'enabled': True,
+    'log_begin': False,
+    'log_end': False,
+    'enable_syslog': False,
+    'send_events_to_fmc': False
+}
+# Policy options kept by build_rule(replace=True) when they are not set, FMC gives every rule a variable set
+RULE_KEPT_OPTIONS = ('variable_set',)
+
+
+def access_rules_path(acp_id):
+    """
+    Return the path of the access rules collection of an Access Control Policy.
+    :param acp_id: Access Control Policy id
+    :return: str
+    """
+    return '{}/{}/accessrules'.format(ACCESS_POLICIES_PATH, acp_id)
+
+
+def rule_payload(rule):
+    """
+    Copy the writable fields of an existing Access Rule.
+    :param rule: Access Rule as returned by FMC
+    :return: dict
+    """
+    return dict((k, v) for k, v in rule.items() if k in RULE_FIELDS)
+
+
+def drop_empty_configs(payload):
+    """
+    Remove member configurations left without objects or literals, FMC expects these to be absent ("any").
+    :param payload: Access Rule to be sent to FMC
+    :return: None
+    """
+    for fmc_config_name in MULTI_OBJ_CONFIGS:
+        if fmc_config_name not in payload:
+            continue
+        config = dict((k, v) for k, v in payload[fmc_config_name].items() if v)
+        if config:
+            payload[fmc_config_name] = config
+        else:
+            del payload[fmc_config_name]
+
+
+def build_rule(object_index, spec, current=None, replace=False):
+    """
+    Build the Access Rule described by a rule spec.
+    Every option set in the spec replaces the corresponding field of the current rule, options that are not set
+    (None) keep the current value. Object names are resolved from the object index.
+    :param object_index: ObjectIndex of the FMC session
+    :param spec: dict of rule options (name, action, enabled, source_networks, vlan_tags, ...)
+    :param current: Existing Access Rule as returned by FMC, None for a new rule
+    :param replace: Reset the options that are not set instead of keeping the current value: members and policies
+                    are removed (except those of RULE_KEPT_OPTIONS) and the plain options get the value from
+                    RULE_VALUE_DEFAULTS
+    :return: tuple of the Access Rule payload and the list of names that could not be resolved
+             (formatted as "option: name"). None instead of the payload if a listing failed
+    """
+    payload = rule_payload(current) if current is not None else dict(name=spec['name'], type='AccessRule')
+    missing = []
+    if replace:
+        policies = [v[0] for k, v in RULE_POLICY_OPTIONS.items() if k not in RULE_KEPT_OPTIONS]
+        for fmc_config_name in MULTI_OBJ_CONFIGS + policies:
+            payload.pop(fmc_config_name, None)
+        spec = dict(spec)
+        for option, value in RULE_VALUE_DEFAULTS.items():
+            if spec.get(option) is None:
+                spec[option] = value
+    for option, (fmc_config_name, key, paths) in RULE_MEMBER_OPTIONS.items():
+        if spec.get(option) is None:
+            continue
+        objects = []
+        for name in dict.fromkeys(spec[option]):
+            obj = None
+            for path in paths:
+                index = object_index.load(path)
+                if index is None:
+                    return None, missing
+                obj = index.get(name)
+                if obj is not None:
+                    break
+            if obj is None:
+                missing.append('{}: {}'.format(option, name))
+            else:
+                objects.append(obj)
+        payload[fmc_config_name] = {key: objects}
+    for option, fmc_config_name in RULE_NETWORK_OPTIONS.items():
+        if spec.get(option) is None:
+            continue
+        names = list(dict.fromkeys(spec[option].get('name') or []))
+        resolved = resolve_networks(object_index, names) if names else {}
+        if resolved is None:
+            return None, missing
+        missing += ['{}: {}'.format(option, i) for i in names if i not in resolved]
+        payload[fmc_config_name] = dict(
+            objects=[resolved[i] for i in names if i in resolved],
+            literals=[dict(type=literal_type(i), value=i) for i in dict.fromkeys(spec[option].get('literal') or [])]
+        )
+    for option, (fmc_config_name, path) in RULE_POLICY_OPTIONS.items():
+        if spec.get(option) is None:
+            continue
+        index = object_index.load(path)
+        if index is None:
+            return None, missing
+        if spec[option] in index:
+            payload[fmc_config_name] = index[spec[option]]
+        else:
+            missing.append('{}: {}'.format(option, spec[option]))
+    for option, fmc_config_name in RULE_VALUE_OPTIONS.items():
+        if spec.get(option) is not None:
+            payload[fmc_config_name] = spec[option]
+    drop_empty_configs(payload)
+    return payload, missing
+
+
+def _comparable(value):
+    """
+    Reduce a rule field to a value that does not depend on member order or on the attributes FMC adds to references.
+    """
+    if isinstance(value, dict):
+        if 'id' in value:
+            return value['id']
+        return dict((k, _comparable(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return frozenset(i.get('id', i.get('value')) if isinstance(i, dict) else i for i in value)
+    return value
+
+
+def changed_fields(current, payload):
+    """
+    Compare an existing Access Rule with the payload built for it.
+    :param current: Existing Access Rule as returned by FMC
+    :param payload: Access Rule payload, see build_rule
+    :return: sorted list of the FMC fields that differ
+    """
+    current = rule_payload(current)
+    drop_empty_configs(current)
+    fields = set(current) | set(payload)
+    return sorted(i for i in fields if i != 'id' and _comparable(current.get(i)) != _comparable(payload.get(i)))
+
+
+def stable_rules(current, desired):
+    """
+    Find the largest set of rules that can keep their position: the longest subsequence of the current rule order
+    that is also in the desired order (longest increasing subsequence of the desired positions, O(n log n)).
+    :param current: Rule names in the current order
+    :param desired: Rule names in the desired order
+    :return: set of rule names
+    """
+    position = dict((name, i) for i, name in enumerate(desired))
+    sequence = [name for name in current if name in position]
+    tails = []
+    tail_index = []
+    previous = [None] * len(sequence)
+    for i, name in enumerate(sequence):
+        j = bisect_left(tails, position[name])
+        if j == len(tails):
+            tails.append(position[name])
+            tail_index.append(i)
+        else:
+            tails[j] = position[name]
+            tail_index[j] = i
+        previous[i] = tail_index[j - 1] if j > 0 else None
+    stable = set()
+    i = tail_index[-1] if tail_index else None
+    while i is not None:
+        stable.add(sequence[i])
+        i = previous[i]
+    return stable
+
+
+def _position_query(current, after):
+    """
+    Query string parameter placing a rule right after the rule named after (at the top of the policy if None).
+    FMC rule indexes start at 1 and are those of the current order.
+    """
+    if after is None:
+        return 'insertBefore=1' if current else None
+    i = current.index(after)
+    if i + 1 < len(current):
+        return 'insertBefore={}'.format(i + 2)
+    return 'insertAfter={}'.format(i + 1)
+
+
+def plan_order(current, desired):
+    """
+    Plan the moves and creations that turn the current rule order into the desired order.
+    Rules of the longest common subsequence stay in place, every other rule of the desired order is moved (existing
+    rules) or created (new rules) right after its predecessor. Consecutive new rules are created together.
+    Rules that are not in the desired order must have been deleted beforehand.
+    :param current: Rule names in the current order
+    :param desired: Rule names in the desired order
+    :return: list of ('move', [name], query) and ('create', [names], query) steps, to be applied in order,
+             query is the insertBefore/insertAfter query string parameter or None to append the rules
+    """
+    current = list(current)
+    stable = stable_rules(current, desired)
+    existing = set(current)
+    steps = []
+    after = None
+    for name in desired:
+        if name in stable:
+            pass
+        elif name in existing:
+            if current.index(name) != (current.index(after) + 1 if after is not None else 0):
+                steps.append(('move', [name], _position_query(current, after)))
+                current.remove(name)
+                current.insert(current.index(after) + 1 if after is not None else 0, name)
+        elif steps and steps[-1][0] == 'create' and steps[-1][1][-1] == after:
+            steps[-1][1].append(name)
+            current.insert(current.index(after) + 1, name)
+        else:
+            steps.append(('create', [name], _position_query(current, after)))
+            current.insert(current.index(after) + 1 if after is not None else 0, name)
+        after = name
+    return steps
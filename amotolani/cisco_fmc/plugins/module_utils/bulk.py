@@ -0,0 +1,121 @@
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.fmc import record_change
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.objects import (
+    apply_changes, bulk_create, object_diff
+)
+
+# Counters of the changes made by a bulk module
+CHANGES = ('created', 'updated', 'deleted')
+
+
+class BulkResult(object):
+    """
+    Outcome of a bulk module: the number of created, updated, deleted and unchanged objects and, in diff mode, the
+    before and after state of the changed objects keyed by name.
+    Changes are applied through apply(), which sends nothing in check mode and counts only the changes the FMC accepted.
+    """
+
+    def __init__(self, module, fields, describe=None, counters=(), changes=()):
+        """
+        :param module: AnsibleModule
+        :param fields: Fields of the objects shown in the diff
+        :param describe: Optional function returning the object as shown in the diff, e.g. to flatten nested fields
+        :param counters: Additional counters returned by the module
+        :param changes: Additional counters of changes made to the FMC, e.g. moved rules
+        """
+        self.module = module
+        self.fields = fields
+        self.describe = describe or (lambda obj: obj)
+        self.changes = CHANGES + tuple(changes)
+        self.counts = dict((i, 0) for i in self.changes + ('unchanged',) + tuple(counters))
+        self.diff = dict(before={}, after={})
+
+    @property
+    def changed(self):
+        return any(self.counts[i] for i in self.changes)
+
+    def record(self, change, obj=None, current=None):
+        """
+        Count an object, the created, updated and deleted objects (and the additional changes) are shown in the diff.
+        :param change: created, updated, deleted, unchanged or an additional counter
+        :param obj: Requested object, None when deleted
+        :param current: Existing object, None when created
+        :return: None
+        """
+        self.counts[change] += 1
+        if change not in self.changes:
+            return
+        before = None if current is None else self.describe(current)
+        after = None if obj is None else self.describe(obj)
+        obj_diff = object_diff(before, after, self.fields)
+        name = (obj or current)['name']
+        if before is not None:
+            self.diff['before'][name] = obj_diff['before']
+        if after is not None:
+            self.diff['after'][name] = obj_diff['after']
+
+    def apply(self, fmc, path, changes, bulk_size=None, max_workers=1):
+        """
+        Apply the changes to a collection and count those the FMC accepted, nothing is sent in check mode.
+        Changed collections are recorded, see record_change.
+        :param fmc: FMC session
+        :param path: Collection path relative to the domain configuration URL
+        :param changes: list of (change, obj, current) tuples, see apply_changes
+        :param bulk_size: Create the new objects through the bulk API, bulk_size objects per request
+        :param max_workers: Requests sent at the same time for the changes not sent through the bulk API
+        :return: list of error messages
+        """
+        errors = []
+        applied = len(changes)
+        if bulk_size is not None:
+            created = [i for i in changes if i[0] == 'created']
+            changes = [i for i in changes if i[0] != 'created']
+            if created:
+                if self.module.check_mode:
+                    accepted, error = [i[1] for i in created], None
+                else:
+                    accepted, error = bulk_create(fmc, path, [i[1] for i in created], chunk_size=bulk_size)
+                # The chunks created before a rejected chunk are counted
+                accepted = set(i['name'] for i in accepted)
+                for i in created:
+                    if i[1]['name'] in accepted:
+                        self.record(*i)
+                    else:
+                        applied -= 1
+                if error is not None:
+                    errors.append(error)
+        outcomes = [None] * len(changes) if self.module.check_mode else \
+            apply_changes(fmc, path, changes, max_workers=max_workers)
+        for change, error in zip(changes, outcomes):
+            if error is None:
+                self.record(*change)
+            else:
+                errors.append(error)
+                applied -= 1
+        if not self.module.check_mode and applied:
+            record_change(fmc, path)
+        return errors
+
+    def result(self, **kwargs):
+        result = dict(changed=self.changed, **kwargs)
+        result.update(self.counts)
+        return result
+
+    def fail(self, msg, **kwargs):
+        """
+        Fail the module, the counts of the changes made before the failure are returned.
+        :param msg: Error message
+        :param kwargs: Additional result keys
+        :return: None
+        """
+        self.module.exit_json(**self.result(failed=True, msg=msg, **kwargs))
+
+    def exit(self, **kwargs):
+        """
+        Exit the module with the counts and, in diff mode, the diff of the changed objects.
+        :param kwargs: Additional result keys, e.g. request_stats
+        :return: None
+        """
+        result = self.result(**kwargs)
+        if self.module._diff:
+            result['diff'] = self.diff
+        self.module.exit_json(**result)
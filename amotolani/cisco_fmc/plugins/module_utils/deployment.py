@@ -0,0 +1,312 @@
+import time
+
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.objects import error_message, get, get_all
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.state import StateStore
+
+PENDING_DEPLOY_FILE = 'pending_deploy.json'
+DEPLOYABLE_DEVICES_PATH = 'deployment/deployabledevices'
+DEPLOYMENT_REQUESTS_PATH = 'deployment/deploymentrequests'
+TASK_STATUS_PATH = 'job/taskstatuses'
+DEVICE_GROUPS_PATH = 'devicegroups/devicegrouprecords'
+POLICY_ASSIGNMENTS_PATH = 'assignment/policyassignments'
+DEVICE_HA_PAIRS_PATH = 'devicehapairs/ftddevicehapairs'
+DEVICE_CLUSTERS_PATH = 'deviceclusters/ftddevicecluster'
+
+# Task status polling backs off exponentially up to this interval (seconds)
+MAX_POLL_INTERVAL = 60
+TASK_SUCCESS_STATUSES = ('deployed', 'success', 'succeeded', 'completed')
+TASK_FAILURE_STATUSES = ('failed', 'failure', 'error', 'cancelled')
+
+
+class PendingDeployments(StateStore):
+    """
+    FMC domains with changes that have not been deployed yet, keyed by (fmc host, domain uuid).
+    Modules mark the domain after every change, the deploy module (pending_only: true) deploys once
+    for all of them and clears the mark.
+    """
+
+    def __init__(self, path=None):
+        super(PendingDeployments, self).__init__(PENDING_DEPLOY_FILE, path=path)
+
+    @staticmethod
+    def key(fmc):
+        return '{}|{}'.format(fmc.host, fmc.uuid)
+
+    def mark(self, fmc):
+        """
+        Record that the FMC domain of the session has undeployed changes.
+        :param fmc: FMC session
+        :return: None
+        """
+        now = time.time()
+        with self.locked() as pending:
+            entry = pending.setdefault(self.key(fmc), dict(since=now, changes=0))
+            entry['changes'] += 1
+            entry['updated'] = now
+
+    def get(self, fmc):
+        """
+        Return the pending changes of the FMC domain of the session.
+        :param fmc: FMC session
+        :return: dict with since, updated and changes keys, None if nothing is pending
+        """
+        return self.read().get(self.key(fmc))
+
+    def clear(self, fmc, before):
+        """
+        Forget the pending changes of the FMC domain of the session once they have been deployed.
+        Changes recorded after the deployment was requested are kept.
+        :param fmc: FMC session
+        :param before: Time the deployment was requested
+        :return: None
+        """
+        with self.locked() as pending:
+            entry = pending.get(self.key(fmc))
+            if entry is not None and entry['updated'] <= before:
+                del pending[self.key(fmc)]
+
+
+def mark_pending(fmc):
+    """
+    Record undeployed changes for the FMC session, see PendingDeployments.
+    :param fmc: FMC session
+    :return: None
+    """
+    PendingDeployments().mark(fmc)
+
+
+def get_deployable_devices(fmc):
+    """
+    List the devices with configuration changes that can be deployed.
+    :param fmc: FMC session
+    :return: list of deployable device objects, None on error
+    """
+    devices = get_all(fmc, DEPLOYABLE_DEVICES_PATH)
+    if devices is None:
+        return None
+    return [i for i in devices if i.get('canBeDeployed')]
+
+
+def get_device_group_members(fmc, names):
+    """
+    Look up the member devices of device groups.
+    :param fmc: FMC session
+    :param names: Device group names
+    :return: dict of device group name to list of member devices ({id, name, type}),
+             groups that do not exist are left out. None on error
+    """
+    groups = get_all(fmc, DEVICE_GROUPS_PATH)
+    if groups is None:
+        return None
+    return dict((i['name'], i.get('members', [])) for i in groups if i['name'] in names)
+
+
+def get_policy_targets(fmc, policy_name):
+    """
+    Look up the devices a policy is assigned to.
+    HA pair, cluster and device group targets are returned along with their member devices, see expand_targets.
+    :param fmc: FMC session
+    :param policy_name: Policy name, e.g. an access control policy
+    :return: list of assignment targets ({id, name, type}), None on error
+    """
+    assignments = get_all(fmc, POLICY_ASSIGNMENTS_PATH)
+    if assignments is None:
+        return None
+    targets = []
+    for i in assignments:
+        if i.get('policy', {}).get('name') == policy_name:
+            targets += i.get('targets', [])
+    return expand_targets(fmc, targets)
+
+
+def get_target_members(fmc, target):
+    """
+    Look up the devices of an HA pair, cluster or device group target.
+    :param fmc: FMC session
+    :param target: assignment target or device group member ({id, name, type})
+    :return: list of member devices ({id, name, type}), empty for a device. None on error
+    """
+    if target.get('type') == 'DeviceHAPair':
+        pair = get(fmc, DEVICE_HA_PAIRS_PATH, target['id'])
+        if pair is None:
+            return None
+        return [pair[i] for i in ('primary', 'secondary') if pair.get(i)]
+    if target.get('type') == 'DeviceCluster':
+        cluster = get(fmc, DEVICE_CLUSTERS_PATH, target['id'])
+        if cluster is None:
+            return None
+        # Control and data nodes are named master and slave devices before FMC 7.0
+        nodes = [cluster.get('controlDevice') or cluster.get('masterDevice')]
+        nodes += cluster.get('dataDevices') or cluster.get('slaveDevices') or []
+        return [i['deviceDetails'] for i in nodes if i and i.get('deviceDetails')]
+    if target.get('type') == 'DeviceGroup':
+        group = get(fmc, DEVICE_GROUPS_PATH, target['id'])
+        if group is None:
+            return None
+        return group.get('members', [])
+    return []
+
+
+def expand_targets(fmc, targets):
+    """
+    Add the devices of the HA pair, cluster and device group targets, groups of HA pairs included.
+    The targets themselves are kept, the FMC lists an HA pair or cluster as a single deployable device.
+    :param fmc: FMC session
+    :param targets: list of assignment targets or device group members ({id, name, type})
+    :return: list of targets and their member devices, None on error
+    """
+    expanded = []
+    seen = set()
+    targets = list(targets)
+    while targets:
+        target = targets.pop(0)
+        if target.get('id') in seen:
+            continue
+        seen.add(target.get('id'))
+        expanded.append(target)
+        members = get_target_members(fmc, target)
+        if members is None:
+            return None
+        targets += members
+    return expanded
+
+
+def select_devices(devices, targets):
+    """
+    Keep the deployable devices matching any of the targets by id or name.
+    :param devices: list of deployable device objects
+    :param targets: list of devices ({id, name}) or device names
+    :return: list of deployable device objects
+    """
+    keys = set()
+    for i in targets:
+        if isinstance(i, dict):
+            keys.update((i.get('id'), i.get('name')))
+        else:
+            keys.add(i)
+    keys.discard(None)
+    return [i for i in devices if i['device']['id'] in keys or i['device'].get('name', i['name']) in keys]
+
+
+def request_deployment(fmc, devices, force_deploy=True, ignore_warning=True):
+    """
+    Request a deployment to the given deployable devices.
+    :param fmc: FMC session
+    :param devices: list of deployable device objects, see get_deployable_devices
+    :param force_deploy: Deploy even if the devices have no changes
+    :param ignore_warning: Deploy despite warnings
+    :return: deployment request response, the task id is in metadata.task.id. None on error
+    """
+    json_data = {
+        'type': 'DeploymentRequest',
+        'forceDeploy': force_deploy,
+        'ignoreWarning': ignore_warning,
+        # Changes up to the oldest version pending on any of the devices are deployed
+        'version': min((i['version'] for i in devices), key=int),
+        'deviceList': [i['device']['id'] for i in devices]
+    }
+    url = '{}/{}'.format(fmc.configuration_url, DEPLOYMENT_REQUESTS_PATH)
+    return fmc.send_to_api(method='post', url=url, json_data=json_data)
+
+
+def task_id(response):
+    """
+    Extract the task id from a deployment request response.
+    :param response: deployment request response
+    :return: str, None if the response has no task
+    """
+    try:
+        return response['metadata']['task']['id']
+    except (KeyError, TypeError):
+        return None
+
+
+def get_task_status(fmc, task):
+    """
+    Fetch the status of an FMC task.
+    :param fmc: FMC session
+    :param task: Task id
+    :return: task status object, None on error
+    """
+    url = '{}/{}/{}'.format(fmc.configuration_url, TASK_STATUS_PATH, task)
+    return fmc.send_to_api(method='get', url=url)
+
+
+def task_finished(status):
+    """
+    Check whether a task status is final.
+    :param status: task status object
+    :return: boolean
+    """
+    value = str(status.get('status', '')).lower()
+    return value in TASK_SUCCESS_STATUSES or value in TASK_FAILURE_STATUSES
+
+
+def task_succeeded(status):
+    """
+    Check whether a task status reports success.
+    :param status: task status object
+    :return: boolean
+    """
+    return str(status.get('status', '')).lower() in TASK_SUCCESS_STATUSES
+
+
+def wait_for_task(fmc, task, timeout, poll_interval):
+    """
+    Poll an FMC task until it finishes or the timeout expires.
+    The interval between polls starts at poll_interval and doubles up to MAX_POLL_INTERVAL.
+    :param fmc: FMC session
+    :param task: Task id
+    :param timeout: Seconds to wait for the task
+    :param poll_interval: Seconds before the first poll
+    :return: last task status object (check with task_finished), None on error
+    """
+    deadline = time.time() + timeout
+    interval = poll_interval
+    while True:
+        time.sleep(max(0, min(interval, deadline - time.time())))
+        status = get_task_status(fmc, task)
+        if status is None or task_finished(status) or time.time() >= deadline:
+            return status
+        interval = min(interval * 2, max(MAX_POLL_INTERVAL, poll_interval))
+
+
+def deploy_devices(fmc, devices, wait=False, timeout=1800, poll_interval=10):
+    """
+    Request one deployment to the given devices and optionally wait for it to finish.
+    Safe to run from several threads sharing the FMC session.
+    :param fmc: FMC session
+    :param devices: list of deployable device objects
+    :param wait: Wait for the deployment task to finish
+    :param timeout: Seconds to wait for the deployment task
+    :param poll_interval: Seconds before the first task status poll
+    :return: dict with requested (the FMC accepted the request), the task_id, the per device deployments and, if the
+             deployment failed, msg
+    """
+    requested = time.time()
+    deployments = [dict(name=i['name'], id=i['device']['id'], status='Requested') for i in devices]
+    outcome = dict(requested=False, task_id=None, deployments=deployments)
+    response = request_deployment(fmc, devices)
+    if response is None:
+        for i in deployments:
+            i['status'] = 'Not requested'
+        outcome['msg'] = error_message(fmc)
+        return outcome
+    outcome.update(requested=True, task_id=task_id(response))
+    for i in deployments:
+        i['task_id'] = outcome['task_id']
+    if not wait or outcome['task_id'] is None:
+        return outcome
+
+    status = wait_for_task(fmc, outcome['task_id'], timeout=timeout, poll_interval=poll_interval)
+    if status is None:
+        outcome['msg'] = error_message(fmc)
+        return outcome
+    duration = round(time.time() - requested, 1)
+    for i in deployments:
+        i.update(status=status.get('status'), duration=duration)
+    if not task_finished(status):
+        outcome['msg'] = 'Deployment did not finish within {} seconds'.format(timeout)
+    elif not task_succeeded(status):
+        outcome['msg'] = 'Deployment failed: {}'.format(status.get('message', status.get('status')))
+    return outcome
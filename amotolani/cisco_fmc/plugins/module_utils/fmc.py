@@ -0,0 +1,474 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+import urllib3
+from ansible.module_utils.connection import Connection, ConnectionError
+
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.deployment import mark_pending
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.objects import (
+    NETWORK_ADDRESSES_PATH, NETWORK_OBJECT_PATHS, ObjectIndex, error_message
+)
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.rate_limit import RateLimiter, backoff_delay
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.snapshot import (
+    DEFAULT_SNAPSHOT_MAX_AGE, Snapshot, existing_snapshot, invalidate_snapshot, snapshot_max_age
+)
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.token_cache import CachedToken, TokenCache
+
+# Certificates are not verified (VERIFY_CERT)
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+class FmcRequestMixin(object):
+    """
+    Request layer shared by every FMC session type.
+    Implements fmcapi's FMC.send_to_api contract (paging is followed and merged into "items", errors return None
+    and leave the decoded error body in error_response) on top of a single _request() primitive.
+    Sessions with a rate_limiter take a token from the shared bucket of the FMC user before every request.
+    Throttled (HTTP 429) requests are retried after a jittered backoff, see request_stats for the counters.
+    Requests sent concurrently by several threads each keep their own error_response.
+    """
+
+    MAX_PAGING_REQUESTS = 2000
+    MAX_RETRIES = 5
+    rate_limiter = None
+    rate_limit_key = None
+    # Snapshot answering the session, only set by SnapshotFMC
+    snapshot = None
+    _request_stats = None
+    _stats_lock = threading.Lock()
+    _error_response = None
+    _thread_errors = None
+
+    @property
+    def request_stats(self):
+        """
+        Counters of the session: requests sent (retries included), throttled and retried requests and seconds spent
+        waiting for the rate limit.
+        """
+        if self._request_stats is None:
+            self._request_stats = dict(requests=0, throttled=0, retried=0, waited=0)
+        return self._request_stats
+
+    @property
+    def error_response(self):
+        """
+        Decoded error body of the last failed request of the calling thread, or of the last failed request of the
+        session when the calling thread has none.
+        """
+        return getattr(self._thread_errors, 'response', None) or self._error_response
+
+    @error_response.setter
+    def error_response(self, value):
+        if self._thread_errors is None:
+            self._thread_errors = threading.local()
+        self._thread_errors.response = value
+        self._error_response = value
+
+    def send_to_api(self, method='', url='', headers='', json_data=None, more_items=None):
+        """
+        Send API call to FMC.
+        :param method: get, post, put or delete
+        :param url: URL for API call
+        :param headers: Unused, kept for compatibility with fmcapi
+        :param json_data: JSON serializable payload
+        :param more_items: Unused, kept for compatibility with fmcapi
+        :return: JSON response from FMC, None on error
+        """
+        items = []
+        pages = 0
+        while True:
+            status_code, json_response = self._send(method, url, json_data)
+            if status_code > 301 or 'error' in json_response:
+                self.error_response = json_response
+                return None
+            paging = json_response.get('paging')
+            if paging is None:
+                return json_response
+            if 'next' in paging and pages <= self.MAX_PAGING_REQUESTS:
+                items += json_response.get('items', [])
+                url = paging['next'][0]
+                pages += 1
+                continue
+            json_response['items'] = items + json_response.get('items', [])
+            return json_response
+
+    def get_page(self, url):
+        """
+        Send a single GET request without following the paging links of the response.
+        :param url: URL for API call, including the limit and offset of the page
+        :return: JSON response from FMC, None on error
+        """
+        status_code, json_response = self._send('get', url, None)
+        if status_code > 301 or 'error' in json_response:
+            self.error_response = json_response
+            return None
+        return json_response
+
+    def _count(self, counter, value=1):
+        # Requests are counted by every thread sending over the session
+        with self._stats_lock:
+            self.request_stats[counter] = round(self.request_stats[counter] + value, 3)
+
+    def _send(self, method, url, json_data):
+        for attempt in range(self.MAX_RETRIES + 1):
+            if self.rate_limiter is not None:
+                self._count('waited', self.rate_limiter.acquire(self.rate_limit_key))
+            self._count('requests')
+            status_code, json_response, retry_after = self._request(method, url, json_data)
+            if not isinstance(json_response, dict):
+                json_response = {'items': json_response}
+            if status_code == 401 and attempt == 0 and self._reauthenticate():
+                continue
+            if status_code == 429:
+                self._count('throttled')
+                retry = attempt < self.MAX_RETRIES
+                delay = backoff_delay(attempt, retry_after)
+                if self.rate_limiter is not None:
+                    self.rate_limiter.throttled(self.rate_limit_key, delay, retry=retry)
+                if retry:
+                    self._count('retried')
+                    time.sleep(delay)
+                    continue
+                msg = 'FMC rate limit exceeded (HTTP 429), the request was retried {} times'.format(attempt)
+                json_response = {'error': {'messages': [{'description': msg}]}}
+            return status_code, json_response
+        return status_code, json_response
+
+    def _request(self, method, url, json_data):
+        """
+        Send a single request.
+        :return: tuple of HTTP status code, decoded JSON body and Retry-After seconds (or None)
+        """
+        raise NotImplementedError
+
+    def _reauthenticate(self):
+        """
+        Replace credentials the FMC rejected. Return True if the request should be retried.
+        """
+        return False
+
+
+class CachedFMC(FmcRequestMixin):
+    """
+    fmcapi compatible FMC session that authenticates through the shared TokenCache instead of generating a new token,
+    and sends every request over one keep-alive HTTPS session.
+    fmcapi is only imported to deploy on exit (autodeploy), modules that do not use fmcapi API objects never load it.
+    """
+
+    API_CONFIG_VERSION = 'api/fmc_config/v1'
+    API_PLATFORM_VERSION = 'api/fmc_platform/v1'
+    VERIFY_CERT = False
+
+    def __init__(self, host, username, password, domain=None, autodeploy=False, limit=1000, timeout=5, wait_time=15,
+                 token_cache=None):
+        self.host = host
+        self.username = username
+        self.password = password
+        self.domain = domain
+        self.autodeploy = autodeploy
+        self.limit = limit
+        self.timeout = timeout
+        self.wait_time = wait_time
+        self.token_cache = token_cache or TokenCache()
+        self.session = requests.Session()
+        self.rate_limiter = RateLimiter()
+        self.rate_limit_key = RateLimiter.key(self.host, self.username)
+        self.mytoken = None
+        self.error_response = None
+        self.uuid = None
+        self.configuration_url = None
+        self.platform_url = None
+        self.serverVersion = None
+        self.vdbVersion = None
+        self.sruVersion = None
+        self.geoVersion = None
+
+    def __enter__(self):
+        self.mytoken = CachedToken(host=self.host, username=self.username, password=self.password,
+                                   domain=self.domain, verify_cert=self.VERIFY_CERT, timeout=self.timeout,
+                                   cache=self.token_cache)
+        self.uuid = self.mytoken.uuid
+        self.configuration_url = 'https://{}/{}/domain/{}'.format(self.host, self.API_CONFIG_VERSION, self.uuid)
+        self.platform_url = 'https://{}/{}'.format(self.host, self.API_PLATFORM_VERSION)
+        version = self.send_to_api(method='get', url='{}/info/serverversion'.format(self.platform_url))
+        if version is None:
+            raise requests.exceptions.HTTPError(error_message(self))
+        version = (version.get('items') or [{}])[0]
+        self.serverVersion = version.get('serverVersion')
+        self.vdbVersion = version.get('vdbVersion')
+        self.sruVersion = version.get('sruVersion')
+        self.geoVersion = version.get('geoVersion')
+        return self
+
+    def __exit__(self, *args):
+        try:
+            if self.autodeploy:
+                from fmcapi import DeploymentRequests
+                DeploymentRequests(fmc=self).post()
+        finally:
+            self.session.close()
+
+    def _request(self, method, url, json_data):
+        headers = {'Content-Type': 'application/json', 'X-auth-access-token': self.mytoken.get_token()}
+        response = self.session.request(method.upper(), url, json=json_data, headers=headers,
+                                        verify=self.VERIFY_CERT, timeout=self.timeout)
+        try:
+            json_response = response.json()
+        except ValueError:
+            json_response = {}
+        retry_after = response.headers.get('Retry-After')
+        return response.status_code, json_response, int(retry_after) if retry_after and retry_after.isdigit() else None
+
+    def _reauthenticate(self):
+        self.mytoken.invalidate()
+        return True
+
+
+class HttpApiFMC(FmcRequestMixin):
+    """
+    fmcapi compatible FMC session backed by the amotolani.cisco_fmc.fmc httpapi connection.
+    Requests are forwarded to the persistent connection, which owns the authenticated keep-alive session,
+    so fmcapi API objects work unchanged. The rate limit and the retries of throttled requests are handled here,
+    like for CachedFMC, the connection returns throttled requests as they are.
+    """
+
+    API_CONFIG_VERSION = 'api/fmc_config/v1'
+    API_PLATFORM_VERSION = 'api/fmc_platform/v1'
+
+    def __init__(self, socket_path, autodeploy=False, limit=1000, wait_time=15):
+        self.connection = Connection(socket_path)
+        self.autodeploy = autodeploy
+        self.limit = limit
+        self.wait_time = wait_time
+        self.error_response = None
+        self.host = None
+        self.uuid = None
+        self.configuration_url = None
+        self.platform_url = None
+        self.serverVersion = None
+        self.vdbVersion = None
+        self.sruVersion = None
+        self.geoVersion = None
+
+    def __enter__(self):
+        info = self.connection.get_session_info()
+        self.host = info['host']
+        self.uuid = info['domain_uuid']
+        self.rate_limiter = RateLimiter()
+        self.rate_limit_key = RateLimiter.key(self.host, info['username'])
+        self.configuration_url = 'https://{}/{}/domain/{}'.format(self.host, self.API_CONFIG_VERSION, self.uuid)
+        self.platform_url = 'https://{}/{}'.format(self.host, self.API_PLATFORM_VERSION)
+        version = info['server_version'] or {}
+        self.serverVersion = version.get('serverVersion')
+        self.vdbVersion = version.get('vdbVersion')
+        self.sruVersion = version.get('sruVersion')
+        self.geoVersion = version.get('geoVersion')
+        return self
+
+    def __exit__(self, *args):
+        if self.autodeploy:
+            from fmcapi import DeploymentRequests
+            DeploymentRequests(fmc=self).post()
+
+    def _request(self, method, url, json_data):
+        parts = urlsplit(url)
+        path = parts.path + ('?' + parts.query if parts.query else '')
+        # Tokens are handled by the connection plugin
+        return tuple(self.connection.send_request(method, path, json_data))
+
+
+class SnapshotFMC(FmcRequestMixin):
+    """
+    Read-only fmcapi compatible FMC session answered from the on-disk snapshot of the FMC inventory, used by
+    check_source=snapshot. GET requests for the listings and the objects of the collections in the snapshot are
+    answered like the FMC would, no request reaches the FMC. A collection missing from the snapshot or changed by a
+    module since it was stored fails the module, a collection older than the snapshot max age is used with a warning.
+    """
+
+    API_CONFIG_VERSION = 'api/fmc_config/v1'
+    API_PLATFORM_VERSION = 'api/fmc_platform/v1'
+
+    def __init__(self, module, host, username=None):
+        self.module = module
+        self.host = host
+        self.username = username
+        self.autodeploy = False
+        self.limit = 1000
+        self.error_response = None
+        self.uuid = None
+        self.snapshot = None
+        self.max_age = snapshot_max_age() or DEFAULT_SNAPSHOT_MAX_AGE
+        self._checked = set()
+        self.configuration_url = None
+        self.platform_url = None
+        self.serverVersion = None
+
+    def __enter__(self):
+        domains = Snapshot.domains(self.host)
+        if len(domains) > 1:
+            # Prefer the default domain of the user, as recorded by the token cache
+            entry = TokenCache().read().get(TokenCache.key(self.host, self.username)) or {}
+            domains = [i for i in domains if i == entry.get('domain_uuid')]
+        if len(domains) != 1:
+            result = dict(failed=True, msg='No snapshot of {} to check against, gather one first with '
+                                           'amotolani.cisco_fmc.fmc_facts (snapshot: true)'.format(self.host))
+            self.module.exit_json(**result)
+        self.uuid = domains[0]
+        self.snapshot = Snapshot(self)
+        self.configuration_url = 'https://{}/{}/domain/{}'.format(self.host, self.API_CONFIG_VERSION, self.uuid)
+        self.platform_url = 'https://{}/{}'.format(self.host, self.API_PLATFORM_VERSION)
+        self.serverVersion = self.snapshot.info.read().get('server_version') or '6.7.0'
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def _count(self, counter, value=1):
+        # No request reaches the FMC
+        pass
+
+    def _check(self, path):
+        """
+        Fail the module if a stored collection was changed by a module since it was stored, warn if it is older than
+        the snapshot max age. Each collection is checked once.
+        :param path: Collection path relative to the domain configuration URL
+        :return: None
+        """
+        if path in self._checked:
+            return
+        self._checked.add(path)
+        if self.snapshot.changed(path):
+            result = dict(failed=True, msg='{} changed since the snapshot of {} was gathered, gather it again with '
+                                           'amotolani.cisco_fmc.fmc_facts (snapshot: true) or check this task with '
+                                           'check_source=fmc'.format(path, self.host))
+            self.module.exit_json(**result)
+        age = self.snapshot.age(path)
+        if age > self.max_age:
+            self.module.warn('{} in the snapshot of {} is {:.0f} seconds old, older than {} seconds, it may not '
+                             'reflect the FMC'.format(path, self.host, age, self.max_age))
+
+    def _stored(self, path):
+        items = self.snapshot.stored(path)
+        if items is not None:
+            self._check(path)
+        elif path == NETWORK_ADDRESSES_PATH:
+            # networkaddresses lists the Host, Network and Range objects, build it from their collections
+            paths = [NETWORK_OBJECT_PATHS[i] for i in ('Host', 'Network', 'Range')]
+            collections = [self.snapshot.stored(i) for i in paths]
+            if None not in collections:
+                for i in paths:
+                    self._check(i)
+                items = [i for collection in collections for i in collection]
+        return items
+
+    def _request(self, method, url, json_data):
+        parts = urlsplit(url)
+        prefix = urlsplit(self.configuration_url).path + '/'
+        if method.lower() != 'get' or not parts.path.startswith(prefix):
+            return 405, {'error': {'messages': [{'description': 'Not available with check_source=snapshot'}]}}, None
+        path = parts.path[len(prefix):].strip('/')
+        query = dict((k, v[0]) for k, v in parse_qs(parts.query).items())
+        items = self._stored(path)
+        if items is not None:
+            if 'name' in query:
+                items = [i for i in items if i.get('name') == query['name']]
+            if query.get('expanded') != 'true':
+                items = [dict((k, i[k]) for k in ('id', 'name', 'type') if k in i) for i in items]
+            paging = dict(offset=0, limit=len(items), count=len(items), pages=1)
+            return 200, dict(items=items, paging=paging) if items else dict(paging=paging), None
+        collection, _, obj_id = path.rpartition('/')
+        items = self._stored(collection)
+        if items is None:
+            result = dict(failed=True, msg='{} is not in the snapshot of {}, check this task with '
+                                           'check_source=fmc'.format(path, self.host))
+            self.module.exit_json(**result)
+        for i in items:
+            if i['id'] == obj_id:
+                return 200, i, None
+        msg = 'Object {} not found in the snapshot'.format(obj_id)
+        return 404, {'error': {'messages': [{'description': msg}]}}, None
+
+
+@contextmanager
+def fmc_connection(module, autodeploy=False):
+    """
+    Open the authenticated FMC session used by a module.
+    Tasks using the amotolani.cisco_fmc.fmc httpapi connection share the persistent session of that connection,
+    other tasks authenticate with the fmc, username and password parameters through the token cache.
+    With check_source=snapshot (check mode only) the session is answered from the on-disk snapshot, see SnapshotFMC.
+    Network failures exit with unreachable=True, rejected credentials/HTTP errors with failed=True.
+    :param module: AnsibleModule
+    :param autodeploy: Deploy changes to deployable devices when the session is closed
+    :return: fmcapi compatible FMC object
+    """
+    if module.params.get('check_source') == 'snapshot':
+        if not module.check_mode or not module.params['fmc']:
+            result = dict(failed=True, msg='check_source=snapshot requires check mode and the fmc parameter')
+            module.exit_json(**result)
+        fmc1 = SnapshotFMC(module, module.params['fmc'], username=module.params['username'])
+    elif module._socket_path:
+        fmc1 = HttpApiFMC(module._socket_path, autodeploy=autodeploy)
+    else:
+        missing = [i for i in ('fmc', 'username', 'password') if not module.params[i]]
+        if missing:
+            result = dict(failed=True, msg='missing required arguments: {}'.format(', '.join(missing)))
+            module.exit_json(**result)
+        fmc1 = CachedFMC(host=module.params['fmc'], username=module.params['username'],
+                         password=module.params['password'], autodeploy=autodeploy)
+    try:
+        fmc1.__enter__()
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+        result = dict(unreachable=True, msg='Unable to establish network connection to FMC')
+        module.exit_json(**result)
+    except (requests.exceptions.HTTPError, ConnectionError) as err:
+        result = dict(failed=True, msg='Connection to FMC failed. Reason: {}'.format(err))
+        module.exit_json(**result)
+    try:
+        yield fmc1
+    finally:
+        fmc1.__exit__(*sys.exc_info())
+
+
+def fail_on_error(module, fmc, response):
+    """
+    Fail the module with the error reported by the FMC when a request failed.
+    :param module: AnsibleModule
+    :param fmc: FMC session
+    :param response: Response of the request, None (or False for fmcapi objects that were not sent) on error
+    :return: response
+    """
+    if response is None or response is False:
+        result = dict(failed=True, msg=error_message(fmc))
+        module.exit_json(**result)
+    return response
+
+
+def record_change(fmc, *paths):
+    """
+    Record a change made through the FMC session: the domain has undeployed changes (see mark_pending) and the
+    changed collections are refreshed the next time they are read from the snapshot (see invalidate_snapshot).
+    :param fmc: FMC session
+    :param paths: Changed collection paths relative to the domain configuration URL
+    :return: None
+    """
+    mark_pending(fmc)
+    invalidate_snapshot(fmc, *paths)
+
+
+def build_object_index(fmc):
+    """
+    Build the ObjectIndex resolving the object references of a module.
+    With the CISCO_FMC_SNAPSHOT_MAX_AGE environment variable set and a snapshot gathered for the FMC domain (see
+    fmc_facts), the referenced collections are read from the snapshot, so re-runs only list the collections that
+    changed or aged out since.
+    :param fmc: FMC session
+    :return: ObjectIndex
+    """
+    max_age = snapshot_max_age()
+    # A SnapshotFMC session already answers from the snapshot
+    snapshot = existing_snapshot(fmc) if max_age > 0 and fmc.snapshot is None else None
+    return ObjectIndex(fmc, snapshot=snapshot, max_age=max_age)
@@ -0,0 +1,293 @@
+from concurrent.futures import ThreadPoolExecutor
+
+# FMC accepts at most 1000 objects in a single bulk POST
+BULK_CHUNK_SIZE = 1000
+
+NETWORK_OBJECT_PATHS = {
+    'Host': 'object/hosts',
+    'Range': 'object/ranges',
+    'Network': 'object/networks',
+    'FQDN': 'object/fqdns'
+}
+
+# Hosts, ranges and networks are all listed by the networkaddresses collection
+NETWORK_ADDRESSES_PATH = 'object/networkaddresses'
+NETWORK_GROUPS_PATH = 'object/networkgroups'
+PORT_OBJECTS_PATH = 'object/protocolportobjects'
+PORT_GROUPS_PATH = 'object/portobjectgroups'
+VLAN_TAGS_PATH = 'object/vlantags'
+SECURITY_ZONES_PATH = 'object/securityzones'
+
+
+def error_message(fmc):
+    """
+    Extract the error description from the last failed FMC request.
+    :param fmc: FMC session
+    :return: str
+    """
+    try:
+        return fmc.error_response['error']['messages'][0]['description']
+    except (AttributeError, KeyError, IndexError, TypeError):
+        return 'An error occurred while sending request to cisco fmc'
+
+
+def object_diff(current, requested, fields):
+    """
+    Build the before/after diff returned in diff mode.
+    :param current: Existing object, None if it does not exist
+    :param requested: Requested object, None if it is to be removed
+    :param fields: Fields shown in the diff
+    :return: dict with before and after keys
+    """
+    def shown(obj):
+        return dict((k, obj[k]) for k in fields if obj.get(k) is not None) if obj else {}
+    return dict(before=shown(current), after=shown(requested))
+
+
+def get_all(fmc, path, expanded=True, max_workers=1):
+    """
+    Fetch every object of a collection, following the paging links of the listing.
+    With max_workers > 1 the first page is fetched alone and, once paging.count is known,
+    the remaining pages are fetched concurrently by at most max_workers threads.
+    :param fmc: FMC session
+    :param path: Collection path relative to the domain configuration URL, e.g. object/hosts
+    :param expanded: Request the full object instead of the id, name and type only
+    :param max_workers: Pages fetched at the same time
+    :return: list of objects in listing order, None on error
+    """
+    url = '{}/{}?limit={}'.format(fmc.configuration_url, path, fmc.limit)
+    if expanded:
+        url += '&expanded=true'
+    if max_workers <= 1:
+        response = fmc.send_to_api(method='get', url=url)
+        if response is None:
+            return None
+        return response.get('items', [])
+
+    response = fmc.get_page(url)
+    if response is None:
+        return None
+    items = response.get('items', [])
+    count = response.get('paging', {}).get('count', len(items))
+    # The size of the first page is the page size the FMC actually applied
+    offsets = range(len(items), count, len(items)) if items else []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pages = list(pool.map(lambda offset: fmc.get_page('{}&offset={}'.format(url, offset)), offsets))
+    for page in pages:
+        if page is None:
+            return None
+        items += page.get('items', [])
+    return items
+
+
+def chunks(items, size=BULK_CHUNK_SIZE):
+    """
+    Split a list into consecutive chunks of at most size items.
+    """
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def bulk_create(fmc, path, items, chunk_size=BULK_CHUNK_SIZE, query=None):
+    """
+    Create objects through the bulk POST endpoint of a collection, chunk_size objects per request.
+    Creation stops at the first chunk rejected by the FMC, the objects of the chunks before it stay created.
+    :param fmc: FMC session
+    :param path: Collection path relative to the domain configuration URL
+    :param items: list of object payloads
+    :param chunk_size: Objects per request
+    :param query: Additional query string parameters, e.g. section=mandatory
+    :return: tuple of the list of created objects and the error message of the rejected chunk, None if every chunk
+             was created
+    """
+    url = '{}/{}?bulk=true'.format(fmc.configuration_url, path)
+    if query:
+        url += '&' + query
+    created = []
+    for chunk in chunks(items, chunk_size):
+        response = fmc.send_to_api(method='post', url=url, json_data=chunk)
+        if response is None:
+            return created, error_message(fmc)
+        created += response.get('items', [])
+    return created, None
+
+
+def get(fmc, path, obj_id):
+    """
+    Fetch a single object by id.
+    :param fmc: FMC session
+    :param path: Collection path relative to the domain configuration URL
+    :param obj_id: Object id
+    :return: object, None on error
+    """
+    url = '{}/{}/{}'.format(fmc.configuration_url, path, obj_id)
+    return fmc.send_to_api(method='get', url=url)
+
+
+def create(fmc, path, obj):
+    """
+    Create a single object.
+    :param fmc: FMC session
+    :param path: Collection path relative to the domain configuration URL
+    :param obj: Object payload
+    :return: created object, None on error
+    """
+    url = '{}/{}'.format(fmc.configuration_url, path)
+    return fmc.send_to_api(method='post', url=url, json_data=obj)
+
+
+def update(fmc, path, obj, query=None):
+    """
+    Replace an existing object.
+    :param fmc: FMC session
+    :param path: Collection path relative to the domain configuration URL
+    :param obj: Object payload including its id
+    :param query: Query string parameters, e.g. insertBefore=2
+    :return: updated object, None on error
+    """
+    url = '{}/{}/{}'.format(fmc.configuration_url, path, obj['id'])
+    if query:
+        url += '?' + query
+    return fmc.send_to_api(method='put', url=url, json_data=obj)
+
+
+def delete(fmc, path, obj_id):
+    """
+    Delete an existing object.
+    :param fmc: FMC session
+    :param path: Collection path relative to the domain configuration URL
+    :param obj_id: Object id
+    :return: deleted object, None on error
+    """
+    url = '{}/{}/{}'.format(fmc.configuration_url, path, obj_id)
+    return fmc.send_to_api(method='delete', url=url)
+
+
+def apply_changes(fmc, path, changes, max_workers=1):
+    """
+    Create, update or delete objects of a collection, one request per object and max_workers requests at a time.
+    Every change is attempted, a failed request does not stop the others.
+    :param fmc: FMC session
+    :param path: Collection path relative to the domain configuration URL
+    :param changes: list of (change, obj, current) tuples, change is created, updated or deleted, obj the payload
+                    (None when deleted) and current the existing object (None when created)
+    :param max_workers: Requests sent at the same time
+    :return: list with, for each change in order, None if it was applied or the error message of its request
+    """
+    def apply(change):
+        change, obj, current = change
+        if change == 'created':
+            response = create(fmc, path, obj)
+        elif change == 'updated':
+            response = update(fmc, path, obj)
+        else:
+            response = delete(fmc, path, current['id'])
+        # error_response is kept per thread, the message is the one of this request
+        return None if response is not None else '{}: {}'.format((obj or current)['name'], error_message(fmc))
+
+    if max_workers <= 1 or len(changes) <= 1:
+        return [apply(i) for i in changes]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(changes))) as pool:
+        return list(pool.map(apply, changes))
+
+
+def index_by_name(objects):
+    """
+    Map object names to objects.
+    :param objects: list of objects
+    :return: dict
+    """
+    return dict((i['name'], i) for i in objects)
+
+
+class ObjectIndex(object):
+    """
+    In-memory name to {id, type} index of FMC objects, built from one paged listing per collection
+    the first time the collection is looked up and shared by every lookup that follows.
+    With check_source=snapshot the listings are served from the on-disk snapshot by the SnapshotFMC session.
+    With a snapshot, collections are read from the snapshot while they are younger than max_age and no module changed
+    them since, stale collections are listed again and stored in the snapshot (see Snapshot.collection).
+    """
+
+    def __init__(self, fmc, snapshot=None, max_age=0):
+        self.fmc = fmc
+        self.snapshot = snapshot
+        self.max_age = max_age
+        self._indexes = {}
+
+    def _list(self, path):
+        if self.snapshot is None:
+            return get_all(self.fmc, path, expanded=False)
+        if path == NETWORK_ADDRESSES_PATH:
+            # networkaddresses lists the Host, Network and Range objects, each is stored (and invalidated) on its own
+            collections = [self._list(NETWORK_OBJECT_PATHS[i]) for i in ('Host', 'Network', 'Range')]
+            return None if None in collections else [i for collection in collections for i in collection]
+        return self.snapshot.collection(path, max_age=self.max_age)[0]
+
+    def load(self, path):
+        """
+        Return the index of a collection, fetching the collection listing if it is not indexed yet.
+        :param path: Collection path relative to the domain configuration URL, e.g. object/hosts
+        :return: dict of name to {id, name, type}, None on error
+        """
+        path = path.strip('/')
+        if path not in self._indexes:
+            objects = self._list(path)
+            if objects is None:
+                return None
+            self._indexes[path] = dict((i['name'], dict(id=i['id'], name=i['name'], type=i['type'])) for i in objects)
+        return self._indexes[path]
+
+    def prefetch(self, paths, max_workers=4):
+        """
+        Index several collections ahead of their lookups, the listings are fetched concurrently over the FMC session.
+        :param paths: Collection paths relative to the domain configuration URL
+        :param max_workers: Listings fetched at the same time
+        :return: boolean, False if a listing failed
+        """
+        paths = [i for i in dict.fromkeys(i.strip('/') for i in paths) if i not in self._indexes]
+        if max_workers > 1 and len(paths) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as pool:
+                indexes = list(pool.map(self.load, paths))
+        else:
+            indexes = [self.load(i) for i in paths]
+        return None not in indexes
+
+    def find(self, path, name):
+        """
+        Look up an object by name.
+        :param path: Collection path relative to the domain configuration URL
+        :param name: Object name
+        :return: {id, name, type} or None if the object does not exist or the listing failed
+        """
+        index = self.load(path)
+        if index is None:
+            return None
+        return index.get(name)
+
+
+def resolve_networks(object_index, names):
+    """
+    Resolve network object names in a single pass.
+    Hosts, ranges and networks are looked up in the networkaddresses listing, names not found there
+    in the network groups listing, which is only fetched when needed.
+    :param object_index: ObjectIndex of the FMC session
+    :param names: Network object names
+    :return: dict of resolved name to {id, name, type}, names that do not exist are left out. None on error
+    """
+    addresses = object_index.load(NETWORK_ADDRESSES_PATH)
+    if addresses is None:
+        return None
+    groups = None
+    resolved = {}
+    for name in names:
+        obj = addresses.get(name)
+        if obj is None:
+            if groups is None:
+                groups = object_index.load(NETWORK_GROUPS_PATH)
+                if groups is None:
+                    return None
+            obj = groups.get(name)
+        if obj is not None:
+            resolved[name] = obj
+    return resolved
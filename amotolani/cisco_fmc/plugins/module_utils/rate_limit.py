@@ -0,0 +1,112 @@
+import os
+import random
+import time
+
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.state import StateStore
+
+RATE_LIMIT_FILE = 'rate_limit.json'
+
+# FMC accepts 120 REST API requests per minute per user.
+# Override with the CISCO_FMC_REQUESTS_PER_MINUTE environment variable (e.g. via the task/play "environment" keyword).
+REQUESTS_PER_MINUTE_ENV = 'CISCO_FMC_REQUESTS_PER_MINUTE'
+DEFAULT_REQUESTS_PER_MINUTE = 120
+# Requests that can be sent at once after the bucket has been idle
+DEFAULT_BURST = 10
+# Throttled requests without a Retry-After back off exponentially up to this delay (seconds)
+MAX_BACKOFF = 60
+
+
+def backoff_delay(attempt, retry_after=None):
+    """
+    Compute the time to wait before retrying a throttled (HTTP 429) request.
+    The Retry-After of the FMC is honoured, otherwise the delay doubles with every attempt up to MAX_BACKOFF.
+    Jitter is added so that the workers throttled together do not retry together.
+    :param attempt: Number of the failed attempt, starting at 0
+    :param retry_after: Retry-After seconds sent by the FMC, None if absent
+    :return: seconds
+    """
+    if retry_after:
+        return retry_after + random.uniform(0, 1)
+    delay = min(MAX_BACKOFF, 2 ** attempt)
+    return random.uniform(delay / 2.0, delay)
+
+
+class RateLimiter(StateStore):
+    """
+    Token buckets shared by every module invocation and connection, keyed by (fmc host, username) as the FMC
+    rate limit applies per user.
+    Every request takes a token, tokens come back at the allowed rate up to a small burst. A request finding the
+    bucket empty reserves the next token and sleeps until it is due outside the lock, so waiting workers are served
+    in turn instead of racing. A throttled request empties the bucket until its backoff is over, for every worker.
+    Each bucket also counts the requests, the throttled and retried requests and the seconds spent waiting.
+    """
+
+    def __init__(self, path=None, requests_per_minute=None, burst=DEFAULT_BURST):
+        """
+        :param path: Optional full path, overrides the file in the collection cache directory
+        :param requests_per_minute: Allowed request rate, defaults to the CISCO_FMC_REQUESTS_PER_MINUTE environment
+                                    variable or DEFAULT_REQUESTS_PER_MINUTE
+        :param burst: Bucket size
+        """
+        super(RateLimiter, self).__init__(RATE_LIMIT_FILE, path=path)
+        requests_per_minute = requests_per_minute or int(os.environ.get(REQUESTS_PER_MINUTE_ENV) or
+                                                         DEFAULT_REQUESTS_PER_MINUTE)
+        self.rate = requests_per_minute / 60.0
+        self.burst = burst
+
+    @staticmethod
+    def key(host, username):
+        return '{}|{}'.format(host, username)
+
+    def _bucket(self, buckets, key, now):
+        bucket = buckets.setdefault(key, dict(tokens=self.burst, updated=now, requests=0, throttled=0, retried=0,
+                                              waited=0))
+        # Before the end of a backoff (updated in the future) the bucket is still refilling from empty
+        bucket['tokens'] = min(self.burst, bucket['tokens'] + (now - bucket['updated']) * self.rate)
+        bucket['updated'] = now
+        return bucket
+
+    def acquire(self, key):
+        """
+        Take a token for one request, waiting until one is available.
+        :param key: Bucket key, see key()
+        :return: seconds waited
+        """
+        with self.locked() as buckets:
+            bucket = self._bucket(buckets, key, time.time())
+            bucket['tokens'] -= 1
+            # A negative balance is the queue of reserved tokens
+            wait = max(0, -bucket['tokens'] / self.rate)
+            bucket['requests'] += 1
+            bucket['waited'] = round(bucket['waited'] + wait, 3)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def throttled(self, key, delay, retry=True):
+        """
+        Record a throttled request and hold back every request of the bucket for the backoff delay.
+        :param key: Bucket key, see key()
+        :param delay: Backoff delay in seconds, see backoff_delay()
+        :param retry: The request is retried after the delay
+        :return: None
+        """
+        with self.locked() as buckets:
+            now = time.time()
+            bucket = self._bucket(buckets, key, now)
+            bucket['tokens'] = min(bucket['tokens'], 0)
+            bucket['updated'] = max(bucket['updated'], now + delay)
+            bucket['throttled'] += 1
+            if retry:
+                bucket['retried'] += 1
+
+    def stats(self, key):
+        """
+        Return the counters of a bucket.
+        :param key: Bucket key, see key()
+        :return: dict with the requests, throttled, retried and waited (seconds) counters, None if unused
+        """
+        bucket = self.read().get(key)
+        if bucket is None:
+            return None
+        return dict((k, bucket[k]) for k in ('requests', 'throttled', 'retried', 'waited'))
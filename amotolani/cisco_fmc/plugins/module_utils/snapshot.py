@@ -0,0 +1,209 @@
+import errno
+import os
+import time
+
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.objects import get_all
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.state import StateStore, cache_dir
+
+SNAPSHOT_DIR = 'snapshots'
+# Modules resolve object references from the snapshot collections younger than this age (seconds), 0 disables it.
+# Set with the CISCO_FMC_SNAPSHOT_MAX_AGE environment variable (e.g. via the task/play "environment" keyword).
+SNAPSHOT_MAX_AGE_ENV = 'CISCO_FMC_SNAPSHOT_MAX_AGE'
+# Age (seconds) above which check_source=snapshot warns that a collection may not reflect the FMC
+DEFAULT_SNAPSHOT_MAX_AGE = 300
+SNAPSHOT_CHANGES_FILE = 'changes.json'
+SNAPSHOT_INFO_FILE = 'info.json'
+
+
+def _timestamp(obj):
+    return obj.get('metadata', {}).get('timestamp')
+
+
+class Snapshot(object):
+    """
+    On-disk snapshot of the FMC object inventory of one FMC domain, shared by every module invocation.
+    Each collection (e.g. object/hosts) is stored in its own file with the expanded objects (links left out) and the
+    time of the listing it was built from. A collection is served from disk while it is younger than max_age and
+    no module changed it since, see invalidate().
+    The FMC REST API cannot list the objects modified since a given time, so a refresh lists the collection again
+    and the delta (added, changed and removed objects) is computed locally from the ids and metadata.timestamp.
+    """
+
+    def __init__(self, fmc, directory=None):
+        """
+        :param fmc: FMC session
+        :param directory: Optional snapshot directory, overrides the collection cache directory
+        """
+        self.fmc = fmc
+        self.directory = directory or self.path(fmc.host, fmc.uuid)
+        try:
+            os.makedirs(self.directory, 0o700)
+        except OSError as err:
+            if err.errno != errno.EEXIST:
+                raise
+        self.changes = StateStore(SNAPSHOT_CHANGES_FILE, path=os.path.join(self.directory, SNAPSHOT_CHANGES_FILE))
+        self.info = StateStore(SNAPSHOT_INFO_FILE, path=os.path.join(self.directory, SNAPSHOT_INFO_FILE))
+
+    @staticmethod
+    def name(host, uuid):
+        return '{}_{}'.format(host.replace(':', '_'), uuid)
+
+    @staticmethod
+    def path(host, uuid):
+        return os.path.join(cache_dir(), SNAPSHOT_DIR, Snapshot.name(host, uuid))
+
+    @staticmethod
+    def domains(host):
+        """
+        List the FMC domains of a host that have a snapshot.
+        :param host: FMC host
+        :return: list of domain uuids
+        """
+        prefix = Snapshot.name(host, '')
+        try:
+            names = os.listdir(os.path.join(cache_dir(), SNAPSHOT_DIR))
+        except OSError:
+            return []
+        return [i[len(prefix):] for i in names if i.startswith(prefix)]
+
+    def _store(self, path):
+        filename = '{}.json'.format(path.strip('/').replace('/', '_'))
+        return StateStore(filename, path=os.path.join(self.directory, filename))
+
+    def age(self, path):
+        """
+        Return the age of the stored collection.
+        :param path: Collection path relative to the domain configuration URL
+        :return: seconds, None if the collection is not in the snapshot
+        """
+        refreshed = self._store(path.strip('/')).read().get('refreshed')
+        if refreshed is None:
+            return None
+        return time.time() - refreshed
+
+    def changed(self, path):
+        """
+        Check whether a module changed the collection since it was stored, see invalidate().
+        :param path: Collection path relative to the domain configuration URL
+        :return: boolean
+        """
+        path = path.strip('/')
+        refreshed = self._store(path).read().get('refreshed')
+        changed = self.changes.read().get(path)
+        return changed is not None and (refreshed is None or changed >= refreshed)
+
+    def is_fresh(self, path, max_age):
+        """
+        Check whether the stored collection can be used without asking the FMC.
+        :param path: Collection path relative to the domain configuration URL
+        :param max_age: Maximum age of the stored collection in seconds
+        :return: boolean
+        """
+        age = self.age(path)
+        return age is not None and age <= max_age and not self.changed(path)
+
+    def stored(self, path):
+        """
+        Return the stored objects of a collection as they are, without asking the FMC.
+        :param path: Collection path relative to the domain configuration URL
+        :return: list of objects, None if the collection is not in the snapshot
+        """
+        stored = self._store(path.strip('/')).read()
+        if 'refreshed' not in stored:
+            return None
+        return stored.get('items', [])
+
+    def collection(self, path, max_age=0, max_workers=1):
+        """
+        Return the objects of a collection, from disk if the stored collection is fresh, from the FMC otherwise.
+        :param path: Collection path relative to the domain configuration URL
+        :param max_age: Maximum age of the stored collection in seconds
+        :param max_workers: Pages fetched at the same time when the collection is refreshed
+        :return: tuple of the list of objects and the refresh delta (None if served from disk). None, None on error
+        """
+        path = path.strip('/')
+        if max_age > 0 and self.is_fresh(path, max_age):
+            return self._store(path).read().get('items', []), None
+        delta = self.refresh(path, max_workers=max_workers)
+        if delta is None:
+            return None, None
+        return self._store(path).read().get('items', []), delta
+
+    def refresh(self, path, max_workers=1):
+        """
+        List a collection from the FMC and replace the stored collection.
+        :param path: Collection path relative to the domain configuration URL
+        :param max_workers: Pages fetched at the same time
+        :return: dict with the number of added, changed, removed and unchanged objects, None on error
+        """
+        path = path.strip('/')
+        # Changes made while the listing runs are newer than the snapshot
+        started = time.time()
+        items = get_all(self.fmc, path, max_workers=max_workers)
+        if items is None:
+            return None
+        items = [dict((k, v) for k, v in i.items() if k != 'links') for i in items]
+        with self._store(path).locked() as stored:
+            previous = dict((i['id'], i) for i in stored.get('items', []))
+            delta = dict(added=0, changed=0, removed=0, unchanged=0)
+            for i in items:
+                before = previous.pop(i['id'], None)
+                if before is None:
+                    delta['added'] += 1
+                elif _timestamp(before) != _timestamp(i) or (_timestamp(i) is None and before != i):
+                    delta['changed'] += 1
+                else:
+                    delta['unchanged'] += 1
+            delta['removed'] = len(previous)
+            stored.clear()
+            stored.update(refreshed=started, items=items)
+        with self.info.locked() as info:
+            info['server_version'] = self.fmc.serverVersion
+        return delta
+
+    def invalidate(self, *paths):
+        """
+        Record that collections were changed, they are refreshed the next time they are read.
+        :param paths: Collection paths relative to the domain configuration URL
+        :return: None
+        """
+        now = time.time()
+        with self.changes.locked() as changes:
+            for path in paths:
+                changes[path.strip('/')] = now
+
+
+def existing_snapshot(fmc):
+    """
+    Open the snapshot of the FMC domain of the session without creating it.
+    :param fmc: FMC session
+    :return: Snapshot, None if no snapshot was gathered for the FMC domain
+    """
+    if not os.path.isdir(Snapshot.path(fmc.host, fmc.uuid)):
+        return None
+    return Snapshot(fmc)
+
+
+def snapshot_max_age():
+    """
+    Maximum age of the snapshot collections modules resolve object references from, see SNAPSHOT_MAX_AGE_ENV.
+    check_source=snapshot warns about the collections older than this age, or DEFAULT_SNAPSHOT_MAX_AGE if unset.
+    :return: seconds, 0 if disabled
+    """
+    try:
+        return max(0, int(os.environ.get(SNAPSHOT_MAX_AGE_ENV) or 0))
+    except ValueError:
+        return 0
+
+
+def invalidate_snapshot(fmc, *paths):
+    """
+    Record changes to collections in the snapshot of the FMC session, see Snapshot.invalidate.
+    Nothing is written when no snapshot was gathered for the FMC domain.
+    :param fmc: FMC session
+    :param paths: Collection paths relative to the domain configuration URL
+    :return: None
+    """
+    snapshot = existing_snapshot(fmc)
+    if snapshot is not None:
+        snapshot.invalidate(*paths)
@@ -0,0 +1,94 @@
+import errno
+import fcntl
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+# Directory shared by every module invocation on the controller for tokens and other FMC state.
+# Override with the CISCO_FMC_CACHE_DIR environment variable (e.g. via the task/play "environment" keyword).
+CACHE_DIR_ENV = 'CISCO_FMC_CACHE_DIR'
+DEFAULT_CACHE_DIR = os.path.join('~', '.ansible', 'cisco_fmc')
+
+
+def cache_dir():
+    """
+    Return the collection cache directory, creating it (mode 0700) if it does not exist.
+    :return: str
+    """
+    path = os.path.expanduser(os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR)
+    try:
+        os.makedirs(path, 0o700)
+    except OSError as err:
+        if err.errno != errno.EEXIST:
+            raise
+    return path
+
+
+class StateStore(object):
+    """
+    JSON document on disk that can be safely shared between concurrent module invocations.
+    Readers and writers serialize on an exclusive flock() held on a side-car ".lock" file, and
+    writes are atomic (temporary file + rename) so a crashed writer never leaves a truncated file.
+    """
+
+    def __init__(self, filename, path=None):
+        """
+        :param filename: File name inside the collection cache directory
+        :param path: Optional full path, overrides filename and the cache directory
+        """
+        self.path = path or os.path.join(cache_dir(), filename)
+        self.lock_path = self.path + '.lock'
+
+    @contextmanager
+    def locked(self):
+        """
+        Hold the store lock for the duration of the block and yield the current document.
+        The (possibly modified) document is written back when the block exits without error.
+        """
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            data = self._load()
+            yield data
+            self._save(data)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def read(self):
+        """
+        Return a snapshot of the current document.
+        :return: dict
+        """
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH)
+            return self._load()
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            # Missing or corrupt state is treated as empty, it is only ever a cache
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return data
+
+    def _save(self, data):
+        directory = os.path.dirname(self.path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+            os.chmod(tmp_path, 0o600)
+            os.rename(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
@@ -0,0 +1,168 @@
+import binascii
+import hashlib
+import json
+import os
+import time
+
+import requests
+
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.state import StateStore
+
+TOKEN_CACHE_FILE = 'tokens.json'
+
+
+class TokenCache(StateStore):
+    """
+    Access/refresh token pairs shared by every module invocation, keyed by (fmc host, username).
+    """
+
+    def __init__(self, path=None):
+        super(TokenCache, self).__init__(TOKEN_CACHE_FILE, path=path)
+
+    @staticmethod
+    def key(host, username):
+        return '{}|{}'.format(host, username)
+
+    @staticmethod
+    def credential_hash(password, salt):
+        """
+        Derive the value stored alongside a token so that it is only reused for the password that created it.
+        :param password: Cisco FMC Password
+        :param salt: hex encoded salt
+        :return: str
+        """
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), binascii.unhexlify(salt), 10000)
+        return binascii.hexlify(digest).decode('ascii')
+
+
+class CachedToken(object):
+    """
+    Drop-in replacement for fmcapi.fmc.Token that shares its tokens through a TokenCache.
+    A token generated by one module invocation is reused by every later invocation against the same
+    FMC with the same credentials until it needs refreshing, and refreshes go through the refresh token.
+    """
+
+    MAX_REFRESHES = 3
+    TOKEN_LIFETIME = 60 * 30
+    TOKEN_REFRESH_TIME = int(TOKEN_LIFETIME * 0.95)
+    API_PLATFORM_VERSION = 'api/fmc_platform/v1'
+
+    def __init__(self, host, username, password, domain=None, verify_cert=False, timeout=5, cache=None, **kwargs):
+        self._host = host
+        self._username = username
+        self._password = password
+        self._domain = domain
+        self.verify_cert = verify_cert
+        self.timeout = timeout
+        self.cache = cache or TokenCache()
+        self.uuid = None
+        self.all_domains = []
+        self.access_token = None
+        self.refresh_token = None
+        self.token_creation_time = None
+        self.token_refreshes = 0
+        self.generate_tokens()
+
+    def generate_tokens(self):
+        """
+        Adopt a valid cached token, or refresh/generate one and publish it to the cache.
+        The cache lock is held throughout so that concurrent invocations do not all authenticate at once.
+        :return: None
+        """
+        key = TokenCache.key(self._host, self._username)
+        with self.cache.locked() as tokens:
+            entry = tokens.get(key)
+            if entry and not self._owns(entry):
+                entry = None
+            if entry and time.time() < entry['created'] + self.TOKEN_REFRESH_TIME:
+                self._adopt(entry)
+                return
+            response = None
+            if entry and entry['refreshes'] < self.MAX_REFRESHES:
+                response = self._refresh(entry)
+            if response is not None:
+                entry = self._entry(response, salt=entry['salt'], refreshes=entry['refreshes'] + 1)
+            else:
+                salt = binascii.hexlify(os.urandom(16)).decode('ascii')
+                entry = self._entry(self._generate(), salt=salt, refreshes=0)
+            tokens[key] = entry
+            self._adopt(entry)
+
+    def get_token(self):
+        """
+        Return a valid access token, refreshing it first if it is about to expire.
+        :return: str
+        """
+        if self.access_token is None or time.time() > self.token_creation_time + self.TOKEN_REFRESH_TIME:
+            self.generate_tokens()
+        return self.access_token
+
+    def invalidate(self):
+        """
+        Drop the current token from the cache, e.g. after the FMC rejected it, and fetch a new one.
+        :return: None
+        """
+        key = TokenCache.key(self._host, self._username)
+        with self.cache.locked() as tokens:
+            entry = tokens.get(key)
+            if entry and entry['access_token'] == self.access_token:
+                del tokens[key]
+        self.access_token = None
+        self.generate_tokens()
+
+    def _owns(self, entry):
+        try:
+            return entry['credential'] == TokenCache.credential_hash(self._password, entry['salt'])
+        except (KeyError, TypeError, ValueError):
+            return False
+
+    def _adopt(self, entry):
+        self.access_token = entry['access_token']
+        self.refresh_token = entry['refresh_token']
+        self.token_creation_time = entry['created']
+        self.token_refreshes = entry['refreshes']
+        self.all_domains = entry['domains']
+        self.uuid = entry['domain_uuid']
+        if self._domain is not None:
+            for domain in self.all_domains:
+                if domain['name'].lower() in (self._domain.lower(), 'global/' + self._domain.lower()):
+                    self.uuid = domain['uuid']
+                    break
+
+    def _entry(self, response, salt, refreshes):
+        return dict(
+            access_token=response.headers.get('X-auth-access-token'),
+            refresh_token=response.headers.get('X-auth-refresh-token'),
+            domain_uuid=response.headers.get('DOMAIN_UUID'),
+            domains=json.loads(response.headers.get('DOMAINS') or '[]'),
+            created=time.time(),
+            refreshes=refreshes,
+            salt=salt,
+            credential=TokenCache.credential_hash(self._password, salt)
+        )
+
+    def _generate(self):
+        url = 'https://{}/{}/auth/generatetoken'.format(self._host, self.API_PLATFORM_VERSION)
+        response = requests.post(url, headers={'Content-Type': 'application/json'},
+                                 auth=requests.auth.HTTPBasicAuth(self._username, self._password),
+                                 verify=self.verify_cert, timeout=self.timeout)
+        response.raise_for_status()
+        if not response.headers.get('X-auth-access-token'):
+            raise requests.exceptions.HTTPError('No access token returned by FMC', response=response)
+        return response
+
+    def _refresh(self, entry):
+        url = 'https://{}/{}/auth/refreshtoken'.format(self._host, self.API_PLATFORM_VERSION)
+        headers = {
+            'Content-Type': 'application/json',
+            'X-auth-access-token': entry['access_token'],
+            'X-auth-refresh-token': entry['refresh_token']
+        }
+        try:
+            response = requests.post(url, headers=headers, verify=self.verify_cert, timeout=self.timeout)
+        except requests.exceptions.RequestException:
+            return None
+        # A rejected refresh (e.g. the FMC was restarted) falls back to generating a new token
+        if not response.ok or not response.headers.get('X-auth-access-token'):
+            return None
+        return response
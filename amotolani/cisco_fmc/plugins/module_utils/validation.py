@@ -0,0 +1,97 @@
+import ipaddress
+
+# FQDNs that FTD accepts, wildcards are not supported
+FQDN_OPTIONS = {
+    'require_tld': True,
+    'allow_underscores': True,
+    'allow_trailing_dot': False,
+    'allow_numeric_tld': True,
+    'allow_wildcard': False
+}
+
+
+def valid_ip_address(address):
+    """
+    Check that an IP address is valid.
+    :param address: IP Address
+    :return: boolean
+    """
+    try:
+        ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return True
+
+
+def valid_network_address(address):
+    """
+    Check that a network address is valid.
+    :param address: Network Address
+    :return: boolean
+    """
+    try:
+        ipaddress.ip_network(address)
+    except ValueError:
+        return False
+    return True
+
+
+def valid_ip_range(ip_range):
+    """
+    Check that an IP range (first-last) is valid.
+    :param ip_range: IP Range
+    :return: boolean
+    """
+    ips = ip_range.split('-')
+    return len(ips) == 2 and all(valid_ip_address(i) for i in ips)
+
+
+def valid_fqdn(fqdn):
+    """
+    Check that a FQDN is one FTD can support, i.e. no wildcards.
+    :param fqdn: FQDN
+    :return: boolean
+    """
+    # Only FQDN objects need pyvalidator
+    from pyvalidator import is_fqdn
+    return is_fqdn(fqdn, FQDN_OPTIONS)
+
+
+def valid_port(value):
+    """
+    Check that a port number or port range (first-last) is valid.
+    :param value: Port Number/Port Range
+    :return: boolean
+    """
+    ports = value.split('-')
+    if not all(i.isdigit() for i in ports):
+        return False
+    if len(ports) == 1:
+        return int(ports[0]) in range(65536)
+    return len(ports) == 2 and int(ports[0]) in range(65536) and int(ports[1]) in range(65536) and \
+        int(ports[1]) > int(ports[0])
+
+
+def valid_vlan_range(start_vlan, end_vlan):
+    """
+    Check that a VLAN range is valid, a single VLAN has the same start and end.
+    :param start_vlan: Lower VLAN number in range
+    :param end_vlan: Upper VLAN number in range
+    :return: boolean
+    """
+    return 1 <= int(start_vlan) <= int(end_vlan) <= 4094
+
+
+def literal_type(address):
+    """
+    Return the FMC type of a literal network address.
+    :param address: IP address, network address or IP range
+    :return: 'Host', 'Network' or 'Range', None if the address is not valid
+    """
+    if valid_ip_address(address):
+        return 'Host'
+    if valid_network_address(address):
+        return 'Network'
+    if valid_ip_range(address):
+        return 'Range'
+    return None
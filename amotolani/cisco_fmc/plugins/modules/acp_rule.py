@@ -1,9 +1,19 @@
 #!/usr/bin/python
-from fmcapi import *
+from fmcapi import (
+    AccessPolicies, AccessRules, Applications, FilePolicies, IntrusionPolicies, Networks, PortObjectGroups,
+    ProtocolPortObjects, SecurityGroupTags, SecurityZones, VariableSets, VlanTags
+)
 from ansible.module_utils.basic import AnsibleModule
-import fmcapi.api_objects.helper_functions
-import base64
-import requests
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.access_rules import (
+    access_rules_path, drop_empty_configs, rule_payload
+)
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.fmc import (
+    build_object_index, fail_on_error, fmc_connection, record_change
+)
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.objects import (
+    NETWORK_ADDRESSES_PATH, NETWORK_GROUPS_PATH, error_message, resolve_networks
+)
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.validation import literal_type
 
 DOCUMENTATION = r'''
 author: Adelowo David (@amotolani)
@@ -324,19 +334,39 @@ options:
   fmc:
     description:
       - IP address or FQDN of Cisco FMC.
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
     type: str
-    required: true
+    required: false
   username:
     description:
       - Cisco FMC Username
       - User should have sufficient permissions to modify objects
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
     type: str
-    required: true
+    required: false
   password:
     description:
       - Cisco FMC Password
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
     type: str
-    required: true
+    required: false
+  max_concurrent:
+    description:
+      - Maximum number of object listings fetched at the same time to validate the rule members.
+      - Requests still go through the rate limit shared by every task against the FMC.
+    type: int
+    default: 4
+    required: false
+  check_source:
+    description:
+      - Where the current state is read from in check mode.
+      - C(snapshot) evaluates the task against the on-disk snapshot gathered by C(amotolani.cisco_fmc.fmc_facts) with
+        C(snapshot=true), without sending any request to the FMC. Requires check mode and the C(fmc) option, the
+        collections the task reads must be in the snapshot.
+    type: str
+    choices: ['fmc', 'snapshot']
+    default: fmc
+    required: false
   auto_deploy:
     description:
       - Option to deploy configurations to deployable devices after changes
@@ -507,10 +537,12 @@ def main():
                     comment=dict(type='list')
                 )
             ),
-            fmc=dict(type='str', required=True),
-            username=dict(type='str', required=True),
-            password=dict(type='str', required=True, no_log=True),
-            auto_deploy=dict(type='bool', default=False)
+            fmc=dict(type='str'),
+            username=dict(type='str'),
+            password=dict(type='str', no_log=True),
+            auto_deploy=dict(type='bool', default=False),
+            max_concurrent=dict(type='int', default=4),
+            check_source=dict(type='str', choices=['fmc', 'snapshot'], default='fmc')
         ),
         supports_check_mode=True,
         required_if=[
@@ -551,60 +583,37 @@ def main():
     source_security_group_tags = module.params['source_security_group_tags']
     destination_security_group_tags = module.params['destination_security_group_tags']
     acp = module.params['acp']
-    fmc = module.params['fmc']
-    username = module.params['username']
-    password = module.params['password']
     auto_deploy = module.params['auto_deploy']
+    max_concurrent = module.params['max_concurrent']
+    api_calls_saved = 0
 
 
     # Define useful Functions
-    def get_obj(obj):
-        a = obj.get()
-        return a
-
-    def create_obj(obj):
-        a = obj.post()
-        return a
-
-    def delete_obj(obj):
-        a = obj.delete()
-        return a
-
-    def update_obj(obj):
-        a = obj.put()
-        return a
-
-    def validate_ip_address(address):
-        """
-         We need to check the IP Address is valid.
-         :param address: IP Address
-         :return: boolean
-         """
-        a = fmcapi.api_objects.helper_functions.is_ip(address)
-        return a
-
-    def validate_network_address(address):
+    def find_obj(config_class, name):
         """
-        We need to check the provided Network Address is valid.
-        :param address: Network Address
-        :return: boolean
+        Look up an existing cisco_fmc object by name.
+        Each object type is listed once and indexed, every later lookup of the same type is served from the index.
+        :param config_class: fmcapi Class of the object
+        :param name: Object name
+        :return: dict with the object id, name and type, None if the object does not exist
         """
-        a = fmcapi.api_objects.helper_functions.is_ip_network(address)
-        return a
+        index = object_index.load(config_class.URL_SUFFIX)
+        if index is None:
+            result = dict(failed=True, msg=error_message(fmc1))
+            module.exit_json(**result)
+        return index.get(name)
 
-    def validate_ip_range(ip_range):
+    def resolve_net_objs(names):
         """
-        We need to check the provided IP Range is valid.
-        :param ip_range: IP Range
-        :return: boolean
+        Resolve network object names (hosts, ranges, networks and network groups) from the object index.
+        :param names: Network object names
+        :return: dict of existing object name to object id, name and type
         """
-        d = []
-        for ip in ip_range.split('-'):
-            d.append(fmcapi.api_objects.helper_functions.is_ip(ip))
-        if len(d) != 2 or d[0] is not True or d[1] is not True:
-            return False
-        else:
-            return True
+        resolved = resolve_networks(object_index, names)
+        if resolved is None:
+            result = dict(failed=True, msg=error_message(fmc1))
+            module.exit_json(**result)
+        return resolved
 
     def multi_obj_config_state(requested_config, config_class,  fmc_config_name="", config_name=''):
         """
@@ -843,6 +852,94 @@ def main():
             config_change_status[config_name] = {'action': 'none', 'change': False}
         return
 
+    def apply_multi_obj_config(payload, requested_config, fmc_config_name, config_class, config_name, key='objects'):
+        """
+        To be used when multiple cisco_fmc objects can configured.
+        Adds/removes the requested objects to/from the rule payload, with the object ids taken from the object index.
+        :param payload: Access Rule to be sent to FMC
+        :param requested_config: Configuration to be added/removed from Access Rule
+        :param fmc_config_name: FMC API name for the Configuration in the Access Rule
+        :param config_class: fmcapi Class for the Configuration to be added to the Access Rule
+        :param config_name: Configuration name in result dictionary
+        :param key: Key of the object list in the Configuration
+        :return: Number of objects applied
+        """
+        if requested_config is None or not requested_config['name']:
+            return 0
+        current_config = payload.setdefault(fmc_config_name, {}).setdefault(key, [])
+        if requested_config['action'] == 'add':
+            current_names = [i['name'] for i in current_config]
+            for i in requested_config['name']:
+                if i in current_names:
+                    continue
+                config_obj = find_obj(config_class, i)
+                if config_obj is None:
+                    result = dict(failed=True,
+                                  msg='Check that the {} are existing cisco_fmc objects'.format(config_name))
+                    module.exit_json(**result)
+                current_config.append(config_obj)
+                current_names.append(i)
+        else:
+            payload[fmc_config_name][key] = [i for i in current_config if i['name'] not in requested_config['name']]
+        return len(requested_config['name'])
+
+    def apply_net_obj_config(payload, requested_config, fmc_config_name, config_name):
+        """
+        It is a custom version of the 'apply_multi_obj_config' function for network objects and literals.
+        :param payload: Access Rule to be sent to FMC
+        :param requested_config: Configuration to be added/removed from Access Rule
+        :param fmc_config_name: FMC API name for the Configuration in the Access Rule
+        :param config_name: Configuration name in result dictionary
+        :return: Number of objects applied
+        """
+        if requested_config is None:
+            return 0
+        config = payload.setdefault(fmc_config_name, {})
+        names = requested_config['name'] or []
+        literals = requested_config['literal'] or []
+        current_objects = config.setdefault('objects', [])
+        current_literals = config.setdefault('literals', [])
+        if requested_config['action'] == 'add':
+            current_names = [i['name'] for i in current_objects]
+            new_names = [i for i in names if i not in current_names]
+            resolved = resolve_net_objs(new_names) if new_names else {}
+            for i in new_names:
+                if i not in resolved:
+                    result = dict(failed=True,
+                                  msg='Check that the {} are existing cisco_fmc objects'.format(config_name))
+                    module.exit_json(**result)
+                if i not in current_names:
+                    current_objects.append(resolved[i])
+                    current_names.append(i)
+            current_values = [i['value'] for i in current_literals]
+            for i in literals:
+                if i not in current_values:
+                    current_literals.append({'type': literal_type(i), 'value': i})
+                    current_values.append(i)
+        else:
+            config['objects'] = [i for i in current_objects if i['name'] not in names]
+            config['literals'] = [i for i in current_literals if i['value'] not in literals]
+        return len(names)
+
+    def apply_single_obj_config(payload, requested_config, fmc_config_name, config_class, config_name):
+        """
+        To be used when only a single cisco_fmc object can configured.
+        :param payload: Access Rule to be sent to FMC
+        :param requested_config: Name of the object to be set in the Access Rule
+        :param fmc_config_name: FMC API name for the Configuration in the Access Rule
+        :param config_class: fmcapi Class for the Configuration to be added to the Access Rule
+        :param config_name: Configuration name in result dictionary
+        :return: Number of objects applied
+        """
+        if requested_config is None:
+            return 0
+        config_obj = find_obj(config_class, requested_config)
+        if config_obj is None:
+            result = dict(failed=True, msg='Check that the {} is an existing cisco_fmc object'.format(config_name))
+            module.exit_json(**result)
+        payload[fmc_config_name] = config_obj
+        return 1
+
     def validate_multi_obj_config(requested_config, config_class, config_name):
         """
         To be used when validating multiple cisco_fmc objects.
@@ -857,13 +954,7 @@ def main():
             return True
         else:
             for i in requested_config['name']:
-                config_obj = config_class(fmc=fmc1, name=i)
-                _config_obj = get_obj(config_obj)
-                if 'items' in _config_obj:
-                    a = False
-                else:
-                    a = True
-                d.append(a)
+                d.append(find_obj(config_class, i) is not None)
             if all(d):
                 return True
             else:
@@ -884,9 +975,7 @@ def main():
         if requested_config is None:
             return True
         else:
-            config_obj = config_class(fmc=fmc1, name=requested_config)
-            _config_obj = get_obj(config_obj)
-            if 'items' in _config_obj:
+            if find_obj(config_class, requested_config) is None:
                 result = dict(failed=True, msg='Check that the {} is an existing cisco_fmc object'.format(config_name))
                 module.exit_json(**result)
                 return False
@@ -901,72 +990,20 @@ def main():
         :param config_name: Configuration name in result dictionary
         :return: boolean
         """
-        _obj_list, net_obj, ip_obj, range_obj, net_group_obj = ([] for i in range(5))
-        _literal_list, net_literal, ip_literal, range_literal = ([] for i in range(4))
+        _obj_list, _literal_list = [], []
 
         if requested_config is None:
             return True
         else:
             if requested_config['name'] is not None:
                 requested_config['name'] = [i for i in requested_config['name'] if i]
-                for i in requested_config['name']:
-                    config_obj = Networks(fmc=fmc1, name=i)
-                    _config_obj = get_obj(config_obj)
-                    if 'items' in _config_obj:
-                        a = False
-                    else:
-                        a = True
-                    net_obj.append(a)
-
-                    config_obj = Ranges(fmc=fmc1, name=i)
-                    _config_obj = get_obj(config_obj)
-                    if 'items' in _config_obj:
-                        a = False
-                    else:
-                        a = True
-                    range_obj.append(a)
-
-                    config_obj = Hosts(fmc=fmc1, name=i)
-                    _config_obj = get_obj(config_obj)
-                    if 'items' in _config_obj:
-                        a = False
-                    else:
-                        a = True
-                    ip_obj.append(a)
-
-                    config_obj = NetworkGroups(fmc=fmc1, name=i)
-                    _config_obj = get_obj(config_obj)
-                    if 'items' in _config_obj:
-                        a = False
-                    else:
-                        a = True
-                    net_group_obj.append(a)
-
-                    yy = requested_config['name'].index(i)
-                    if net_obj[yy] or range_obj[yy] or ip_obj[yy] or net_group_obj[yy]:
-                        a = True
-                    else:
-                        a = False
-                    _obj_list.append(a)
+                resolved = resolve_net_objs(requested_config['name'])
+                _obj_list = [i in resolved for i in requested_config['name']]
 
             if requested_config['literal'] is not None:
                 # Fix for issue-#5 (Removes empty strings from literal list before validating addresses)
                 requested_config['literal'] = [i for i in requested_config['literal'] if i]
-                if len(requested_config['literal']) > 0:
-                    for i in requested_config['literal']:
-                        p = validate_ip_range(i)
-                        range_literal.append(p)
-                        q = validate_ip_address(i)
-                        ip_literal.append(q)
-                        w = validate_network_address(i)
-                        net_literal.append(w)
-
-                        yy = requested_config['literal'].index(i)
-                        if net_literal[yy] or range_literal[yy] or ip_literal[yy]:
-                            a = True
-                        else:
-                            a = False
-                        _literal_list.append(a)
+                _literal_list = [literal_type(i) is not None for i in requested_config['literal']]
 
             if not all(_obj_list):
                 result = dict(failed=True, msg='Check that the {} are existing cisco_fmc objects'.format(config_name))
@@ -977,27 +1014,6 @@ def main():
             else:
                 return True
 
-    # Custom argument validations
-    # More of these are needed
-    encoded_bytes = base64.b64encode(bytes(username + ':' + password, 'utf-8'))
-    encoded_str = str(encoded_bytes, "utf-8")
-
-    url = "https://{}/api/fmc_platform/v1/auth/generatetoken".format(fmc)
-    payload = {}
-    headers = {
-        'Authorization': 'Basic {}'.format(encoded_str)
-    }
-
-    try:
-        response = requests.request("POST", url, headers=headers, data=payload, verify=False)
-        response.raise_for_status()
-    except requests.exceptions.ConnectionError as hrr:
-        result = dict(unreachable=True, msg='Unable to establish network connection to FMC')
-        module.exit_json(**result)
-    except requests.exceptions.HTTPError as err:
-        result = dict(failed=True, msg='Connection to FMC failed. Reason: {}'.format(err))
-        module.exit_json(**result)
-
     if action != 'ALLOW':
         if intrusion_policy is not None or file_policy is not None or variable_set is not None:
             result = dict(failed=True, msg='Intrusion Policy, File Policy and Variable Set cannot be selected when rule action is Block, Trust, Block with reset or monitor')
@@ -1007,14 +1023,40 @@ def main():
     else:
         pass
 
-    with FMC(host=fmc, username=username, password=password, autodeploy=auto_deploy) as fmc1:
+    with fmc_connection(module, autodeploy=auto_deploy) as fmc1:
+        object_index = build_object_index(fmc1)
+
+        # List the Access Policies and every collection searched by the requested members at the same time,
+        # the validation that follows is then served from the object index
+        requested_paths = [AccessPolicies.URL_SUFFIX]
+        if requested_state == 'present':
+            for requested_config, config_class in ((vlan_tags, VlanTags), (source_ports, ProtocolPortObjects),
+                                                   (destination_ports, ProtocolPortObjects),
+                                                   (source_port_groups, PortObjectGroups),
+                                                   (destination_port_groups, PortObjectGroups),
+                                                   (source_zones, SecurityZones), (destination_zones, SecurityZones),
+                                                   (applications, Applications),
+                                                   (source_security_group_tags, SecurityGroupTags),
+                                                   (destination_security_group_tags, SecurityGroupTags)):
+                if requested_config is not None and requested_config['name']:
+                    requested_paths.append(config_class.URL_SUFFIX)
+            for requested_config, config_class in ((variable_set, VariableSets), (file_policy, FilePolicies),
+                                                   (intrusion_policy, IntrusionPolicies)):
+                if requested_config is not None:
+                    requested_paths.append(config_class.URL_SUFFIX)
+            if any(i is not None and i['name'] for i in (source_networks, destination_networks)):
+                requested_paths += [NETWORK_ADDRESSES_PATH, NETWORK_GROUPS_PATH]
+        if not object_index.prefetch(requested_paths, max_workers=max_concurrent):
+            result = dict(failed=True, msg=error_message(fmc1))
+            module.exit_json(**result)
 
         # Instantiate Access Rule Object with values, but first validate the Access Policy object
         validate_single_obj_config(requested_config=acp, config_name='acp', config_class=AccessPolicies)
-        obj1 = AccessRules(fmc=fmc1, acp_name=acp, name=name)
+        acp_id = find_obj(AccessPolicies, acp)['id']
+        obj1 = AccessRules(fmc=fmc1, acp_id=acp_id, name=name)
 
         # Check existing state of the object
-        _obj1 = get_obj(obj1)
+        _obj1 = obj1.get()
         config_change_status = {}
         _create_obj = None
 
@@ -1052,7 +1094,7 @@ def main():
                 multi_obj_config_state(requested_config=source_zones, fmc_config_name="sourceZones", config_name='source_zones', config_class=SecurityZones)
                 multi_obj_config_state(requested_config=destination_zones, fmc_config_name="destinationZones", config_name='destination_zones', config_class=SecurityZones)
                 multi_obj_config_state(requested_config=source_security_group_tags, fmc_config_name="sourceSecurityGroupTags", config_name='source_sgt', config_class=SecurityGroupTags)
-                multi_obj_config_state(requested_config=destination_security_group_tags, fmc_config_name="sourceSecurityGroupTags", config_name='destination_sgt', config_class=SecurityGroupTags)
+                multi_obj_config_state(requested_config=destination_security_group_tags, fmc_config_name="destinationSecurityGroupTags", config_name='destination_sgt', config_class=SecurityGroupTags)
                 single_obj_config_state(requested_config=variable_set, fmc_config_name="variableSet", config_name='variable_set',config_class=VariableSets)
                 single_obj_config_state(requested_config=file_policy, fmc_config_name="filePolicy", config_name='file_policy', config_class=FilePolicies)
                 single_obj_config_state(requested_config=intrusion_policy, fmc_config_name="ipsPolicy", config_name='intrusion_policy', config_class=IntrusionPolicies)
@@ -1072,110 +1114,84 @@ def main():
             else:
                 changed = True
 
-        #  Instantiate Access Rule with Section, InsertAfter or InsertBefore, if provided
-        #  To do: Instantiate Access Rule with category if supplied
-        if _create_obj and insert_before is not None:
-            obj1 = AccessRules(fmc=fmc1, acp_name=acp, action=action, name=name, section=section, insertBefore=insert_before)
-        elif _create_obj and insert_after is not None:
-            obj1 = AccessRules(fmc=fmc1, acp_name=acp, action=action, name=name, section=section, insertAfter=insert_after)
-        # Instantiate Access Rule with Section, without InsertAfter or InsertBefore
-        elif _create_obj and insert_before is None and insert_after is None:
-            obj1 = AccessRules(fmc=fmc1, acp_name=acp, action=action, name=name, section=section)
-        elif _create_obj is False:
-            obj1 = AccessRules(fmc=fmc1, acp_name=acp, action=action, name=name,  id=_obj1['id'])
+        payload = None
+        if changed is True and requested_state == 'present' and (module.check_mode is False or module._diff):
+            # Build the complete rule from the existing rule (if any) and the requested changes, with the members
+            # resolved from the object index, to be sent in a single request (and shown in diff mode)
+            if _create_obj is True:
+                payload = {'name': name, 'type': 'AccessRule'}
+            else:
+                payload = rule_payload(_obj1)
+            lookups = 0
+            lookups += apply_multi_obj_config(payload, vlan_tags, 'vlanTags', VlanTags, 'vlan_tags')
+            lookups += apply_multi_obj_config(payload, source_ports, 'sourcePorts', ProtocolPortObjects, 'source_ports')
+            lookups += apply_multi_obj_config(payload, destination_ports, 'destinationPorts', ProtocolPortObjects,
+                                              'destination_ports')
+            lookups += apply_multi_obj_config(payload, source_port_groups, 'sourcePorts', PortObjectGroups,
+                                              'source_port_groups')
+            lookups += apply_multi_obj_config(payload, destination_port_groups, 'destinationPorts', PortObjectGroups,
+                                              'destination_port_groups')
+            lookups += apply_net_obj_config(payload, source_networks, 'sourceNetworks', 'source_networks')
+            lookups += apply_net_obj_config(payload, destination_networks, 'destinationNetworks',
+                                            'destination_networks')
+            lookups += apply_multi_obj_config(payload, source_zones, 'sourceZones', SecurityZones, 'source_zones')
+            lookups += apply_multi_obj_config(payload, destination_zones, 'destinationZones', SecurityZones,
+                                              'destination_zones')
+            lookups += apply_multi_obj_config(payload, applications, 'applications', Applications, 'applications',
+                                              key='applications')
+            lookups += apply_multi_obj_config(payload, source_security_group_tags, 'sourceSecurityGroupTags',
+                                              SecurityGroupTags, 'source_sgt')
+            lookups += apply_multi_obj_config(payload, destination_security_group_tags, 'destinationSecurityGroupTags',
+                                              SecurityGroupTags, 'destination_sgt')
+            lookups += apply_single_obj_config(payload, variable_set, 'variableSet', VariableSets, 'variable_set')
+            lookups += apply_single_obj_config(payload, file_policy, 'filePolicy', FilePolicies, 'file_policy')
+            lookups += apply_single_obj_config(payload, intrusion_policy, 'ipsPolicy', IntrusionPolicies,
+                                               'intrusion_policy')
+            if new_comments is not None and new_comments['action'] == 'add':
+                payload['newComments'] = new_comments['comment']
+            for config, fmc_config_name in ((enabled, 'enabled'), (action, 'action'), (enable_syslog, 'enableSyslog'),
+                                            (log_end, 'logEnd'), (log_begin, 'logBegin'),
+                                            (send_events_to_fmc, 'sendEventsToFMC')):
+                if config is not None:
+                    payload[fmc_config_name] = config
+            drop_empty_configs(payload)
 
         # Perform action to change object state if not in check mode and changed status is True
         if changed is True and module.check_mode is False:
             if requested_state == 'present':
-                if vlan_tags is not None:
-                    for i in vlan_tags['name']:
-                        obj1.vlan_tags(action=vlan_tags['action'], name=i)
-                if source_ports is not None:
-                    for i in source_ports['name']:
-                        obj1.source_port(action=source_ports['action'], name=i)
-                if destination_ports is not None:
-                    for i in destination_ports['name']:
-                        obj1.destination_port(action=destination_ports['action'], name=i)
-                if source_port_groups is not None:
-                    for i in source_port_groups['name']:
-                        obj1.source_port(action=source_port_groups['action'], name=i)
-                if destination_port_groups is not None:
-                    for i in destination_port_groups['name']:
-                        obj1.destination_port(action=destination_port_groups['action'], name=i)
-                if source_networks is not None:
-                    if source_networks['name'] is not None:
-                        for i in source_networks['name']:
-                            obj1.source_network(action=source_networks['action'], name=i)
-                    if source_networks['literal'] is not None:
-                        for i in source_networks['literal']:
-                            obj1.source_network(action=source_networks['action'], literal=i)
-                if destination_networks is not None:
-                    if destination_networks['name'] is not None:
-                        for i in destination_networks['name']:
-                            obj1.destination_network(action=destination_networks['action'], name=i)
-                    if destination_networks['literal'] is not None:
-                        for i in destination_networks['literal']:
-                            obj1.destination_network(action=destination_networks['action'], literal=i)
-                if source_zones is not None:
-                    for i in source_zones['name']:
-                        obj1.source_zone(action=source_zones['action'], name=i)
-                if destination_zones is not None:
-                    for i in destination_zones['name']:
-                        obj1.destination_zone(action=destination_zones['action'], name=i)
-                if applications is not None:
-                    for i in applications['name']:
-                        obj1.application(action=applications['action'], name=i)
-                if source_security_group_tags is not None:
-                    for i in source_security_group_tags['name']:
-                        obj1.source_sgt(action=source_security_group_tags['action'], name=i)
-                if destination_security_group_tags is not None:
-                    for i in destination_security_group_tags['name']:
-                        obj1.destination_sgt(action=destination_security_group_tags['action'], name=i)
-                if new_comments is not None:
-                    for i in new_comments['comment']:
-                        obj1.new_comments(action=new_comments['action'], value=i)
-                if variable_set is not None:
-                    obj1.variable_set(action='set', name=variable_set)
-                if file_policy is not None:
-                    obj1.file_policy(action='set', name=file_policy)
-                if intrusion_policy is not None:
-                    obj1.intrusion_policy(action='set', name=intrusion_policy)
-                if enabled is not None:
-                    obj1.enabled = enabled
-                if action is not None:
-                    obj1.action = action
-                if enable_syslog is not None:
-                    obj1.enableSyslog = enable_syslog
-                if log_end is not None:
-                    obj1.logEnd = log_end
-                if log_begin is not None:
-                    obj1.logBegin = log_begin
-                if send_events_to_fmc is not None:
-                    obj1.sendEventsToFMC = send_events_to_fmc
-
+                url = '{}/{}'.format(fmc1.configuration_url, access_rules_path(acp_id))
                 if _create_obj is True:
-                    fmc_obj = create_obj(obj1)
-                elif _create_obj is False:
-                    fmc_obj = update_obj(obj1)
+                    # Section, InsertAfter or InsertBefore only apply when the rule is created
+                    query = []
+                    if insert_before is not None:
+                        query.append('insertBefore={}'.format(insert_before))
+                    elif insert_after is not None:
+                        query.append('insertAfter={}'.format(insert_after))
+                    query.append('section={}'.format(section))
+                    fmc_obj = fmc1.send_to_api(method='post', url='{}?{}'.format(url, '&'.join(query)),
+                                               json_data=payload)
+                else:
+                    fmc_obj = fmc1.send_to_api(method='put', url='{}/{}'.format(url, _obj1['id']), json_data=payload)
+                # fmcapi resolved every member and policy with at least one GET of its own, and the Access Policy again
+                api_calls_saved = lookups + 1
             elif requested_state == 'absent':
-                fmc_obj = delete_obj(obj1)
-            else:
-                pass
-            if fmc_obj is None:
-                try:
-                    # error_response attribute only available in fmcapi>=20210523.0
-                    fmc_obj = fmc1.error_response
-                    msg = fmc_obj["error"]["messages"][0]["description"]
-                except AttributeError:
-                    msg = "An error occurred while sending request to cisco_fmc"
-                result = dict(failed=True, msg=msg)
-                module.exit_json(**result)
+                fmc_obj = obj1.delete()
             else:
                 pass
+            fail_on_error(module, fmc1, fmc_obj)
+            record_change(fmc1, access_rules_path(acp_id))
         else:
             pass
 
-    result = dict(changed=changed)
+    result = dict(changed=changed, api_calls_saved=api_calls_saved)
+    if module._diff:
+        current = None if 'items' in _obj1 else rule_payload(_obj1)
+        if current is not None:
+            drop_empty_configs(current)
+        requested = current
+        if changed is True:
+            requested = payload
+        result['diff'] = dict(before=current or {}, after=requested or {})
     module.exit_json(**result)
 
 
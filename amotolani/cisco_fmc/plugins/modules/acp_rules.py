@@ -0,0 +1,582 @@
+#!/usr/bin/python
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.access_rules import (
+    ACCESS_POLICIES_PATH, RULE_FIELDS, access_rules_path, build_rule, changed_fields, drop_empty_configs, plan_order,
+    rule_payload
+)
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.bulk import BulkResult
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.fmc import (
+    build_object_index, fmc_connection, record_change
+)
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.objects import (
+    BULK_CHUNK_SIZE, bulk_create, chunks, delete, error_message, get_all, index_by_name, update
+)
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.validation import literal_type
+
+DOCUMENTATION = r'''
+---
+author: Adelowo David (@amotolani)
+module: amotolani.cisco_fmc.acp_rules
+short_description: Create, Modify and Delete many Cisco FMC Access Rules of an Access Control Policy
+description:
+  - Create, Modify and Delete many Access Rules of a Cisco FMC Access Control Policy in a single task.
+  - The rules of the policy are fetched once, compared with the requested rules and new rules are created
+    through the FMC bulk API. Existing rules are only updated when they differ from the requested rule.
+  - With C(state=present), options of a requested rule that are not set keep their current value, options that are
+    set replace the current configuration of the rule (for example C(source_zones) lists every source zone of the rule).
+  - With C(state=replaced), every requested rule is replaced by its definition, the options that are not set are
+    reset (no members, no intrusion or file policy, logging disabled, rule enabled). The variable set of an existing
+    rule is kept unless C(variable_set) is set.
+  - With C(state=overridden), the Access Control Policy is made to hold exactly the requested rules in the requested
+    order. Rules that are not requested are deleted and the rules are ordered with the fewest moves, only the rules
+    out of the longest run of rules already in the requested relative order are moved.
+options:
+  acp:
+    description:
+      - Access Control Policy of the rules
+    type: str
+    required: true
+  rules:
+    description:
+      - The Access Rules to be created, modified or deleted.
+    type: list
+    elements: dict
+    required: true
+    options:
+      name:
+        description:
+          - The name of the Access Rule.
+        type: str
+        required: true
+      action:
+        description:
+          - Action applied by Access Rule
+          - Allowed values ['ALLOW', 'TRUST', 'BLOCK', 'MONITOR', 'BLOCK_RESET','BLOCK_INTERACTIVE',
+            'BLOCK_RESET_INTERACTIVE']
+          - Required to create a rule
+        type: str
+        required: false
+      enabled:
+        description:
+          - Enable/Disable Access Rule
+        type: bool
+        required: false
+      section:
+        description:
+          - Access Rule Section of new rules, new rules are added at the end of the section
+          - With C(state=overridden), the position of new rules follows the requested order instead, the section is
+            only used when the policy has no rules
+          - 'Allowed value [''default'', ''mandatory'']'
+        type: str
+        default: default
+        required: false
+      send_events_to_fmc:
+        description:
+          - enable/disable "send_event_to_fmc"
+        type: bool
+        required: false
+      log_begin:
+        description:
+          - enable/disable "log_begin"
+        type: bool
+        required: false
+      log_end:
+        description:
+          - enable/disable "log_end"
+        type: bool
+        required: false
+      enable_syslog:
+        description:
+          - enable/disable "enable_syslog"
+        type: bool
+        required: false
+      intrusion_policy:
+        description:
+          - Associated Intrusion Policy
+        type: str
+        required: false
+      file_policy:
+        description:
+          - Associated File Policy
+        type: str
+        required: false
+      variable_set:
+        description:
+          - Associated Variable Set
+        type: str
+        required: false
+      source_networks:
+        description:
+          - Source Networks targeted by access rule
+        type: dict
+        required: false
+        options:
+          name:
+            description:
+              - FMC network objects and network groups
+            type: list
+            elements: str
+            required: false
+          literal:
+            description:
+              - Literal network addresses, ranges and hosts
+            type: list
+            elements: str
+            required: false
+      destination_networks:
+        description:
+          - Destination Networks targeted by access rule
+        type: dict
+        required: false
+        options:
+          name:
+            description:
+              - FMC network objects and network groups
+            type: list
+            elements: str
+            required: false
+          literal:
+            description:
+              - Literal network addresses, ranges and hosts
+            type: list
+            elements: str
+            required: false
+      vlan_tags:
+        description:
+          - FMC VLAN Tag objects
+        type: list
+        elements: str
+        required: false
+      source_ports:
+        description:
+          - FMC port objects and port groups
+        type: list
+        elements: str
+        required: false
+      destination_ports:
+        description:
+          - FMC port objects and port groups
+        type: list
+        elements: str
+        required: false
+      source_zones:
+        description:
+          - FMC Security Zone objects
+        type: list
+        elements: str
+        required: false
+      destination_zones:
+        description:
+          - FMC Security Zone objects
+        type: list
+        elements: str
+        required: false
+      applications:
+        description:
+          - FMC Applications
+        type: list
+        elements: str
+        required: false
+      source_security_group_tags:
+        description:
+          - FMC Security Group Tag objects
+        type: list
+        elements: str
+        required: false
+      destination_security_group_tags:
+        description:
+          - FMC Security Group Tag objects
+        type: list
+        elements: str
+        required: false
+  state:
+    description:
+      - Whether to create/modify (C(present)), replace (C(replaced)) or remove (C(absent)) the rules,
+        or to make the policy hold exactly the rules in the requested order (C(overridden)).
+    type: str
+    default: present
+    required: false
+  bulk_size:
+    description:
+      - Maximum number of rules created by a single FMC bulk request, from 1 to 1000.
+    type: int
+    default: 1000
+    required: false
+  fmc:
+    description:
+      - IP address or FQDN of Cisco FMC.
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  username:
+    description:
+      - Cisco FMC Username
+      - User should have sufficient permissions to modify objects
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  password:
+    description:
+      - Cisco FMC Password
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  check_source:
+    description:
+      - Where the current state is read from in check mode.
+      - C(snapshot) evaluates the task against the on-disk snapshot gathered by C(amotolani.cisco_fmc.fmc_facts) with
+        C(snapshot=true), without sending any request to the FMC. Requires check mode and the C(fmc) option, the
+        collections the task reads must be in the snapshot.
+    type: str
+    choices: ['fmc', 'snapshot']
+    default: fmc
+    required: false
+  auto_deploy:
+    description:
+      - Option to deploy configurations to deployable devices after changes
+    type: bool
+    default: False
+    required: False
+'''
+
+EXAMPLES = r'''
+- name: Create or update Access Rules
+  amotolani.cisco_fmc.acp_rules:
+    state: present
+    fmc: cisco.sample.com
+    username: admin
+    password: Cisco1234
+    acp: test
+    rules:
+      - name: Allow-Web
+        action: ALLOW
+        enabled: True
+        source_zones: [inside]
+        destination_zones: [outside]
+        source_networks:
+          name: [Sample-Network-1]
+          literal: [10.1.1.22, 10.2.2.0/24]
+        destination_ports: [HTTP, HTTPS]
+      - name: Block-Telnet
+        action: BLOCK
+        enabled: True
+        section: mandatory
+        destination_ports: [TELNET]
+
+- name: Load the rules of a policy from a variables file
+  amotolani.cisco_fmc.acp_rules:
+    state: present
+    fmc: cisco.sample.com
+    username: admin
+    password: Cisco1234
+    acp: test
+    rules: "{{ acp_test_rules }}"
+
+- name: Delete Access Rules
+  amotolani.cisco_fmc.acp_rules:
+    state: absent
+    fmc: cisco.sample.com
+    username: admin
+    password: Cisco1234
+    acp: test
+    rules:
+      - name: Allow-Web
+      - name: Block-Telnet
+'''
+
+RETURN = r'''
+created:
+  description: Number of rules created.
+  returned: always
+  type: int
+updated:
+  description: Number of existing rules modified.
+  returned: always
+  type: int
+moved:
+  description:
+    - Number of existing rules moved (C(state=overridden)), moved rules that were also modified are counted in
+      C(updated) too.
+  returned: always
+  type: int
+deleted:
+  description: Number of rules deleted.
+  returned: always
+  type: int
+unchanged:
+  description: Number of requested rules already in the requested state.
+  returned: always
+  type: int
+rules:
+  description:
+    - Change applied to each rule that was created, updated, moved or deleted, with the FMC fields that changed for
+      updated and moved rules.
+    - Unchanged rules are only counted.
+  returned: always
+  type: list
+  sample: [{"name": "Allow-Web", "change": "updated", "fields": ["destinationPorts"]},
+           {"name": "Block-Telnet", "change": "created"}]
+request_stats:
+  description:
+    - Counters of the requests sent to the FMC by the task, see I(Request counters) in the collection README.
+  returned: success
+  type: dict
+  sample: {"requests": 6, "throttled": 0, "retried": 0, "waited": 0.5}
+'''
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            state=dict(type='str', choices=['present', 'absent', 'replaced', 'overridden'], default='present'),
+            acp=dict(type='str', required=True),
+            rules=dict(
+                type='list',
+                elements='dict',
+                required=True,
+                options=dict(
+                    name=dict(type='str', required=True),
+                    action=dict(
+                        type='str',
+                        choices=['ALLOW', 'TRUST', 'BLOCK', 'MONITOR', 'BLOCK_RESET', 'BLOCK_INTERACTIVE',
+                                 'BLOCK_RESET_INTERACTIVE']),
+                    enabled=dict(type='bool'),
+                    section=dict(type='str', choices=['default', 'mandatory'], default='default'),
+                    send_events_to_fmc=dict(type='bool'),
+                    log_begin=dict(type='bool'),
+                    log_end=dict(type='bool'),
+                    enable_syslog=dict(type='bool'),
+                    intrusion_policy=dict(type='str'),
+                    file_policy=dict(type='str'),
+                    variable_set=dict(type='str'),
+                    source_networks=dict(
+                        type='dict',
+                        options=dict(
+                            name=dict(type='list', elements='str'),
+                            literal=dict(type='list', elements='str')
+                        )
+                    ),
+                    destination_networks=dict(
+                        type='dict',
+                        options=dict(
+                            name=dict(type='list', elements='str'),
+                            literal=dict(type='list', elements='str')
+                        )
+                    ),
+                    vlan_tags=dict(type='list', elements='str'),
+                    source_ports=dict(type='list', elements='str'),
+                    destination_ports=dict(type='list', elements='str'),
+                    source_zones=dict(type='list', elements='str'),
+                    destination_zones=dict(type='list', elements='str'),
+                    applications=dict(type='list', elements='str'),
+                    source_security_group_tags=dict(type='list', elements='str'),
+                    destination_security_group_tags=dict(type='list', elements='str')
+                )
+            ),
+            bulk_size=dict(type='int', default=BULK_CHUNK_SIZE),
+            fmc=dict(type='str'),
+            username=dict(type='str'),
+            password=dict(type='str', no_log=True),
+            auto_deploy=dict(type='bool', default=False),
+            check_source=dict(type='str', choices=['fmc', 'snapshot'], default='fmc')
+        ),
+        supports_check_mode=True
+    )
+    requested_state = module.params['state']
+    acp = module.params['acp']
+    requested_rules = module.params['rules']
+    bulk_size = module.params['bulk_size']
+    auto_deploy = module.params['auto_deploy']
+    summary = []
+
+    def describe(rule):
+        """
+        Show the writable fields of a rule in the diff, without the member configurations left empty.
+        :param rule: Access Rule as returned by FMC or Access Rule payload
+        :return: dict
+        """
+        payload = rule_payload(rule)
+        drop_empty_configs(payload)
+        return payload
+
+    result = BulkResult(module, RULE_FIELDS, describe=describe, changes=('moved',))
+
+    def validate_rules(rules):
+        """
+        Check every requested rule before sending anything to the FMC.
+        :param rules: list of requested rules
+        :return: list of error messages
+        """
+        errors = []
+        names = set()
+        for i in rules:
+            if i['name'] in names:
+                errors.append('{}: duplicate rule name'.format(i['name']))
+            names.add(i['name'])
+            for option in ('source_networks', 'destination_networks'):
+                for literal in (i[option] or {}).get('literal') or []:
+                    if literal_type(literal) is None:
+                        errors.append('{}: {} literal {} is not a valid IP address, network or range'.format(
+                            i['name'], option, literal))
+        return errors
+
+    def fail(msg):
+        result.fail(msg, rules=summary)
+
+    if not 1 <= bulk_size <= BULK_CHUNK_SIZE:
+        fail('bulk_size must be between 1 and {}'.format(BULK_CHUNK_SIZE))
+    errors = validate_rules(requested_rules)
+    if errors:
+        fail('Invalid access rules: {}'.format('; '.join(errors)))
+
+    with fmc_connection(module, autodeploy=auto_deploy) as fmc1:
+        object_index = build_object_index(fmc1)
+        acp_obj = object_index.find(ACCESS_POLICIES_PATH, acp)
+        if acp_obj is None:
+            fail('Check that the acp is an existing cisco_fmc object')
+        path = access_rules_path(acp_obj['id'])
+
+        # Fetch the existing rules of the policy once
+        existing = get_all(fmc1, path)
+        if existing is None:
+            fail(error_message(fmc1))
+        existing = index_by_name(existing)
+
+        # Compare the requested rules with the existing state
+        rules = {}
+        to_create = []
+        to_update = {}
+        to_delete = []
+        unchanged = set()
+        missing = []
+        for i in requested_rules:
+            _rule = existing.get(i['name'])
+            if requested_state == 'absent':
+                if _rule is None:
+                    result.record('unchanged')
+                else:
+                    to_delete.append(_rule)
+                continue
+            if _rule is None and i['action'] is None:
+                missing.append('{}: action is required to create the rule'.format(i['name']))
+                continue
+            rule, _missing = build_rule(object_index, i, _rule, replace=requested_state in ('replaced', 'overridden'))
+            if rule is None:
+                fail(error_message(fmc1))
+            if _missing:
+                missing += ['{}: {} not found'.format(i['name'], j) for j in _missing]
+                continue
+            rules[i['name']] = rule
+            if _rule is None:
+                to_create.append(i['name'])
+            else:
+                fields = changed_fields(_rule, rule)
+                if fields:
+                    to_update[i['name']] = fields
+                else:
+                    unchanged.add(i['name'])
+        if missing:
+            fail('Check that the referenced objects are existing cisco_fmc objects: {}'.format('; '.join(missing)))
+
+        sections = dict((i['name'], i['section']) for i in requested_rules)
+        if requested_state == 'overridden':
+            to_delete = [i for i in existing.values() if i['name'] not in sections]
+            # Rules are deleted first, the positions of the moves and creations are those of the remaining rules
+            steps = plan_order([i for i in existing if i in sections], [i['name'] for i in requested_rules])
+        else:
+            steps = [('create', to_create, None)] if to_create else []
+
+        def record_created(names, created):
+            """
+            Count the rules the FMC created.
+            :param names: Names of the rules sent, in order
+            :param created: Rules created by the FMC, see bulk_create
+            :return: None
+            """
+            created = set(j['name'] for j in created)
+            for j in names:
+                if j in created:
+                    result.record('created', rules[j])
+                    summary.append(dict(name=j, change='created'))
+
+        def create_rules(names, query):
+            """
+            Create rules through the bulk API, at the given position or at the end of their section.
+            :param names: Names of the rules to be created, in order
+            :param query: insertBefore/insertAfter query string parameter, None to append the rules to their section
+            :return: error message of the rejected request, None if every rule was created
+            """
+            if module.check_mode:
+                record_created(names, [rules[j] for j in names])
+                return None
+            if query is None:
+                for section in ('mandatory', 'default'):
+                    _names = [j for j in names if sections[j] == section]
+                    if _names:
+                        created, error = bulk_create(fmc1, path, [rules[j] for j in _names], chunk_size=bulk_size,
+                                                     query='section={}'.format(section))
+                        record_created(_names, created)
+                        if error is not None:
+                            return error
+                return None
+            position, index = query.split('=')
+            offset = 0
+            for chunk in chunks(names, bulk_size):
+                created, error = bulk_create(fmc1, path, [rules[j] for j in chunk], chunk_size=bulk_size,
+                                             query='{}={}'.format(position, int(index) + offset))
+                record_created(chunk, created)
+                if error is not None:
+                    return error
+                offset += len(chunk)
+            return None
+
+        def write_changes():
+            """
+            Delete, create, move and update the rules in order, nothing is sent in check mode.
+            Stops at the first request rejected by the FMC, the changes made before it are counted.
+            :return: error message, None if every change was made
+            """
+            for rule in to_delete:
+                if not module.check_mode and delete(fmc1, path, rule['id']) is None:
+                    return error_message(fmc1)
+                result.record('deleted', current=rule)
+                summary.append(dict(name=rule['name'], change='deleted'))
+            for step, names, query in steps:
+                if step == 'create':
+                    error = create_rules(names, query)
+                    if error is not None:
+                        return error
+                    continue
+                # A moved rule is updated by the same request
+                name = names[0]
+                if not module.check_mode and update(fmc1, path, rules[name], query=query) is None:
+                    return error_message(fmc1)
+                result.record('moved', rules[name], existing[name])
+                unchanged.discard(name)
+                if name in to_update:
+                    result.record('updated', rules[name], existing[name])
+                    summary.append(dict(name=name, change='moved', fields=to_update.pop(name)))
+                else:
+                    summary.append(dict(name=name, change='moved'))
+            for name, fields in to_update.items():
+                if not module.check_mode and update(fmc1, path, rules[name]) is None:
+                    return error_message(fmc1)
+                result.record('updated', rules[name], existing[name])
+                summary.append(dict(name=name, change='updated', fields=fields))
+            return None
+
+        # Perform action to change object state if not in check mode
+        error = write_changes()
+        for name in unchanged:
+            result.record('unchanged')
+        # The changes made before a rejected request are recorded as well
+        if not module.check_mode and result.changed:
+            record_change(fmc1, path)
+        if error is not None:
+            fail(error)
+
+    result.exit(rules=summary, request_stats=fmc1.request_stats)
+
+
+if __name__ == "__main__":
+    main()
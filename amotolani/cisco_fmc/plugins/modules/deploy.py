@@ -1,8 +1,14 @@
 #!/usr/bin/python
-from fmcapi import *
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from ansible.module_utils.basic import AnsibleModule
-import base64
-import requests
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.deployment import (
+    PendingDeployments, deploy_devices, expand_targets, get_deployable_devices, get_device_group_members,
+    get_policy_targets, select_devices
+)
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.fmc import fmc_connection
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.objects import chunks, error_message
 
 DOCUMENTATION = r'''
 ---
@@ -15,19 +21,97 @@ options:
   fmc:
     description:
       - IP address or FQDN of Cisco FMC.
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
     type: str
-    required: true
+    required: false
   username:
     description:
       - Cisco FMC Username
       - User should have sufficient permissions to deploy changes
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
     type: str
-    required: true
+    required: false
   password:
     description:
       - Cisco FMC Password
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  pending_only:
+    description:
+      - Only deploy if modules of this collection changed the FMC domain since the last deployment done with this
+        option.
+      - Pending changes are recorded in the collection cache directory (C(~/.ansible/cisco_fmc) or
+        C(CISCO_FMC_CACHE_DIR)).
+      - Use it in a handler notified by the tasks making changes (with C(auto_deploy) disabled) to deploy once at the
+        end of a play.
+    type: bool
+    default: False
+    required: false
+  devices:
+    description:
+      - Names of the devices to deploy to.
+      - Devices without changes to deploy are skipped.
+      - By default changes are deployed to every deployable device.
+    type: list
+    elements: str
+    required: false
+  device_groups:
+    description:
+      - Names of device groups whose member devices to deploy to, in addition to C(devices).
+      - HA pairs and clusters in a device group stand for all of their member devices.
+    type: list
+    elements: str
+    required: false
+  only_if_policy:
+    description:
+      - Only deploy to the (selected) devices the named policy, e.g. an access control policy, is assigned to.
+      - A policy assigned to an HA pair, cluster or device group applies to all of its member devices.
     type: str
-    required: true
+    required: false
+  strategy:
+    description:
+      - How the selected devices are deployed to.
+      - C(batch) requests the deployments of all batches at once, at most C(max_concurrent) at a time.
+      - C(rolling) deploys C(max_concurrent) batches at a time and waits for them to succeed before starting the next
+        ones. A failed deployment stops the rollout. Implies C(wait).
+    type: str
+    choices: [batch, rolling]
+    default: batch
+    required: false
+  batch_size:
+    description:
+      - Number of devices per deployment request.
+      - Defaults to all selected devices in one request with the C(batch) strategy and one device per request with
+        C(rolling).
+    type: int
+    required: false
+  max_concurrent:
+    description:
+      - Maximum number of deployment requests in progress at the same time.
+    type: int
+    default: 1
+    required: false
+  wait:
+    description:
+      - Wait for the deployment to finish and fail if it does not succeed.
+      - The deployment task is polled, starting after C(poll_interval) seconds and backing off exponentially up to 60
+        seconds between polls.
+    type: bool
+    default: False
+    required: false
+  timeout:
+    description:
+      - Maximum number of seconds to wait for the deployment when C(wait) is enabled.
+    type: int
+    default: 1800
+    required: false
+  poll_interval:
+    description:
+      - Number of seconds before the first deployment status poll when C(wait) is enabled.
+    type: int
+    default: 10
+    required: false
 '''
 
 EXAMPLES = r'''
@@ -36,15 +120,116 @@ EXAMPLES = r'''
     fmc: cisco.sample.com
     username: admin
     password: Cisco1234
+
+- name: Deploy changes on FMC and wait for the deployment to finish
+  amotolani.cisco_fmc.deploy:
+    fmc: cisco.sample.com
+    username: admin
+    password: Cisco1234
+    wait: True
+    timeout: 3600
+
+- name: Deploy an access control policy change to the firewalls of one site only
+  amotolani.cisco_fmc.deploy:
+    fmc: cisco.sample.com
+    username: admin
+    password: Cisco1234
+    device_groups:
+      - Site-A
+    only_if_policy: Site-A-ACP
+
+- name: Deploy to two devices at a time, stopping at the first failed deployment
+  amotolani.cisco_fmc.deploy:
+    fmc: cisco.sample.com
+    username: admin
+    password: Cisco1234
+    strategy: rolling
+    max_concurrent: 2
+
+- name: Create Host objects from a loop without deploying after each item
+  amotolani.cisco_fmc.network:
+    name: "{{ item.name }}"
+    state: present
+    network_type: Host
+    fmc: cisco.sample.com
+    value: "{{ item.value }}"
+    username: admin
+    password: Cisco1234
+  loop:
+    - {name: Host1 , value: 10.10.10.2}
+    - {name: Host2 , value: 10.10.10.3}
+  notify: Deploy pending changes
+
+# handlers
+- name: Deploy pending changes
+  amotolani.cisco_fmc.deploy:
+    fmc: cisco.sample.com
+    username: admin
+    password: Cisco1234
+    pending_only: True
+'''
+
+RETURN = r'''
+task_id:
+  description: Id of the FMC deployment task.
+  returned: when a single deployment request was made
+  type: str
+deployments:
+  description: Deployment status of each device.
+  returned: when a deployment was requested
+  type: list
+  elements: dict
+  contains:
+    name:
+      description: Device name.
+      type: str
+    id:
+      description: Device id.
+      type: str
+    status:
+      description:
+        - Status of the deployment request of the device, C(Requested) unless C(wait) is enabled.
+        - The status is the one of the FMC deployment task, all the devices of one request (see C(batch_size)) report
+          the same status. Use C(batch_size=1) for a status per device.
+      type: str
+    duration:
+      description:
+        - Seconds from the deployment request until its task finished, only when C(wait) is enabled.
+        - Like C(status), the same for all the devices of one request.
+      type: float
+    task_id:
+      description: Id of the FMC deployment task of the device.
+      type: str
+skipped_devices:
+  description: Names of the devices not deployed to because the rolling deployment stopped at a failure.
+  returned: when a rolling deployment failed
+  type: list
+  elements: str
+request_stats:
+  description:
+    - Counters of the requests sent to the FMC by the task, see I(Request counters) in the collection README.
+  returned: when a deployment was requested
+  type: dict
+  sample: {"requests": 6, "throttled": 0, "retried": 0, "waited": 0.5}
 '''
 
 
 def main():
     module = AnsibleModule(
         argument_spec=dict(
-            fmc=dict(type='str', required=True),
-            username=dict(type='str', required=True),
-            password=dict(type='str', required=True, no_log=True),
+            fmc=dict(type='str'),
+            username=dict(type='str'),
+            password=dict(type='str', no_log=True),
+            pending_only=dict(type='bool', default=False),
+            devices=dict(type='list', elements='str'),
+            device_groups=dict(type='list', elements='str'),
+            only_if_policy=dict(type='str'),
+            strategy=dict(type='str', choices=['batch', 'rolling'], default='batch'),
+            batch_size=dict(type='int'),
+            max_concurrent=dict(type='int', default=1),
+            wait=dict(type='bool', default=False),
+            timeout=dict(type='int', default=1800),
+            poll_interval=dict(type='int', default=10)
         ),
         supports_check_mode=False
     )
@@ -52,41 +237,105 @@ def main():
     result = dict(
         changed=changed
     )
-    fmc = module.params['fmc']
-    username = module.params['username']
-    password = module.params['password']
-
-    # Custom argument validations
-    # More of these are needed
-    encodedbytes = base64.b64encode(bytes(username + ':' + password, 'utf-8'))
-    encodedstr = str(encodedbytes, "utf-8")
-
-    url = "https://{}/api/fmc_platform/v1/auth/generatetoken".format(fmc)
-    payload = {}
-    headers = {
-        'Authorization': 'Basic {}'.format(encodedstr)
-    }
-
-    try:
-        response = requests.request("POST", url, headers=headers, data=payload, verify=False)
-        response.raise_for_status()
-    except requests.exceptions.ConnectionError as hrr:
-        result = dict(unreachable=True, msg='Unable to establish network connection to FMC')
-        module.exit_json(**result)
-    except requests.exceptions.HTTPError as err:
-        result = dict(failed=True, msg='Connection to FMC failed. Reason: {}'.format(err))
+    pending_only = module.params['pending_only']
+    requested_devices = module.params['devices']
+    device_groups = module.params['device_groups']
+    only_if_policy = module.params['only_if_policy']
+    strategy = module.params['strategy']
+    batch_size = module.params['batch_size']
+    max_concurrent = module.params['max_concurrent']
+    wait = module.params['wait']
+    timeout = module.params['timeout']
+    poll_interval = module.params['poll_interval']
+    if strategy == 'rolling' and batch_size is None:
+        batch_size = 1
+    if (batch_size is not None and batch_size < 1) or max_concurrent < 1:
+        result = dict(failed=True, msg='batch_size and max_concurrent must be at least 1')
         module.exit_json(**result)
 
-    with FMC(host=fmc, username=username, password=password, autodeploy=False) as fmc1:
+    with fmc_connection(module, autodeploy=False) as fmc1:
+
+        pending_deployments = PendingDeployments()
+        if pending_only and pending_deployments.get(fmc1) is None:
+            result = dict(changed=False, msg='No pending changes to deploy')
+            module.exit_json(**result)
 
-        # Instantiate Objects
-        obj1 = DeploymentRequests(fmc=fmc1)
-        fmc_obj = obj1.post()
-        if fmc_obj is None:
+        requested = time.time()
+        devices = get_deployable_devices(fmc1)
+        if devices is None:
+            result = dict(failed=True, msg=error_message(fmc1))
+            module.exit_json(**result)
+        if not devices:
+            # Nothing recorded until now is deployable
+            pending_deployments.clear(fmc1, before=requested)
             result = dict(changed=False, msg='No deployment was done')
             module.exit_json(**result)
 
-    result = dict(changed=True)
+        # Narrow the deployment down to the requested devices
+        deployable = len(devices)
+        if requested_devices is not None or device_groups is not None:
+            targets = list(requested_devices or [])
+            if device_groups:
+                members = get_device_group_members(fmc1, device_groups)
+                if members is None:
+                    result = dict(failed=True, msg=error_message(fmc1))
+                    module.exit_json(**result)
+                missing = [i for i in device_groups if i not in members]
+                if missing:
+                    result = dict(failed=True, msg='Check that the device groups {} exist'.format(', '.join(missing)))
+                    module.exit_json(**result)
+                # Device groups may hold HA pairs and clusters
+                members = expand_targets(fmc1, [j for i in device_groups for j in members[i]])
+                if members is None:
+                    result = dict(failed=True, msg=error_message(fmc1))
+                    module.exit_json(**result)
+                targets += members
+            devices = select_devices(devices, targets)
+        if only_if_policy is not None and devices:
+            targets = get_policy_targets(fmc1, only_if_policy)
+            if targets is None:
+                result = dict(failed=True, msg=error_message(fmc1))
+                module.exit_json(**result)
+            devices = select_devices(devices, targets)
+        if not devices:
+            result = dict(changed=False,
+                          msg='No deployment was done, none of the selected devices has changes to deploy')
+            module.exit_json(**result)
+
+        # Split the devices into deployment requests of batch_size devices. The batch strategy runs all requests
+        # max_concurrent at a time, the rolling strategy runs waves of max_concurrent requests, each wave
+        # waiting for the previous one to succeed.
+        batches = list(chunks(devices, batch_size or len(devices)))
+        if strategy == 'rolling':
+            waves = list(chunks(batches, max_concurrent))
+        else:
+            waves = [batches]
+        outcomes = []
+        with ThreadPoolExecutor(max_workers=max_concurrent) as pool:
+            for wave in waves:
+                outcomes += pool.map(lambda batch: deploy_devices(fmc1, batch, wait=wait or strategy == 'rolling',
+                                                                  timeout=timeout, poll_interval=poll_interval), wave)
+                if any('msg' in i for i in outcomes):
+                    break
+
+        # Changes are only known to be deployed everywhere when no device was left out and no deployment failed or
+        # timed out
+        deployed = sum(len(i['deployments']) for i in outcomes if i['requested'] and 'msg' not in i)
+        if deployed == deployable:
+            pending_deployments.clear(fmc1, before=requested)
+
+        deployments = [j for i in outcomes for j in i['deployments']]
+        # A deployment accepted by the FMC changes the devices, even without a task id to follow it
+        changed = any(i['requested'] for i in outcomes)
+        result = dict(changed=changed, deployments=deployments, request_stats=fmc1.request_stats)
+        if len(outcomes) == 1:
+            result['task_id'] = outcomes[0]['task_id']
+        errors = [i['msg'] for i in outcomes if 'msg' in i]
+        if errors:
+            result.update(failed=True, msg='; '.join(errors))
+        if len(outcomes) < len(batches):
+            result['skipped_devices'] = [j['name'] for i in batches[len(outcomes):] for j in i]
+
     module.exit_json(**result)
 
 
@@ -0,0 +1,233 @@
+#!/usr/bin/python
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.access_rules import (
+    ACCESS_POLICIES_PATH, access_rules_path
+)
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.fmc import fmc_connection
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.objects import (
+    NETWORK_GROUPS_PATH, PORT_GROUPS_PATH, PORT_OBJECTS_PATH, SECURITY_ZONES_PATH, VLAN_TAGS_PATH, error_message,
+    get_all
+)
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.snapshot import Snapshot
+
+DOCUMENTATION = r'''
+---
+author: Adelowo David (@amotolani)
+module: amotolani.cisco_fmc.fmc_facts
+short_description: Gather Cisco FMC objects and access rules as facts
+description:
+  - Gather Cisco FMC objects and access rules as facts, under C(ansible_facts.cisco_fmc).
+  - Every collection is read with expanded listings. The first page is fetched alone to read the number of objects,
+    the remaining pages are fetched concurrently.
+  - With C(snapshot=true) the collections are read through the on-disk snapshot of the FMC domain, collections
+    refreshed less than C(snapshot_max_age) seconds ago and not changed since by a module of this collection are read
+    from disk without any request to the FMC.
+options:
+  gather_subset:
+    description:
+      - The collections to gather.
+      - Allowed values are all, hosts, networks, ranges, fqdns, network_groups, ports, port_groups, vlan_tags,
+        security_zones and access_rules.
+      - A collection prefixed with C(!) is not gathered, for example C(['all', '!access_rules']).
+    type: list
+    elements: str
+    default: ['all']
+    required: false
+  max_concurrent:
+    description:
+      - Maximum number of pages fetched at the same time.
+    type: int
+    default: 4
+    required: false
+  snapshot:
+    description:
+      - Read the collections through the on-disk snapshot stored in the collection cache directory
+        (C(~/.ansible/cisco_fmc/snapshots), override with the C(CISCO_FMC_CACHE_DIR) environment variable).
+    type: bool
+    default: false
+    required: false
+  snapshot_max_age:
+    description:
+      - Maximum age in seconds of a snapshot collection read from disk, older collections are refreshed from the FMC.
+    type: int
+    default: 300
+    required: false
+  fmc:
+    description:
+      - IP address or FQDN of Cisco FMC.
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  username:
+    description:
+      - Cisco FMC Username
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  password:
+    description:
+      - Cisco FMC Password
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+'''
+
+EXAMPLES = r'''
+- name: Gather every FMC object and access rule
+  amotolani.cisco_fmc.fmc_facts:
+    fmc: cisco.sample.com
+    username: admin
+    password: Cisco1234
+
+- name: Gather the network objects only
+  amotolani.cisco_fmc.fmc_facts:
+    fmc: cisco.sample.com
+    username: admin
+    password: Cisco1234
+    gather_subset:
+      - hosts
+      - networks
+      - ranges
+      - network_groups
+
+- name: Gather the network objects, reusing the snapshot of the last 10 minutes
+  amotolani.cisco_fmc.fmc_facts:
+    fmc: cisco.sample.com
+    username: admin
+    password: Cisco1234
+    snapshot: true
+    snapshot_max_age: 600
+    gather_subset:
+      - hosts
+      - network_groups
+
+- name: Show the names of the Host objects
+  debug:
+    msg: "{{ ansible_facts.cisco_fmc.hosts | map(attribute='name') | list }}"
+'''
+
+RETURN = r'''
+ansible_facts:
+  description: Gathered collections, keyed by subset name under C(cisco_fmc).
+  returned: always
+  type: dict
+  contains:
+    cisco_fmc:
+      description:
+        - One list of expanded FMC objects per gathered subset.
+        - C(access_rules) maps every Access Control Policy name to the list of its rules, in rule order.
+      type: dict
+      sample: {"hosts": [{"id": "005056BB-0B24-0ed3-0000-012884904241", "name": "Host1", "type": "Host",
+                          "value": "10.10.10.2"}]}
+snapshot:
+  description:
+    - Refresh of every snapshot collection read, keyed by collection path, with the number of added, changed,
+      removed and unchanged objects. Collections read from disk are C(null).
+  returned: when snapshot is true
+  type: dict
+  sample: {"object/hosts": {"added": 2, "changed": 1, "removed": 0, "unchanged": 25497}, "object/networkgroups": null}
+request_stats:
+  description:
+    - Counters of the requests sent to the FMC by the task, see I(Request counters) in the collection README.
+  returned: success
+  type: dict
+  sample: {"requests": 6, "throttled": 0, "retried": 0, "waited": 0.5}
+rate_limit:
+  description:
+    - Counters of the rate limit bucket of the FMC user, shared by every task and process that used it since the
+      collection cache directory was created, with the same keys as C(request_stats).
+  returned: when the task authenticates with the fmc, username and password options
+  type: dict
+  sample: {"requests": 15230, "throttled": 4, "retried": 4, "waited": 612.4}
+'''
+
+# Collections gathered for every subset (access_rules is gathered per Access Control Policy)
+SUBSET_PATHS = {
+    'hosts': 'object/hosts',
+    'networks': 'object/networks',
+    'ranges': 'object/ranges',
+    'fqdns': 'object/fqdns',
+    'network_groups': NETWORK_GROUPS_PATH,
+    'ports': PORT_OBJECTS_PATH,
+    'port_groups': PORT_GROUPS_PATH,
+    'vlan_tags': VLAN_TAGS_PATH,
+    'security_zones': SECURITY_ZONES_PATH
+}
+SUBSETS = sorted(list(SUBSET_PATHS) + ['access_rules'])
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            gather_subset=dict(type='list', elements='str', default=['all']),
+            max_concurrent=dict(type='int', default=4),
+            snapshot=dict(type='bool', default=False),
+            snapshot_max_age=dict(type='int', default=300),
+            fmc=dict(type='str'),
+            username=dict(type='str'),
+            password=dict(type='str', no_log=True)
+        ),
+        supports_check_mode=True
+    )
+    gather_subset = module.params['gather_subset']
+    max_concurrent = module.params['max_concurrent']
+    use_snapshot = module.params['snapshot']
+    snapshot_max_age = module.params['snapshot_max_age']
+
+    def select_subsets(requested):
+        """
+        Expand the requested subsets, 'all' selects every subset and '!subset' removes a subset.
+        :param requested: list of requested subsets
+        :return: list of subset names
+        """
+        unknown = [i for i in requested if i.lstrip('!') not in SUBSETS + ['all']]
+        if unknown:
+            result = dict(failed=True, msg='Unknown gather_subset {}, allowed values are all, {}'.format(
+                ', '.join(unknown), ', '.join(SUBSETS)))
+            module.exit_json(**result)
+        selected = set()
+        for i in requested:
+            if not i.startswith('!'):
+                selected.update(SUBSETS if i == 'all' else [i])
+        for i in requested:
+            if i.startswith('!'):
+                selected.difference_update(SUBSETS if i == '!all' else [i[1:]])
+        return sorted(selected)
+
+    if max_concurrent < 1:
+        result = dict(failed=True, msg='max_concurrent must be at least 1')
+        module.exit_json(**result)
+    subsets = select_subsets(gather_subset)
+
+    facts = {}
+    refreshed = {}
+    with fmc_connection(module) as fmc1:
+        snapshot = Snapshot(fmc1) if use_snapshot else None
+
+        def gather(path, expanded=True):
+            if snapshot is not None:
+                items, refreshed[path] = snapshot.collection(path, max_age=snapshot_max_age, max_workers=max_concurrent)
+            else:
+                items = get_all(fmc1, path, expanded=expanded, max_workers=max_concurrent)
+            if items is None:
+                result = dict(failed=True, msg=error_message(fmc1))
+                module.exit_json(**result)
+            return items
+
+        for subset in subsets:
+            if subset == 'access_rules':
+                policies = gather(ACCESS_POLICIES_PATH, expanded=False)
+                facts[subset] = dict((i['name'], gather(access_rules_path(i['id']))) for i in policies)
+            else:
+                facts[subset] = gather(SUBSET_PATHS[subset])
+
+    result = dict(changed=False, ansible_facts=dict(cisco_fmc=facts), request_stats=fmc1.request_stats)
+    if fmc1.rate_limiter is not None:
+        result['rate_limit'] = fmc1.rate_limiter.stats(fmc1.rate_limit_key)
+    if use_snapshot:
+        result['snapshot'] = refreshed
+    module.exit_json(**result)
+
+
+if __name__ == "__main__":
+    main()
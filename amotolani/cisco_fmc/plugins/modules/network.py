@@ -1,10 +1,13 @@
 #!/usr/bin/python
-from fmcapi import *
-from pyvalidator import is_fqdn
+from fmcapi import FQDNS, Hosts, Networks, Ranges
 from ansible.module_utils.basic import AnsibleModule
-import fmcapi.api_objects.helper_functions
-import base64
-import requests
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.fmc import (
+    fail_on_error, fmc_connection, record_change
+)
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.objects import object_diff
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.validation import (
+    valid_fqdn, valid_ip_address, valid_ip_range, valid_network_address
+)
 
 DOCUMENTATION = r'''
 ---
@@ -42,8 +45,9 @@ options:
   fmc:
     description:
       - IP address or FQDN of Cisco FMC.
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
     type: str
-    required: true
+    required: false
   value:
     description:
       - FMC network object value.
@@ -57,13 +61,25 @@ options:
     description:
       - Cisco FMC Username
       - User should have sufficient permissions to modify objects
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
     type: str
-    required: true
+    required: false
   password:
     description:
       - Cisco FMC Password
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
     type: str
-    required: true
+    required: false
+  check_source:
+    description:
+      - Where the current state is read from in check mode.
+      - C(snapshot) evaluates the task against the on-disk snapshot gathered by C(amotolani.cisco_fmc.fmc_facts) with
+        C(snapshot=true), without sending any request to the FMC. Requires check mode and the C(fmc) option, the
+        collections the task reads must be in the snapshot.
+    type: str
+    choices: ['fmc', 'snapshot']
+    default: fmc
+    required: false
   auto_deploy:
     description:
       - Option to deploy configurations to deployable devices after changes
@@ -136,6 +152,14 @@ EXAMPLES = r'''
     - {name: Host2 , value: 20.10.10.4}
 '''
 
+# Object class, value check and error message of every network type
+NETWORK_TYPES = {
+    'Host': (Hosts, valid_ip_address, 'Provided value is not a valid IP address'),
+    'Range': (Ranges, valid_ip_range, 'Provided value is not a valid IP address range'),
+    'Network': (Networks, valid_network_address, 'Provided value is not a valid network address'),
+    'FQDN': (FQDNS, valid_fqdn, 'Provided value is not a valid FQDN for FTD')
+}
+
 
 def main():
     module = AnsibleModule(
@@ -145,10 +169,11 @@ def main():
             description=dict(type='str', required=False),
             network_type=dict(type='str', choices=['Host', 'Range', 'Network', 'FQDN'], required=True),
             value=dict(type='str', required=True),
-            fmc=dict(type='str', required=True),
-            username=dict(type='str', required=True),
-            password=dict(type='str', required=True,  no_log=True),
-            auto_deploy=dict(type='bool', default=False)
+            fmc=dict(type='str'),
+            username=dict(type='str'),
+            password=dict(type='str', no_log=True),
+            auto_deploy=dict(type='bool', default=False),
+            check_source=dict(type='str', choices=['fmc', 'snapshot'], default='fmc')
         ),
         supports_check_mode=True
     )
@@ -161,125 +186,20 @@ def main():
     description = module.params['description']
     network_type = module.params['network_type']
     value = module.params['value']
-    fmc = module.params['fmc']
-    username = module.params['username']
-    password = module.params['password']
     auto_deploy = module.params['auto_deploy']
 
-# Define Operation Functions #
-
-    def get_obj(obj):
-        a = obj.get()
-        return a
-
-    def create_obj(obj):
-        a = obj.post()
-        return a
-
-    def delete_obj(obj):
-        a = obj.delete()
-        return a
-
-    def update_obj(obj):
-        a = obj.put()
-        return a
-
-    def validate_ip_address(address):
-        """
-         We need to check the IP Address is valid.
-         :param address: IP Address
-         :return: boolean
-         """
-        a = fmcapi.api_objects.helper_functions.is_ip(address)
-        return a
-
-    def validate_network_address(address):
-        """
-        We need to check the provided Network Address is valid.
-        :param address: Network Address
-        :return: boolean
-        """
-        a = fmcapi.api_objects.helper_functions.is_ip_network(address)
-        return a
-
-    def validate_ip_range(ip_range):
-        """
-        We need to check the provided IP Range is valid.
-        :param ip_range: IP Range
-        :return: boolean
-        """
-        d = []
-        for ip in ip_range.split('-'):
-            d.append(fmcapi.api_objects.helper_functions.is_ip(ip))
-        if len(d) != 2 or d[0] is not True or d[1] is not True:
-            return False
-        else:
-            return True
-
-    def validate_fqdn(fqdn):
-      """
-      We need to check that the provided input is valid.
-      Specifically, a fqdn that FTD can support. IE: No Wildcards
-      """
-      fqdn_options = {"require_tld": True, "allow_underscores": True,
-                  "allow_trailing_dot": False, "allow_numeric_tld": True,
-                  "allow_wildcard": False }
-      a = is_fqdn(fqdn, fqdn_options)
-      return a
-
-    # Custom argument validations
-    # More of these are needed
-    encoded_bytes = base64.b64encode(bytes(username + ':' + password, 'utf-8'))
-    encoded_str = str(encoded_bytes, "utf-8")
-
-    url = "https://{}/api/fmc_platform/v1/auth/generatetoken".format(fmc)
-    payload = {}
-    headers = {
-        'Authorization': 'Basic {}'.format(encoded_str)
-    }
-
-    try:
-        response = requests.request("POST", url, headers=headers, data=payload, verify=False)
-        response.raise_for_status()
-    except requests.exceptions.ConnectionError as hrr:
-        result = dict(unreachable=True, msg='Unable to establish network connection to FMC')
-        module.exit_json(**result)
-    except requests.exceptions.HTTPError as err:
-        result = dict(failed=True, msg='Connection to FMC failed. Reason: {}'.format(err))
+    config_class, validate_value, invalid_value_msg = NETWORK_TYPES[network_type]
+    if not validate_value(value):
+        result = dict(failed=True, msg=invalid_value_msg)
         module.exit_json(**result)
 
-    with FMC(host=fmc, username=username, password=password, autodeploy=auto_deploy) as fmc1:
+    with fmc_connection(module, autodeploy=auto_deploy) as fmc1:
 
-        # Instantiate Objects with values if valid ip, range or network address is provided
-        if network_type == 'Host':
-            if validate_ip_address(value):
-                obj1 = Hosts(fmc=fmc1, name=name, value=value, description=description)
-            else:
-                result = dict(failed=True, msg='Provided value is not a valid IP address')
-                module.exit_json(**result)
-        elif network_type == 'Range':
-            if validate_ip_range(value):
-                obj1 = Ranges(fmc=fmc1, name=name, value=value, description=description)
-            else:
-                result = dict(failed=True, msg='Provided value is not a valid IP address range')
-                module.exit_json(**result)
-        elif network_type == 'Network':
-            if validate_network_address(value):
-                obj1 = Networks(fmc=fmc1, name=name, value=value, description=description)
-            else:
-                result = dict(failed=True, msg='Provided value is not a valid network address')
-                module.exit_json(**result)
-        elif network_type == 'FQDN':
-            if validate_fqdn(value):
-              obj1 = FQDNS(fmc=fmc1, name=name, value=value, description=description)
-            else:
-                result = dict(failed=True, msg='Provided value is not a valid FQDN for FTD')
-                module.exit_json(**result)
-        else:
-            pass
+        # Instantiate Objects with values
+        obj1 = config_class(fmc=fmc1, name=name, value=value, description=description)
 
         # Check existing state of the object
-        _obj1 = get_obj(obj1)
+        _obj1 = obj1.get()
         if requested_state == 'present':
             if 'items' in _obj1.keys():
                 _create_obj = True
@@ -296,32 +216,19 @@ def main():
         # Perform action to change object state if not in check mode
         if changed is True and module.check_mode is False:
             if requested_state == 'present' and _create_obj is True:
-                fmc_obj = create_obj(obj1)
+                fmc_obj = obj1.post()
             elif requested_state == 'present' and _create_obj is False:
-                if network_type == 'Host':
-                    obj1 = Hosts(fmc=fmc1, id=_obj1['id'], name=name, value=value, description=description)
-                elif network_type == 'Range':
-                    obj1 = Ranges(fmc=fmc1, id=_obj1['id'], name=name, value=value, description=description)
-                elif network_type == 'Network':
-                    obj1 = Networks(fmc=fmc1, id=_obj1['id'], name=name, value=value, description=description)
-                elif network_type == 'FQDN':
-                    obj1 = FQDNS(fmc=fmc1, id=_obj1['id'], name=name, value=value, description=description)
-                fmc_obj = update_obj(obj1)
-            elif requested_state == 'absent':
-                fmc_obj = delete_obj(obj1)
+                obj1 = config_class(fmc=fmc1, id=_obj1['id'], name=name, value=value, description=description)
+                fmc_obj = obj1.put()
             else:
-                pass
-            if fmc_obj is None:
-                try:
-                    # error_response attribute only available in fmcapi>=20210523.0
-                    fmc_obj = fmc1.error_response
-                    msg = fmc_obj["error"]["messages"][0]["description"]
-                except AttributeError:
-                    msg = "An error occurred while sending request to cisco fmc"
-                result = dict(failed=True, msg=msg)
-                module.exit_json(**result)
+                fmc_obj = obj1.delete()
+            fail_on_error(module, fmc1, fmc_obj)
+            record_change(fmc1, obj1.URL_SUFFIX)
 
     result = dict(changed=changed)
+    if module._diff:
+        requested = dict(name=name, value=value) if requested_state == 'present' else None
+        result['diff'] = object_diff(None if 'items' in _obj1 else _obj1, requested, ['name', 'value'])
     module.exit_json(**result)
 
 
@@ -1,11 +1,12 @@
 #!/usr/bin/python
-import logging
-
-from fmcapi import *
 from ansible.module_utils.basic import AnsibleModule
-import fmcapi.api_objects.helper_functions
-import base64
-import requests
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.fmc import (
+    build_object_index, fail_on_error, fmc_connection, record_change
+)
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.objects import (
+    NETWORK_GROUPS_PATH, create, delete, error_message, get, index_by_name, object_diff, resolve_networks, update
+)
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.validation import literal_type
 
 DOCUMENTATION = r'''
 ---
@@ -14,6 +15,9 @@ module: amotolani.cisco_fmc.network_group
 short_description: Create, Modify and Delete Cisco FMC network objects
 description:
   - Create, Modify and Delete Cisco FMC network objects.
+  - The group is looked up in the network groups listing and fetched by id. Named members are resolved with the
+    networkaddresses listing and, for nested groups, the network groups listing. The new member list is computed
+    locally and sent in a single POST or PUT, so groups with thousands of members are updated in one request.
 options:
   name:
     description:
@@ -40,26 +44,40 @@ options:
   action:
     description:
       - Action to take with the specified group members
-      - Allowed values are (C(add)) or (C(remove))
+      - Allowed values are (C(add)), (C(remove)) or (C(replace))
+      - C(replace) makes the requested objects and literals the only members of the group
       - Required when state = "present"
     type: str
     required: false
   fmc:
     description:
       - IP address or FQDN of Cisco FMC.
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
     type: str
-    required: true
+    required: false
   username:
     description:
       - Cisco FMC Username
       - User should have sufficient permissions to modify objects
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
     type: str
-    required: true
+    required: false
   password:
     description:
       - Cisco FMC Password
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
     type: str
-    required: true
+    required: false
+  check_source:
+    description:
+      - Where the current state is read from in check mode.
+      - C(snapshot) evaluates the task against the on-disk snapshot gathered by C(amotolani.cisco_fmc.fmc_facts) with
+        C(snapshot=true), without sending any request to the FMC. Requires check mode and the C(fmc) option, the
+        collections the task reads must be in the snapshot.
+    type: str
+    choices: ['fmc', 'snapshot']
+    default: fmc
+    required: false
   auto_deploy:
     description:
       - Option to deploy configurations to deployable devices after changes
@@ -108,6 +126,16 @@ EXAMPLES = r'''
     password: Cisco1234
     group_literals: 20.1.2.2
     group_objects: MySampleHost
+
+- name: Synchronise a large Network Group with a list of blocked networks
+  amotolani.cisco_fmc.network_group:
+    name: Geo-Block
+    state: present
+    fmc: cisco.sample.com
+    action: replace
+    username: admin
+    password: Cisco1234
+    group_literals: "{{ blocked_networks }}"
 '''
 
 
@@ -116,13 +144,14 @@ def main():
         argument_spec=dict(
             state=dict(type='str', choices=['present', 'absent'], required=True),
             name=dict(type='str', required=True),
-            action=dict(type='str', choices=['add', 'remove']),
+            action=dict(type='str', choices=['add', 'remove', 'replace']),
             group_literals=dict(type='list', elements='str'),
             group_objects=dict(type='list', elements='str'),
-            fmc=dict(type='str', required=True),
-            username=dict(type='str', required=True),
-            password=dict(type='str', required=True, no_log=True),
-            auto_deploy=dict(type='bool', default=False)
+            fmc=dict(type='str'),
+            username=dict(type='str'),
+            password=dict(type='str', no_log=True),
+            auto_deploy=dict(type='bool', default=False),
+            check_source=dict(type='str', choices=['fmc', 'snapshot'], default='fmc')
         ),
         supports_check_mode=True,
         required_if=[
@@ -135,275 +164,107 @@ def main():
     requested_state = module.params['state']
     name = module.params['name']
     action = module.params['action']
-    group_literals = module.params['group_literals']
-    group_objects = module.params['group_objects']
-    fmc = module.params['fmc']
-    username = module.params['username']
-    password = module.params['password']
     auto_deploy = module.params['auto_deploy']
+    # Fix for issue-#5 (Removes empty strings from the member lists), duplicates are dropped keeping the order
+    group_literals = list(dict.fromkeys(i for i in module.params['group_literals'] or [] if i))
+    group_objects = list(dict.fromkeys(i for i in module.params['group_objects'] or [] if i))
 
-    # Define Operation Functions #
-
-    def get_obj(obj):
-        a = obj.get()
-        return a
-
-    def create_obj(obj):
-        a = obj.post()
-        return a
-
-    def delete_obj(obj):
-        a = obj.delete()
-        return a
-
-    def update_obj(obj):
-        a = obj.put()
-        return a
-
-    def validate_ip_address(address):
-        """
-         We need to check the IP Address is valid.
-         :param address: IP Address
-         :return: boolean
-         """
-        a = fmcapi.api_objects.helper_functions.is_ip(address)
-        return a
-
-    def validate_network_address(address):
-        """
-        We need to check the provided Network Address is valid.
-        :param address: Network Address
-        :return: boolean
-        """
-        a = fmcapi.api_objects.helper_functions.is_ip_network(address)
-        return a
-
-    def validate_ip_range(ip_range):
-        """
-        We need to check the provided IP Range is valid.
-        :param ip_range: IP Range
-        :return: boolean
-        """
-        d = []
-        for ip in ip_range.split('-'):
-            d.append(fmcapi.api_objects.helper_functions.is_ip(ip))
-        if len(d) != 2 or d[0] is not True or d[1] is not True:
-            return False
-        else:
-            return True
-
-    def validate_net_obj_config(requested_config, config_name):
-        """
-        It is a custom version of the 'validate_multi_obj_config' function
-        Function validates that the requested configurations are existing cisco_fmc network objects
-        :param requested_config: Configuration to be added/removed from Access Rule
-        :param config_name: Configuration name in result dictionary
-        :return: boolean
-        """
-        _obj_list, net_obj, ip_obj, range_obj, net_group_obj = ([] for i in range(5))
-        _literal_list, net_literal, ip_literal, range_literal = ([] for i in range(4))
-
-        # store all network group objects for use later
-        network_group_objects = list()
-
-        if requested_config is None:
-            return True
-        else:
-            if requested_config['name'] is not None:
-                requested_config['name'] = [i for i in requested_config['name'] if i]
-                for i in requested_config['name']:
-                    config_obj = Networks(fmc=fmc1, name=i)
-                    _config_obj = get_obj(config_obj)
-                    if 'items' in _config_obj:
-                        a = False
-                    else:
-                        a = True
-                    net_obj.append(a)
-
-                    config_obj = Ranges(fmc=fmc1, name=i)
-                    _config_obj = get_obj(config_obj)
-                    if 'items' in _config_obj:
-                        a = False
-                    else:
-                        a = True
-                    range_obj.append(a)
-
-                    config_obj = Hosts(fmc=fmc1, name=i)
-                    _config_obj = get_obj(config_obj)
-                    if 'items' in _config_obj:
-                        a = False
-                    else:
-                        a = True
-                    ip_obj.append(a)
-
-                    config_obj = NetworkGroups(fmc=fmc1, name=i)
-                    _config_obj = get_obj(config_obj)
-                    if 'items' in _config_obj:
-                        a = False
-                    else:
-                        a = True
-                        network_group_objects.append(i)
-                    net_group_obj.append(a)
-
-                    yy = requested_config['name'].index(i)
-                    if net_obj[yy] or range_obj[yy] or ip_obj[yy] or net_group_obj[yy]:
-                        a = True
-                    else:
-                        a = False
-                    _obj_list.append(a)
-
-            if requested_config['literal'] is not None:
-                # Fix for issue-#5 (Removes empty strings from literal list before validating addresses)
-                requested_config['literal'] = [i for i in requested_config['literal'] if i]
-                if len(requested_config['literal']) > 0:
-                    for i in requested_config['literal']:
-                        p = validate_ip_range(i)
-                        range_literal.append(p)
-                        q = validate_ip_address(i)
-                        ip_literal.append(q)
-                        w = validate_network_address(i)
-                        net_literal.append(w)
-
-                        yy = requested_config['literal'].index(i)
-                        if net_literal[yy] or range_literal[yy] or ip_literal[yy]:
-                            a = True
-                        else:
-                            a = False
-                        _literal_list.append(a)
-
-            if not all(_obj_list):
-                result = dict(failed=True, msg='Check that the {} are existing cisco fmc objects'.format(config_name))
-                module.exit_json(**result)
-            elif not all(_literal_list):
-                result = dict(failed=True, msg='Check that the {} are valid literal addresses'.format(config_name))
-                module.exit_json(**result)
-            else:
-                return network_group_objects
-
-    # Custom argument validations
-    # More of these are needed
-    encoded_bytes = base64.b64encode(bytes(username + ':' + password, 'utf-8'))
-    encoded_str = str(encoded_bytes, "utf-8")
-
-    url = "https://{}/api/fmc_platform/v1/auth/generatetoken".format(fmc)
-    payload = {}
-    headers = {
-        'Authorization': 'Basic {}'.format(encoded_str)
-    }
-
-    try:
-        response = requests.request("POST", url, headers=headers, data=payload, verify=False)
-        response.raise_for_status()
-    except requests.exceptions.ConnectionError as hrr:
-        result = dict(unreachable=True, msg='Unable to establish network connection to FMC')
+    if requested_state == 'present' and not all(literal_type(i) is not None for i in group_literals):
+        result = dict(failed=True, msg='Check that the Network Group Members are valid literal addresses')
         module.exit_json(**result)
-    except requests.exceptions.HTTPError as err:
-        result = dict(failed=True, msg='Connection to FMC failed. Reason: {}'.format(err))
-        module.exit_json(**result)
-
-    with FMC(host=fmc, username=username, password=password, autodeploy=auto_deploy) as fmc1:
 
-        # creates iterable by default when not set from user ui
-        if group_literals is None:
-            group_literals = []
-        else:
-            pass
-        if group_objects is None:
-            group_objects = []
-        else:
-            pass
-
-        obj1 = NetworkGroups(fmc=fmc1, name=name)
-
-        # Check existing state of the object
-        _obj1 = get_obj(obj1)
-        new_config = []
-        current_objects_config = []
-        current_literals_config = []
-        if requested_state == 'present':
-            if 'items' in _obj1.keys():
-                changed = True
-                _create_obj = True
+    with fmc_connection(module, autodeploy=auto_deploy) as fmc1:
+        object_index = build_object_index(fmc1)
+
+        def fail(msg):
+            result = dict(failed=True, msg=msg)
+            module.exit_json(**result)
+
+        def resolve_members(names):
+            """
+            Resolve the named members, see resolve_networks.
+            :param names: Network object names
+            :return: dict of name to {id, name, type}
+            """
+            if not names:
+                return {}
+            resolved = resolve_networks(object_index, names)
+            if resolved is None:
+                fail(error_message(fmc1))
+            if len(resolved) != len(names):
+                fail('Check that the Network Group Members are existing cisco fmc objects')
+            return resolved
+
+        # Look the group up in the network groups listing, which nested group members are resolved from as well
+        groups = object_index.load(NETWORK_GROUPS_PATH)
+        if groups is None:
+            fail(error_message(fmc1))
+        _obj1 = None
+        if name in groups:
+            _obj1 = fail_on_error(module, fmc1, get(fmc1, NETWORK_GROUPS_PATH, groups[name]['id']))
+
+        # Current and requested members, keyed by object name and literal value
+        current_objects = index_by_name(_obj1.get('objects', [])) if _obj1 else {}
+        current_literals = dict((i['value'], i) for i in _obj1.get('literals', [])) if _obj1 else {}
+        objects, literals = current_objects, current_literals
+        if requested_state == 'present' and action == 'remove':
+            removed_objects, removed_literals = set(group_objects), set(group_literals)
+            objects = dict((k, v) for k, v in current_objects.items() if k not in removed_objects)
+            literals = dict((k, v) for k, v in current_literals.items() if k not in removed_literals)
+        elif requested_state == 'present':
+            # Only the names that are not members yet need resolving
+            added_objects = resolve_members([i for i in group_objects if i not in current_objects])
+            added_literals = dict((i, dict(type=literal_type(i), value=i)) for i in group_literals
+                                  if i not in current_literals)
+            if action == 'replace':
+                objects = dict((i, current_objects.get(i) or added_objects[i]) for i in group_objects)
+                literals = dict((i, current_literals.get(i) or added_literals[i]) for i in group_literals)
             else:
-                _create_obj = False
-                if "literals" in _obj1.keys() and group_literals is not None:
-                    for a in _obj1['literals']:
-                        current_literals_config.append(a['value'])
-
-                if "objects" in _obj1.keys() and group_objects is not None:
-                    for a in _obj1['objects']:
-                        current_objects_config.append(a['name'])
-
-                new_config = group_literals + group_objects
-                _requested_config_set = set(new_config)
-                _current_config_set = set(current_objects_config+current_literals_config)
-                _config_diff = _requested_config_set.difference(_current_config_set)
-                _config_intsct = _requested_config_set.intersection(_current_config_set)
-
-                # if diff is gt than 0, then combine requested objects/literals and current objects/literals for posting to fmc api
-                if action == 'add' and len(_config_diff) > 0:
-                    changed = True
-                    group_literals = group_literals + current_literals_config
-                    group_objects  = group_objects  + current_objects_config
-
-                # if intersect is gt than 0, then remove requested objects/literals from current objects/literals for posting to fmc api
-                elif action == 'remove' and len(_config_intsct) > 0:
-                    changed = True
-                    group_literals = [i for i in current_literals_config if i not in group_literals]
-                    group_objects  = [i for i in current_objects_config if i not in group_objects]
-                    if _config_intsct == _current_config_set:
-                        result = dict(failed=True, msg='At least one member must exist in the network group')
-                        module.exit_json(**result)
+                objects = dict(current_objects)
+                objects.update(added_objects)
+                literals = dict(current_literals)
+                literals.update(added_literals)
+
+        if requested_state == 'absent':
+            changed = _obj1 is not None
+        elif _obj1 is None:
+            # Removing members from a group that does not exist leaves nothing to do
+            changed = action != 'remove'
         else:
-            if 'items' in _obj1.keys():
-                changed = False
-                _create_obj = False
-            else:
-                changed = True
-                _create_obj = False
-
-        requested_config = {
-            "literal": group_literals,
-            "name": group_objects
-        }
-
-        # validate requested objects/literals and get the network groups amongst the requested objects
-        network_groups = validate_net_obj_config(requested_config=requested_config, config_name="Network Group Members")
-
-        # if Object already exists, Instantiate object again with id. This is necessary for using PUT method
-        if _create_obj is False and changed is True:
-            obj1 = NetworkGroups(fmc=fmc1, id=_obj1['id'], name=name)
-        else:
-            pass
+            changed = set(objects) != set(current_objects) or set(literals) != set(current_literals)
+        if changed and requested_state == 'present' and not objects and not literals:
+            fail('At least one member must exist in the network group')
 
         # Perform action to change object state if not in check mode
         if changed is True and module.check_mode is False:
             if requested_state == 'present':
-                if group_literals is not None:
-                    for network in group_literals:
-                        obj1.unnamed_networks(action='add', value=network)
-                if group_objects is not None:
-                    for network_object in group_objects:
-                        obj1.named_networks(action='add', name=network_object)
-                    for network_group_object in network_groups:
-                        obj1.named_networks(action='addgroup', name=network_group_object)
-                if _create_obj is True:
-                    fmc_obj = create_obj(obj1)
-                elif _create_obj is False:
-                    fmc_obj = update_obj(obj1)
-            elif requested_state == 'absent':
-                fmc_obj = delete_obj(obj1)
-            if fmc_obj is None:
-                try:
-                    # error_response attribute only available in fmcapi>=20210523.0
-                    fmc_obj = fmc1.error_response
-                    msg = fmc_obj["error"]["messages"][0]["description"]
-                except AttributeError:
-                    msg = "An error occurred while sending request to cisco fmc"
-                result = dict(failed=True, msg=msg)
-                module.exit_json(**result)
+                payload = dict(name=name, type='NetworkGroup')
+                if _obj1 is not None:
+                    payload.update((k, _obj1[k]) for k in ('id', 'description', 'overridable') if k in _obj1)
+                if objects:
+                    payload['objects'] = list(objects.values())
+                if literals:
+                    payload['literals'] = list(literals.values())
+                if _obj1 is None:
+                    fmc_obj = create(fmc1, NETWORK_GROUPS_PATH, payload)
+                else:
+                    fmc_obj = update(fmc1, NETWORK_GROUPS_PATH, payload)
+            else:
+                fmc_obj = delete(fmc1, NETWORK_GROUPS_PATH, _obj1['id'])
+            fail_on_error(module, fmc1, fmc_obj)
+            record_change(fmc1, NETWORK_GROUPS_PATH)
 
     result = dict(changed=changed)
+    if module._diff:
+        current = None
+        if _obj1 is not None:
+            current = dict(name=name, objects=sorted(current_objects), literals=sorted(current_literals))
+        requested = current
+        if changed is True and requested_state == 'present':
+            requested = dict(name=name, objects=sorted(objects), literals=sorted(literals))
+        elif changed is True:
+            requested = None
+        result['diff'] = object_diff(current, requested, ['name', 'objects', 'literals'])
     module.exit_json(**result)
 
 
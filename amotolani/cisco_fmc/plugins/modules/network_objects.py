@@ -0,0 +1,284 @@
+#!/usr/bin/python
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.bulk import BulkResult
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.fmc import fmc_connection
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.objects import (
+    BULK_CHUNK_SIZE, NETWORK_OBJECT_PATHS, error_message, get_all, index_by_name
+)
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.validation import (
+    valid_fqdn, valid_ip_address, valid_ip_range, valid_network_address
+)
+
+DOCUMENTATION = r'''
+---
+author: Adelowo David (@amotolani)
+module: amotolani.cisco_fmc.network_objects
+short_description: Create, Modify and Delete Cisco FMC network objects in bulk
+description:
+  - Create, Modify and Delete many Cisco FMC Host, Range, Network and FQDN objects in a single task.
+  - The existing objects of each requested network type are fetched once, compared with the requested objects
+    and new objects are created through the FMC bulk API.
+options:
+  objects:
+    description:
+      - The network objects to be created, modified or deleted.
+    type: list
+    elements: dict
+    required: true
+    options:
+      name:
+        description:
+          - The name of the cisco_fmc object.
+        type: str
+        required: true
+      network_type:
+        description:
+          - The network object type.
+          - Allowed choices are Host, Network, Range, and FQDN
+        type: str
+        required: true
+      value:
+        description:
+          - FMC network object value.
+          - For network type 'Host', accepted value is a valid IPv4 address (1.1.1.1)
+          - For network type 'Range',  accepted value is a valid IPv4 address range (1.1.1.1-1.1.1.255)
+          - For network type 'Network',  accepted value is valid IPv4 network address (1.1.1.0/24)
+          - For network type 'FQDN', accepted value is a valid FQDN (www.example.com, sub.example.com)
+            FTD does NOT accept wildcards
+          - Required when state = "present"
+        type: str
+        required: false
+      description:
+        description:
+          - The description/comment of the cisco_fmc object.
+          - The description of an existing object is left unchanged when not specified.
+        type: str
+        required: false
+  state:
+    description:
+      - Whether to create/modify (C(present)), or remove (C(absent)) the objects.
+    type: str
+    default: present
+    required: false
+  bulk_size:
+    description:
+      - Maximum number of objects created by a single FMC bulk request, from 1 to 1000.
+    type: int
+    default: 1000
+    required: false
+  fmc:
+    description:
+      - IP address or FQDN of Cisco FMC.
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  username:
+    description:
+      - Cisco FMC Username
+      - User should have sufficient permissions to modify objects
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  password:
+    description:
+      - Cisco FMC Password
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  check_source:
+    description:
+      - Where the current state is read from in check mode.
+      - C(snapshot) evaluates the task against the on-disk snapshot gathered by C(amotolani.cisco_fmc.fmc_facts) with
+        C(snapshot=true), without sending any request to the FMC. Requires check mode and the C(fmc) option, the
+        collections the task reads must be in the snapshot.
+    type: str
+    choices: ['fmc', 'snapshot']
+    default: fmc
+    required: false
+  auto_deploy:
+    description:
+      - Option to deploy configurations to deployable devices after changes
+    type: bool
+    default: False
+    required: False
+'''
+
+EXAMPLES = r'''
+- name: Create Host, Range and Network objects in one task
+  amotolani.cisco_fmc.network_objects:
+    state: present
+    fmc: cisco.sample.com
+    username: admin
+    password: Cisco1234
+    objects:
+      - {name: Host1, network_type: Host, value: 10.10.10.2}
+      - {name: Host2, network_type: Host, value: 10.10.10.3, description: Web server}
+      - {name: Range1, network_type: Range, value: 10.10.10.2-10.10.10.50}
+      - {name: Sample-Network, network_type: Network, value: 11.22.32.0/24}
+
+- name: Sync Host objects from an IPAM export and deploy changes to devices
+  amotolani.cisco_fmc.network_objects:
+    state: present
+    fmc: cisco.sample.com
+    username: admin
+    password: Cisco1234
+    auto_deploy: True
+    objects: "{{ ipam_hosts | map('combine', {'network_type': 'Host'}) | list }}"
+
+- name: Delete Host objects
+  amotolani.cisco_fmc.network_objects:
+    state: absent
+    fmc: cisco.sample.com
+    username: admin
+    password: Cisco1234
+    objects:
+      - {name: Host1, network_type: Host}
+      - {name: Host2, network_type: Host}
+
+- name: Check the Host objects for drift against the snapshot gathered by fmc_facts, without any request to the FMC
+  amotolani.cisco_fmc.network_objects:
+    state: present
+    fmc: cisco.sample.com
+    check_source: snapshot
+    objects: "{{ ipam_hosts | map('combine', {'network_type': 'Host'}) | list }}"
+  check_mode: true
+  diff: true
+'''
+
+RETURN = r'''
+created:
+  description: Number of objects created.
+  returned: always
+  type: int
+updated:
+  description: Number of existing objects modified.
+  returned: always
+  type: int
+deleted:
+  description: Number of objects deleted.
+  returned: always
+  type: int
+unchanged:
+  description: Number of requested objects already in the requested state.
+  returned: always
+  type: int
+request_stats:
+  description:
+    - Counters of the requests sent to the FMC by the task, see I(Request counters) in the collection README.
+  returned: success
+  type: dict
+  sample: {"requests": 6, "throttled": 0, "retried": 0, "waited": 0.5}
+'''
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            state=dict(type='str', choices=['present', 'absent'], default='present'),
+            objects=dict(
+                type='list',
+                elements='dict',
+                required=True,
+                options=dict(
+                    name=dict(type='str', required=True),
+                    network_type=dict(type='str', choices=['Host', 'Range', 'Network', 'FQDN'], required=True),
+                    value=dict(type='str'),
+                    description=dict(type='str')
+                )
+            ),
+            bulk_size=dict(type='int', default=BULK_CHUNK_SIZE),
+            fmc=dict(type='str'),
+            username=dict(type='str'),
+            password=dict(type='str', no_log=True),
+            auto_deploy=dict(type='bool', default=False),
+            check_source=dict(type='str', choices=['fmc', 'snapshot'], default='fmc')
+        ),
+        supports_check_mode=True
+    )
+    requested_state = module.params['state']
+    requested_objects = module.params['objects']
+    bulk_size = module.params['bulk_size']
+    auto_deploy = module.params['auto_deploy']
+    result = BulkResult(module, ['type', 'value', 'description'])
+
+# Define Validation Functions #
+
+    validators = {
+        'Host': (valid_ip_address, 'not a valid IP address'),
+        'Range': (valid_ip_range, 'not a valid IP address range'),
+        'Network': (valid_network_address, 'not a valid network address'),
+        'FQDN': (valid_fqdn, 'not a valid FQDN for FTD')
+    }
+
+    def validate_objects(objects):
+        """
+        Check every requested object before sending anything to the FMC.
+        :param objects: list of requested objects
+        :return: list of error messages
+        """
+        errors = []
+        names = set()
+        for i in objects:
+            if i['name'] in names:
+                errors.append('{}: duplicate object name'.format(i['name']))
+            names.add(i['name'])
+            if requested_state == 'present':
+                validator, reason = validators[i['network_type']]
+                if i['value'] is None:
+                    errors.append('{}: value is required when state = "present"'.format(i['name']))
+                elif not validator(i['value']):
+                    errors.append('{}: provided value {} is {}'.format(i['name'], i['value'], reason))
+        return errors
+
+    if not 1 <= bulk_size <= BULK_CHUNK_SIZE:
+        result.fail('bulk_size must be between 1 and {}'.format(BULK_CHUNK_SIZE))
+    errors = validate_objects(requested_objects)
+    if errors:
+        result.fail('Invalid network objects: {}'.format('; '.join(errors)))
+
+    with fmc_connection(module, autodeploy=auto_deploy) as fmc1:
+
+        # Fetch the existing objects of each requested type once
+        existing = {}
+        for network_type in set(i['network_type'] for i in requested_objects):
+            objects = get_all(fmc1, NETWORK_OBJECT_PATHS[network_type])
+            if objects is None:
+                result.fail(error_message(fmc1))
+            existing[network_type] = index_by_name(objects)
+
+        # Compare the requested objects with the existing state
+        changes = dict((i, []) for i in NETWORK_OBJECT_PATHS)
+        for i in requested_objects:
+            network_type = i['network_type']
+            _obj = existing[network_type].get(i['name'])
+            if requested_state == 'absent':
+                if _obj is None:
+                    result.record('unchanged')
+                else:
+                    changes[network_type].append(('deleted', None, _obj))
+            elif _obj is None:
+                obj = dict(name=i['name'], type=network_type, value=i['value'])
+                if i['description'] is not None:
+                    obj['description'] = i['description']
+                changes[network_type].append(('created', obj, None))
+            elif _obj.get('value') != i['value'] or \
+                    (i['description'] is not None and _obj.get('description') != i['description']):
+                obj = dict(id=_obj['id'], name=i['name'], type=_obj.get('type', network_type), value=i['value'],
+                           description=_obj.get('description') if i['description'] is None else i['description'])
+                changes[network_type].append(('updated', obj, _obj))
+            else:
+                result.record('unchanged')
+
+        # Perform action to change object state if not in check mode, new objects are created through the bulk API
+        errors = []
+        for network_type, _changes in changes.items():
+            if _changes:
+                errors += result.apply(fmc1, NETWORK_OBJECT_PATHS[network_type], _changes, bulk_size=bulk_size)
+        if errors:
+            result.fail('; '.join(errors))
+
+    result.exit(request_stats=fmc1.request_stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 #!/usr/bin/python
-from fmcapi import *
+from fmcapi import ProtocolPortObjects
 from ansible.module_utils.basic import AnsibleModule
-import base64
-import requests
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.fmc import (
+    fail_on_error, fmc_connection, record_change
+)
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.objects import object_diff
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.validation import valid_port
 
 DOCUMENTATION = r'''
 ---
@@ -31,8 +34,9 @@ options:
   fmc:
     description:
       - IP address or FQDN of Cisco FMC.
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
     type: str
-    required: true
+    required: false
   port:
     description:
       - Port/Port Range value of cisco_fmc object.
@@ -42,13 +46,25 @@ options:
     description:
       - Cisco FMC Username
       - User should have sufficient permissions to modify objects
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
     type: str
-    required: true
+    required: false
   password:
     description:
       - Cisco FMC Password
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
     type: str
-    required: true
+    required: false
+  check_source:
+    description:
+      - Where the current state is read from in check mode.
+      - C(snapshot) evaluates the task against the on-disk snapshot gathered by C(amotolani.cisco_fmc.fmc_facts) with
+        C(snapshot=true), without sending any request to the FMC. Requires check mode and the C(fmc) option, the
+        collections the task reads must be in the snapshot.
+    type: str
+    choices: ['fmc', 'snapshot']
+    default: fmc
+    required: false
   auto_deploy:
     description:
       - Option to deploy configurations to deployable devices after changes
@@ -91,10 +107,11 @@ def main():
             name=dict(type='str', required=True),
             port=dict(type='str', required=True),
             protocol=dict(type='str', choices=['UDP', 'TCP'], required=True),
-            fmc=dict(type='str', required=True),
-            username=dict(type='str', required=True),
-            password=dict(type='str', required=True,  no_log=True),
-            auto_deploy=dict(type='bool', default=False)
+            fmc=dict(type='str'),
+            username=dict(type='str'),
+            password=dict(type='str', no_log=True),
+            auto_deploy=dict(type='bool', default=False),
+            check_source=dict(type='str', choices=['fmc', 'snapshot'], default='fmc')
         ),
         supports_check_mode=True
     )
@@ -106,84 +123,26 @@ def main():
     name = module.params['name']
     port = module.params['port']
     protocol = module.params['protocol']
-    fmc = module.params['fmc']
-    username = module.params['username']
-    password = module.params['password']
     auto_deploy = module.params['auto_deploy']
 
-# Define Operation Functions #
-
-    def get_obj(obj):
-        a = obj.get()
-        return a
-
-    def create_obj(obj):
-        a = obj.post()
-        return a
-    
-    def delete_obj(obj):
-        a = obj.delete()
-        return a
-
-    def update_obj(obj):
-        a = obj.put()
-        return a
-
-    def validate_port(value):
-        """
-            We need to check the Port Number is valid.
-            :param value: Port Number/Port Range
-            :return: boolean
-            """
-        d = []
-        for port_number in value.split('-'):
-            d.append(port_number)
-        if len(d) == 1 and int(d[0]) in range(65536):
-            return True
-        elif len(d) == 2 and int(d[0]) in range(65536) and int(d[1]) in range(65536) and int(d[1]) > int(d[0]):
-            return True
-        else:
-            return False
-
-    # Custom argument validations
-    # More of these are needed
-    encoded_bytes = base64.b64encode(bytes(username + ':' + password, 'utf-8'))
-    encoded_str = str(encoded_bytes, "utf-8")
-
-    url = "https://{}/api/fmc_platform/v1/auth/generatetoken".format(fmc)
-    payload = {}
-    headers = {
-        'Authorization': 'Basic {}'.format(encoded_str)
-    }
-
-    try:
-        response = requests.request("POST", url, headers=headers, data=payload, verify=False)
-        response.raise_for_status()
-    except requests.exceptions.ConnectionError as hrr:
-        result = dict(unreachable=True, msg='Unable to establish network connection to FMC')
-        module.exit_json(**result)
-    except requests.exceptions.HTTPError as err:
-        result = dict(failed=True, msg='Connection to FMC failed. Reason: {}'.format(err))
+    if not valid_port(port):
+        result = dict(failed=True, msg='Provided Port/Port Range is not valid')
         module.exit_json(**result)
 
-    with FMC(host=fmc, username=username, password=password, autodeploy=auto_deploy) as fmc1:
+    with fmc_connection(module, autodeploy=auto_deploy) as fmc1:
+
+        # Instantiate Objects with values
+        obj1 = ProtocolPortObjects(fmc=fmc1, name=name, port=port, protocol=protocol)
 
-        # Instantiate Objects with values if valid Port/Port Range is provided
-        if validate_port(port):
-            obj1 = ProtocolPortObjects(fmc=fmc1, name=name, port=port, protocol=protocol)
-        else:
-            result = dict(failed=True, msg='Provided Port/Port Range is not valid')
-            module.exit_json(**result)
-        
         # Check existing state of the object
-        _obj1 = get_obj(obj1)
+        _obj1 = obj1.get()
         if requested_state == 'present':
             if 'items' in _obj1.keys():
                 _create_obj = True
                 changed = True
             elif _obj1['port'] != port or _obj1['name'] != name:
                 _create_obj = False
-                changed = True 
+                changed = True
         else:
             if 'items' in _obj1.keys():
                 changed = False
@@ -193,23 +152,19 @@ def main():
         # Perform action to change object state if not in check mode
         if changed is True and module.check_mode is False:
             if requested_state == 'present' and _create_obj is True:
-                fmc_obj = create_obj(obj1)
+                fmc_obj = obj1.post()
             elif requested_state == 'present' and _create_obj is False:
                 obj1 = ProtocolPortObjects(fmc=fmc1, id=_obj1['id'], name=name, port=port, protocol=protocol)
-                fmc_obj = update_obj(obj1)
-            elif requested_state == 'absent':
-                fmc_obj = delete_obj(obj1)
-            if fmc_obj is None:
-                try:
-                    # error_response attribute only available in fmcapi>=20210523.0
-                    fmc_obj = fmc1.error_response
-                    msg = fmc_obj["error"]["messages"][0]["description"]
-                except AttributeError:
-                    msg = "An error occurred while sending request to cisco fmc"
-                result = dict(failed=True, msg=msg)
-                module.exit_json(**result)
-                
+                fmc_obj = obj1.put()
+            else:
+                fmc_obj = obj1.delete()
+            fail_on_error(module, fmc1, fmc_obj)
+            record_change(fmc1, obj1.URL_SUFFIX)
+
     result = dict(changed=changed)
+    if module._diff:
+        requested = dict(name=name, protocol=protocol, port=port) if requested_state == 'present' else None
+        result['diff'] = object_diff(None if 'items' in _obj1 else _obj1, requested, ['name', 'protocol', 'port'])
     module.exit_json(**result)
 
 
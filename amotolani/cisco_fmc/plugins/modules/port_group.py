@@ -1,8 +1,11 @@
 #!/usr/bin/python
-from fmcapi import *
+from fmcapi import PortObjectGroups
 from ansible.module_utils.basic import AnsibleModule
-import base64
-import requests
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.fmc import (
+    fail_on_error, fmc_connection, record_change
+)
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.objects import object_diff
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.validation import valid_port
 
 DOCUMENTATION = r'''
 ---
@@ -38,19 +41,32 @@ options:
   fmc:
     description:
       - IP address or FQDN of Cisco FMC.
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
     type: str
-    required: true
+    required: false
   username:
     description:
       - Cisco FMC Username
       - User should have sufficient permissions to modify objects
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
     type: str
-    required: true
+    required: false
   password:
     description:
       - Cisco FMC Password
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
     type: str
-    required: true
+    required: false
+  check_source:
+    description:
+      - Where the current state is read from in check mode.
+      - C(snapshot) evaluates the task against the on-disk snapshot gathered by C(amotolani.cisco_fmc.fmc_facts) with
+        C(snapshot=true), without sending any request to the FMC. Requires check mode and the C(fmc) option, the
+        collections the task reads must be in the snapshot.
+    type: str
+    choices: ['fmc', 'snapshot']
+    default: fmc
+    required: false
   auto_deploy:
     description:
       - Option to deploy configurations to deployable devices after changes
@@ -100,10 +116,11 @@ def main():
             action=dict(type='str', choices=['add', 'remove']),
             # group_literals=dict(type='list', elements='str'),
             group_objects=dict(type='list', elements='str'),
-            fmc=dict(type='str', required=True),
-            username=dict(type='str', required=True),
-            password=dict(type='str', required=True, no_log=True),
-            auto_deploy=dict(type='bool', default=False)
+            fmc=dict(type='str'),
+            username=dict(type='str'),
+            password=dict(type='str', no_log=True),
+            auto_deploy=dict(type='bool', default=False),
+            check_source=dict(type='str', choices=['fmc', 'snapshot'], default='fmc')
         ),
         supports_check_mode=True,
         required_if=[
@@ -119,67 +136,9 @@ def main():
     # group_literals = module.params['group_literals']
     group_literals = None
     group_objects = module.params['group_objects']
-    fmc = module.params['fmc']
-    username = module.params['username']
-    password = module.params['password']
     auto_deploy = module.params['auto_deploy']
 
-    # Define Operation Functions #
-
-    def get_obj(obj):
-        a = obj.get()
-        return a
-
-    def create_obj(obj):
-        a = obj.post()
-        return a
-
-    def delete_obj(obj):
-        a = obj.delete()
-        return a
-
-    def update_obj(obj):
-        a = obj.put()
-        return a
-
-    def validate_port(value):
-        """
-            We need to check the Port Number is valid.
-            :param value: Port Number/Port Range
-            :return: boolean
-            """
-        d = []
-        for port_number in value.split('-'):
-            d.append(port_number)
-        if len(d) == 1 and int(d[0]) in range(65536):
-            return True
-        elif len(d) == 2 and int(d[0]) in range(65536) and int(d[1]) in range(65536) and int(d[1]) > int(d[0]):
-            return True
-        else:
-            return False
-
-    # Custom argument validations
-    # More of these are needed
-    encoded_bytes = base64.b64encode(bytes(username + ':' + password, 'utf-8'))
-    encoded_str = str(encoded_bytes, "utf-8")
-
-    url = "https://{}/api/fmc_platform/v1/auth/generatetoken".format(fmc)
-    payload = {}
-    headers = {
-        'Authorization': 'Basic {}'.format(encoded_str)
-    }
-
-    try:
-        response = requests.request("POST", url, headers=headers, data=payload, verify=False)
-        response.raise_for_status()
-    except requests.exceptions.ConnectionError as hrr:
-        result = dict(unreachable=True, msg='Unable to establish network connection to FMC')
-        module.exit_json(**result)
-    except requests.exceptions.HTTPError as err:
-        result = dict(failed=True, msg='Connection to FMC failed. Reason: {}'.format(err))
-        module.exit_json(**result)
-
-    with FMC(host=fmc, username=username, password=password, autodeploy=auto_deploy) as fmc1:
+    with fmc_connection(module, autodeploy=auto_deploy) as fmc1:
 
         # creates iterable by default when not set from user ui
         if group_literals is None:
@@ -193,7 +152,7 @@ def main():
 
         # Instantiate Objects with values if valid Port/Port Range is provided
         if len(group_literals) > 0:
-            if all(validate_port(i) for i in group_literals):
+            if all(valid_port(i) for i in group_literals):
                 obj1 = PortObjectGroups(fmc=fmc1, name=name)
             else:
                 result = dict(changed=False, msg='Group Members are not Ports/Port Ranges')
@@ -202,7 +161,7 @@ def main():
             obj1 = PortObjectGroups(fmc=fmc1, name=name)
 
         # Check existing state of the object
-        _obj1 = get_obj(obj1)
+        _obj1 = obj1.get()
         new_config = []
         current_objects_config = []
         current_literals_config = []
@@ -264,22 +223,25 @@ def main():
                     for port_object in group_objects:
                         obj1.named_ports(action='add', name=port_object)
                 if _create_obj is True:
-                    fmc_obj = create_obj(obj1)
+                    fmc_obj = obj1.post()
                 elif _create_obj is False:
-                    fmc_obj = update_obj(obj1)
+                    fmc_obj = obj1.put()
             elif requested_state == 'absent':
-                fmc_obj = delete_obj(obj1)
-            if fmc_obj is None:
-                try:
-                    # error_response attribute only available in fmcapi>=20210523.0
-                    fmc_obj = fmc1.error_response
-                    msg = fmc_obj["error"]["messages"][0]["description"]
-                except AttributeError:
-                    msg = "An error occurred while sending request to cisco fmc"
-                result = dict(failed=True, msg=msg)
-                module.exit_json(**result)
+                fmc_obj = obj1.delete()
+            fail_on_error(module, fmc1, fmc_obj)
+            record_change(fmc1, obj1.URL_SUFFIX)
 
     result = dict(changed=changed)
+    if module._diff:
+        current = None
+        if 'items' not in _obj1:
+            current = dict(name=name, objects=sorted(i['name'] for i in _obj1.get('objects', [])))
+        requested = current
+        if changed is True and requested_state == 'present':
+            requested = dict(name=name, objects=sorted(set(group_objects)))
+        elif changed is True:
+            requested = None
+        result['diff'] = object_diff(current, requested, ['name', 'objects'])
     module.exit_json(**result)
 
 
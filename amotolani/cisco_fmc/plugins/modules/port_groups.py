@@ -0,0 +1,285 @@
+#!/usr/bin/python
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.bulk import BulkResult
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.fmc import build_object_index, fmc_connection
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.objects import (
+    PORT_GROUPS_PATH, PORT_OBJECTS_PATH, error_message, get_all, index_by_name
+)
+
+DOCUMENTATION = r'''
+---
+author: Adelowo David (@amotolani)
+module: amotolani.cisco_fmc.port_groups
+short_description: Create, Modify and Delete Cisco FMC port group objects in bulk
+description:
+  - Create, Modify and Delete many Cisco FMC port group objects in a single task.
+  - The existing port groups are fetched once and the port objects are indexed once, the members of every group are
+    compared locally and only the groups that need a change are created, updated or deleted, by up to
+    C(max_concurrent) requests at a time.
+options:
+  groups:
+    description:
+      - The port groups to be created, modified or deleted.
+    type: list
+    elements: dict
+    required: true
+    options:
+      name:
+        description:
+          - The name of the cisco_fmc port group.
+        type: str
+        required: true
+      members:
+        description:
+          - Names of the existing FMC port objects (TCP/UDP) that are members of the group.
+          - Required when state = "present"
+        type: list
+        elements: str
+        required: false
+  state:
+    description:
+      - Whether to create/modify (C(present)), or remove (C(absent)) the port groups.
+    type: str
+    default: present
+    required: false
+  action:
+    description:
+      - Action to take with the members of existing port groups when state = "present".
+      - C(replace) makes the requested members the only members of each group, C(add) adds them to the current
+        members and C(remove) removes them from the current members.
+      - Port groups that do not exist are created with their requested members, unless the action is C(remove).
+    type: str
+    choices: ['add', 'remove', 'replace']
+    default: replace
+    required: false
+  max_concurrent:
+    description:
+      - Maximum number of port group requests sent to the FMC at the same time.
+    type: int
+    default: 4
+    required: false
+  fmc:
+    description:
+      - IP address or FQDN of Cisco FMC.
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  username:
+    description:
+      - Cisco FMC Username
+      - User should have sufficient permissions to modify objects
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  password:
+    description:
+      - Cisco FMC Password
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  check_source:
+    description:
+      - Where the current state is read from in check mode.
+      - C(snapshot) evaluates the task against the on-disk snapshot gathered by C(amotolani.cisco_fmc.fmc_facts) with
+        C(snapshot=true), without sending any request to the FMC. Requires check mode and the C(fmc) option, the
+        collections the task reads must be in the snapshot.
+    type: str
+    choices: ['fmc', 'snapshot']
+    default: fmc
+    required: false
+  auto_deploy:
+    description:
+      - Option to deploy configurations to deployable devices after changes
+    type: bool
+    default: False
+    required: False
+'''
+
+EXAMPLES = r'''
+- name: Create or update Port Groups in one task
+  amotolani.cisco_fmc.port_groups:
+    state: present
+    fmc: cisco.sample.com
+    username: admin
+    password: Cisco1234
+    groups:
+      - {name: Web-Ports, members: [HTTP, HTTPS]}
+      - {name: Mail-Ports, members: [SMTP, IMAP, POP3]}
+
+- name: Add a port object to several Port Groups
+  amotolani.cisco_fmc.port_groups:
+    state: present
+    action: add
+    fmc: cisco.sample.com
+    username: admin
+    password: Cisco1234
+    groups:
+      - {name: Web-Ports, members: [HTTP-8080]}
+      - {name: Proxy-Ports, members: [HTTP-8080]}
+
+- name: Delete Port Groups
+  amotolani.cisco_fmc.port_groups:
+    state: absent
+    fmc: cisco.sample.com
+    username: admin
+    password: Cisco1234
+    groups:
+      - {name: Web-Ports}
+      - {name: Mail-Ports}
+'''
+
+RETURN = r'''
+created:
+  description: Number of port groups created.
+  returned: always
+  type: int
+updated:
+  description: Number of existing port groups modified.
+  returned: always
+  type: int
+deleted:
+  description: Number of port groups deleted.
+  returned: always
+  type: int
+unchanged:
+  description: Number of requested port groups already in the requested state.
+  returned: always
+  type: int
+request_stats:
+  description:
+    - Counters of the requests sent to the FMC by the task, see I(Request counters) in the collection README.
+  returned: success
+  type: dict
+  sample: {"requests": 6, "throttled": 0, "retried": 0, "waited": 0.5}
+'''
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            state=dict(type='str', choices=['present', 'absent'], default='present'),
+            groups=dict(
+                type='list',
+                elements='dict',
+                required=True,
+                options=dict(
+                    name=dict(type='str', required=True),
+                    members=dict(type='list', elements='str')
+                )
+            ),
+            action=dict(type='str', choices=['add', 'remove', 'replace'], default='replace'),
+            max_concurrent=dict(type='int', default=4),
+            fmc=dict(type='str'),
+            username=dict(type='str'),
+            password=dict(type='str', no_log=True),
+            auto_deploy=dict(type='bool', default=False),
+            check_source=dict(type='str', choices=['fmc', 'snapshot'], default='fmc')
+        ),
+        supports_check_mode=True
+    )
+    requested_state = module.params['state']
+    requested_groups = module.params['groups']
+    action = module.params['action']
+    max_concurrent = module.params['max_concurrent']
+    auto_deploy = module.params['auto_deploy']
+
+    def describe(obj):
+        """
+        Show the member names of a port group in the diff.
+        :param obj: port group
+        :return: dict
+        """
+        return dict(name=obj['name'], objects=sorted(i['name'] for i in obj.get('objects', [])))
+
+    result = BulkResult(module, ['objects'], describe=describe)
+
+    def validate_groups(groups):
+        """
+        Check every requested port group before sending anything to the FMC.
+        :param groups: list of requested port groups
+        :return: list of error messages
+        """
+        errors = []
+        names = set()
+        for i in groups:
+            if i['name'] in names:
+                errors.append('{}: duplicate port group name'.format(i['name']))
+            names.add(i['name'])
+            if requested_state == 'present' and not i['members']:
+                errors.append('{}: members are required when state = "present"'.format(i['name']))
+        return errors
+
+    if max_concurrent < 1:
+        result.fail('max_concurrent must be at least 1')
+    errors = validate_groups(requested_groups)
+    if errors:
+        result.fail('Invalid port groups: {}'.format('; '.join(errors)))
+
+    with fmc_connection(module, autodeploy=auto_deploy) as fmc1:
+        object_index = build_object_index(fmc1)
+
+        # Fetch the existing port groups once
+        existing = get_all(fmc1, PORT_GROUPS_PATH, max_workers=max_concurrent)
+        if existing is None:
+            result.fail(error_message(fmc1))
+        existing = index_by_name(existing)
+
+        # Members that are not in a group yet are resolved from one listing of the port objects
+        ports = {}
+        if requested_state == 'present' and action != 'remove':
+            ports = object_index.load(PORT_OBJECTS_PATH)
+            if ports is None:
+                result.fail(error_message(fmc1))
+            missing = []
+            for i in requested_groups:
+                current = index_by_name(existing.get(i['name'], {}).get('objects', []))
+                missing += ['{}: {}'.format(i['name'], j) for j in i['members'] if j not in current and j not in ports]
+            if missing:
+                result.fail('Check that the port group members are existing cisco fmc port objects: {}'.format(
+                    ', '.join(missing)))
+
+        # Compare the requested port groups with the existing state
+        changes = []
+        for i in requested_groups:
+            _obj = existing.get(i['name'])
+            if requested_state == 'absent':
+                if _obj is None:
+                    result.record('unchanged')
+                else:
+                    changes.append(('deleted', None, _obj))
+                continue
+            if _obj is None:
+                if action == 'remove':
+                    result.record('unchanged')
+                else:
+                    obj = dict(name=i['name'], type='PortObjectGroup',
+                               objects=[ports[j] for j in dict.fromkeys(i['members'])])
+                    changes.append(('created', obj, None))
+                continue
+            current = index_by_name(_obj.get('objects', []))
+            if action == 'remove':
+                removed = set(i['members'])
+                objects = [v for k, v in current.items() if k not in removed]
+            elif action == 'add':
+                objects = list(current.values()) + [ports[j] for j in dict.fromkeys(i['members']) if j not in current]
+            else:
+                objects = [current.get(j) or ports[j] for j in dict.fromkeys(i['members'])]
+            if set(j['name'] for j in objects) == set(current):
+                result.record('unchanged')
+            elif not objects:
+                result.fail('{}: At least one member must exist in the port group'.format(i['name']))
+            else:
+                obj = dict((k, _obj[k]) for k in ('id', 'name', 'type', 'description', 'overridable') if k in _obj)
+                obj['objects'] = objects
+                changes.append(('updated', obj, _obj))
+
+        # Perform action to change object state if not in check mode, max_concurrent requests at a time
+        errors = result.apply(fmc1, PORT_GROUPS_PATH, changes, max_workers=max_concurrent)
+        if errors:
+            result.fail('; '.join(errors))
+
+    result.exit(request_stats=fmc1.request_stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/python
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.bulk import BulkResult
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.fmc import fmc_connection
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.objects import (
+    BULK_CHUNK_SIZE, PORT_OBJECTS_PATH, error_message, get_all, index_by_name
+)
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.validation import valid_port
+
+DOCUMENTATION = r'''
+---
+author: Adelowo David (@amotolani)
+module: amotolani.cisco_fmc.port_objects
+short_description: Create, Modify and Delete Cisco FMC port objects in bulk
+description:
+  - Create, Modify and Delete many Cisco FMC TCP and UDP port objects in a single task.
+  - Every requested object is validated before anything is sent to the FMC. The existing port objects are fetched
+    once, compared with the requested objects and new objects are created through the FMC bulk API.
+options:
+  objects:
+    description:
+      - The port objects to be created, modified or deleted.
+    type: list
+    elements: dict
+    required: true
+    options:
+      name:
+        description:
+          - The name of the cisco_fmc port object.
+        type: str
+        required: true
+      protocol:
+        description:
+          - The network port protocol.
+          - Required when state = "present"
+        type: str
+        choices: ['TCP', 'UDP']
+        required: false
+      port:
+        description:
+          - Port/Port Range value of cisco_fmc object, for example 443 or 8000-8080.
+          - Required when state = "present"
+        type: str
+        required: false
+      description:
+        description:
+          - The description/comment of the cisco_fmc object.
+          - The description of an existing object is left unchanged when not specified.
+        type: str
+        required: false
+  state:
+    description:
+      - Whether to create/modify (C(present)), or remove (C(absent)) the objects.
+    type: str
+    default: present
+    required: false
+  bulk_size:
+    description:
+      - Maximum number of objects created by a single FMC bulk request, from 1 to 1000.
+    type: int
+    default: 1000
+    required: false
+  fmc:
+    description:
+      - IP address or FQDN of Cisco FMC.
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  username:
+    description:
+      - Cisco FMC Username
+      - User should have sufficient permissions to modify objects
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  password:
+    description:
+      - Cisco FMC Password
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  check_source:
+    description:
+      - Where the current state is read from in check mode.
+      - C(snapshot) evaluates the task against the on-disk snapshot gathered by C(amotolani.cisco_fmc.fmc_facts) with
+        C(snapshot=true), without sending any request to the FMC. Requires check mode and the C(fmc) option, the
+        collections the task reads must be in the snapshot.
+    type: str
+    choices: ['fmc', 'snapshot']
+    default: fmc
+    required: false
+  auto_deploy:
+    description:
+      - Option to deploy configurations to deployable devices after changes
+    type: bool
+    default: False
+    required: False
+'''
+
+EXAMPLES = r'''
+- name: Create port objects in one task
+  amotolani.cisco_fmc.port_objects:
+    state: present
+    fmc: cisco.sample.com
+    username: admin
+    password: Cisco1234
+    objects:
+      - {name: HTTPS-443, protocol: TCP, port: 443}
+      - {name: DNS-53, protocol: UDP, port: 53, description: DNS}
+      - {name: App-Range, protocol: TCP, port: 8000-8080}
+
+- name: Build a service catalog from a list of services
+  amotolani.cisco_fmc.port_objects:
+    state: present
+    fmc: cisco.sample.com
+    username: admin
+    password: Cisco1234
+    objects: "{{ service_catalog }}"
+
+- name: Delete port objects
+  amotolani.cisco_fmc.port_objects:
+    state: absent
+    fmc: cisco.sample.com
+    username: admin
+    password: Cisco1234
+    objects:
+      - {name: HTTPS-443}
+      - {name: DNS-53}
+'''
+
+RETURN = r'''
+created:
+  description: Number of objects created.
+  returned: always
+  type: int
+updated:
+  description: Number of existing objects modified.
+  returned: always
+  type: int
+deleted:
+  description: Number of objects deleted.
+  returned: always
+  type: int
+unchanged:
+  description: Number of requested objects already in the requested state.
+  returned: always
+  type: int
+request_stats:
+  description:
+    - Counters of the requests sent to the FMC by the task, see I(Request counters) in the collection README.
+  returned: success
+  type: dict
+  sample: {"requests": 6, "throttled": 0, "retried": 0, "waited": 0.5}
+'''
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            state=dict(type='str', choices=['present', 'absent'], default='present'),
+            objects=dict(
+                type='list',
+                elements='dict',
+                required=True,
+                options=dict(
+                    name=dict(type='str', required=True),
+                    protocol=dict(type='str', choices=['TCP', 'UDP']),
+                    port=dict(type='str'),
+                    description=dict(type='str')
+                )
+            ),
+            bulk_size=dict(type='int', default=BULK_CHUNK_SIZE),
+            fmc=dict(type='str'),
+            username=dict(type='str'),
+            password=dict(type='str', no_log=True),
+            auto_deploy=dict(type='bool', default=False),
+            check_source=dict(type='str', choices=['fmc', 'snapshot'], default='fmc')
+        ),
+        supports_check_mode=True
+    )
+    requested_state = module.params['state']
+    requested_objects = module.params['objects']
+    bulk_size = module.params['bulk_size']
+    auto_deploy = module.params['auto_deploy']
+    result = BulkResult(module, ['protocol', 'port', 'description'])
+
+    def validate_objects(objects):
+        """
+        Check every requested object before sending anything to the FMC.
+        :param objects: list of requested objects
+        :return: list of error messages
+        """
+        errors = []
+        names = set()
+        for i in objects:
+            if i['name'] in names:
+                errors.append('{}: duplicate object name'.format(i['name']))
+            names.add(i['name'])
+            if requested_state == 'present':
+                if i['protocol'] is None or i['port'] is None:
+                    errors.append('{}: protocol and port are required when state = "present"'.format(i['name']))
+                elif not valid_port(i['port']):
+                    errors.append('{}: provided value {} is not a valid port or port range'.format(
+                        i['name'], i['port']))
+        return errors
+
+    if not 1 <= bulk_size <= BULK_CHUNK_SIZE:
+        result.fail('bulk_size must be between 1 and {}'.format(BULK_CHUNK_SIZE))
+    errors = validate_objects(requested_objects)
+    if errors:
+        result.fail('Invalid port objects: {}'.format('; '.join(errors)))
+
+    with fmc_connection(module, autodeploy=auto_deploy) as fmc1:
+
+        # Fetch the existing port objects once
+        existing = get_all(fmc1, PORT_OBJECTS_PATH)
+        if existing is None:
+            result.fail(error_message(fmc1))
+        existing = index_by_name(existing)
+
+        # Compare the requested objects with the existing state
+        changes = []
+        for i in requested_objects:
+            _obj = existing.get(i['name'])
+            if requested_state == 'absent':
+                if _obj is None:
+                    result.record('unchanged')
+                else:
+                    changes.append(('deleted', None, _obj))
+            elif _obj is None:
+                obj = dict(name=i['name'], type='ProtocolPortObject', protocol=i['protocol'], port=i['port'])
+                if i['description'] is not None:
+                    obj['description'] = i['description']
+                changes.append(('created', obj, None))
+            elif _obj.get('protocol') != i['protocol'] or _obj.get('port') != i['port'] or \
+                    (i['description'] is not None and _obj.get('description') != i['description']):
+                obj = dict(id=_obj['id'], name=i['name'], type=_obj.get('type', 'ProtocolPortObject'),
+                           protocol=i['protocol'], port=i['port'],
+                           description=_obj.get('description') if i['description'] is None else i['description'])
+                changes.append(('updated', obj, _obj))
+            else:
+                result.record('unchanged')
+
+        # Perform action to change object state if not in check mode, new objects are created through the bulk API
+        errors = result.apply(fmc1, PORT_OBJECTS_PATH, changes, bulk_size=bulk_size)
+        if errors:
+            result.fail('; '.join(errors))
+
+    result.exit(request_stats=fmc1.request_stats)
+
+
+if __name__ == "__main__":
+    main()
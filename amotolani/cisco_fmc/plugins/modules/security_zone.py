@@ -1,6 +1,10 @@
 #!/usr/bin/python
-from fmcapi import *
+from fmcapi import SecurityZones
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.fmc import (
+    fail_on_error, fmc_connection, record_change
+)
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.objects import object_diff
 
 DOCUMENTATION = r'''
 ---
@@ -28,19 +32,32 @@ options:
   fmc:
     description:
       - IP address or FQDN of Cisco FMC.
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
     type: str
-    required: true
+    required: false
   username:
     description:
       - Cisco FMC Username
       - User should have sufficient permissions to modify objects
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
     type: str
-    required: true
+    required: false
   password:
     description:
       - Cisco FMC Password
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
     type: str
-    required: true
+    required: false
+  check_source:
+    description:
+      - Where the current state is read from in check mode.
+      - C(snapshot) evaluates the task against the on-disk snapshot gathered by C(amotolani.cisco_fmc.fmc_facts) with
+        C(snapshot=true), without sending any request to the FMC. Requires check mode and the C(fmc) option, the
+        collections the task reads must be in the snapshot.
+    type: str
+    choices: ['fmc', 'snapshot']
+    default: fmc
+    required: false
   auto_deploy:
     description:
       - Option to deploy configurations to deployable devices after changes
@@ -77,10 +94,11 @@ def main():
             state=dict(type='str', choices=['present', 'absent'], required=True),
             name=dict(type='str', required=True),
             interface_mode=dict(type='str', choices=['routed', 'switched', 'asa', 'inline', 'passive'], required=True),
-            fmc=dict(type='str', required=True),
-            username=dict(type='str', required=True),
-            password=dict(type='str', required=True,  no_log=True),
-            auto_deploy=dict(type='bool', default=False)
+            fmc=dict(type='str'),
+            username=dict(type='str'),
+            password=dict(type='str', no_log=True),
+            auto_deploy=dict(type='bool', default=False),
+            check_source=dict(type='str', choices=['fmc', 'snapshot'], default='fmc')
         ),
         supports_check_mode=True
     )
@@ -91,36 +109,15 @@ def main():
     requested_state = module.params['state']
     name = module.params['name']
     interface_mode = module.params['interface_mode']
-    fmc = module.params['fmc']
-    username = module.params['username']
-    password = module.params['password']
     auto_deploy = module.params['auto_deploy']
 
-# Define Operation Functions #
-
-    def get_obj(obj):
-        a = obj.get()
-        return a
-
-    def create_obj(obj):
-        a = obj.post()
-        return a
-    
-    def delete_obj(obj):
-        a = obj.delete()
-        return a
-
-    def update_obj(obj):
-        a = obj.put()
-        return a
-
-    with FMC(host=fmc, username=username, password=password, autodeploy=auto_deploy) as fmc1:
+    with fmc_connection(module, autodeploy=auto_deploy) as fmc1:
 
         # Instantiate Objects with values
         obj1 = SecurityZones(fmc=fmc1, name=name)
 
         # Check existing state of the object
-        _obj1 = get_obj(obj1)
+        _obj1 = obj1.get()
         if requested_state == 'present':
             if 'items' in _obj1.keys():
                 _create_obj = True
@@ -132,6 +129,7 @@ def main():
                 changed = False
                 _create_obj = False
         else:
+            _create_obj = False
             if 'items' in _obj1.keys():
                 changed = False
             else:
@@ -144,23 +142,19 @@ def main():
         # Perform action to change object state if not in check mode
         if changed is True and module.check_mode is False:
             if requested_state == 'present' and _create_obj is True:
-                fmc_obj = create_obj(obj1)
+                fmc_obj = obj1.post()
             elif requested_state == 'present' and _create_obj is False:
                 obj1 = SecurityZones(fmc=fmc1, id=_obj1['id'], name=name, interfaceMode=interface_mode)
-                fmc_obj = update_obj(obj1)
+                fmc_obj = obj1.put()
             elif requested_state == 'absent':
-                fmc_obj = delete_obj(obj1)
-            if fmc_obj is None:
-                try:
-                    # error_response attribute only available in fmcapi>=20210523.0
-                    fmc_obj = fmc1.error_response
-                    msg = fmc_obj["error"]["messages"][0]["description"]
-                except AttributeError:
-                    msg = "An error occurred while sending request to cisco fmc"
-                result = dict(failed=True, msg=msg)
-                module.exit_json(**result)
+                fmc_obj = obj1.delete()
+            fail_on_error(module, fmc1, fmc_obj)
+            record_change(fmc1, obj1.URL_SUFFIX)
                 
     result = dict(changed=changed)
+    if module._diff:
+        requested = dict(name=name, interfaceMode=interface_mode.upper()) if requested_state == 'present' else None
+        result['diff'] = object_diff(None if 'items' in _obj1 else _obj1, requested, ['name', 'interfaceMode'])
     module.exit_json(**result)
 
 
@@ -0,0 +1,222 @@
+#!/usr/bin/python
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.bulk import BulkResult
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.fmc import fmc_connection
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.objects import (
+    SECURITY_ZONES_PATH, error_message, get_all, index_by_name
+)
+
+DOCUMENTATION = r'''
+---
+author: Adelowo David (@amotolani)
+module: amotolani.cisco_fmc.security_zones
+short_description: Create, Modify and Delete Cisco FMC Security Zone objects in bulk
+description:
+  - Create, Modify and Delete many Cisco FMC Security Zone objects in a single task.
+  - The existing security zones are fetched once, the interface mode of every zone is compared locally and only the
+    zones that need a change are created, updated or deleted, by up to C(max_concurrent) requests at a time.
+options:
+  zones:
+    description:
+      - The security zones to be created, modified or deleted.
+    type: list
+    elements: dict
+    required: true
+    options:
+      name:
+        description:
+          - The name of the cisco_fmc security zone.
+        type: str
+        required: true
+      interface_mode:
+        description:
+          - Supported choices are ['routed', 'switched', 'asa', 'inline', 'passive']
+          - Required when state = "present"
+        type: str
+        choices: ['routed', 'switched', 'asa', 'inline', 'passive']
+        required: false
+  state:
+    description:
+      - Whether to create/modify (C(present)), or remove (C(absent)) the security zones.
+    type: str
+    default: present
+    required: false
+  max_concurrent:
+    description:
+      - Maximum number of security zone requests sent to the FMC at the same time.
+    type: int
+    default: 4
+    required: false
+  fmc:
+    description:
+      - IP address or FQDN of Cisco FMC.
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  username:
+    description:
+      - Cisco FMC Username
+      - User should have sufficient permissions to modify objects
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  password:
+    description:
+      - Cisco FMC Password
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  check_source:
+    description:
+      - Where the current state is read from in check mode.
+      - C(snapshot) evaluates the task against the on-disk snapshot gathered by C(amotolani.cisco_fmc.fmc_facts) with
+        C(snapshot=true), without sending any request to the FMC. Requires check mode and the C(fmc) option, the
+        collections the task reads must be in the snapshot.
+    type: str
+    choices: ['fmc', 'snapshot']
+    default: fmc
+    required: false
+  auto_deploy:
+    description:
+      - Option to deploy configurations to deployable devices after changes
+    type: bool
+    default: False
+    required: False
+'''
+
+EXAMPLES = r'''
+- name: Create Security Zones in one task
+  amotolani.cisco_fmc.security_zones:
+    state: present
+    fmc: ciscofmc.sample.com
+    username: admin
+    password: Cisco1234
+    zones:
+      - {name: dc1-inside, interface_mode: routed}
+      - {name: dc1-outside, interface_mode: routed}
+      - {name: dc1-tap, interface_mode: passive}
+
+- name: Delete Security Zones
+  amotolani.cisco_fmc.security_zones:
+    state: absent
+    fmc: ciscofmc.sample.com
+    username: admin
+    password: Cisco1234
+    zones:
+      - {name: dc1-inside}
+      - {name: dc1-tap}
+'''
+
+RETURN = r'''
+created:
+  description: Number of security zones created.
+  returned: always
+  type: int
+updated:
+  description: Number of existing security zones modified.
+  returned: always
+  type: int
+deleted:
+  description: Number of security zones deleted.
+  returned: always
+  type: int
+unchanged:
+  description: Number of requested security zones already in the requested state.
+  returned: always
+  type: int
+request_stats:
+  description:
+    - Counters of the requests sent to the FMC by the task, see I(Request counters) in the collection README.
+  returned: success
+  type: dict
+  sample: {"requests": 6, "throttled": 0, "retried": 0, "waited": 0.5}
+'''
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            state=dict(type='str', choices=['present', 'absent'], default='present'),
+            zones=dict(
+                type='list',
+                elements='dict',
+                required=True,
+                options=dict(
+                    name=dict(type='str', required=True),
+                    interface_mode=dict(type='str', choices=['routed', 'switched', 'asa', 'inline', 'passive'])
+                )
+            ),
+            max_concurrent=dict(type='int', default=4),
+            fmc=dict(type='str'),
+            username=dict(type='str'),
+            password=dict(type='str', no_log=True),
+            auto_deploy=dict(type='bool', default=False),
+            check_source=dict(type='str', choices=['fmc', 'snapshot'], default='fmc')
+        ),
+        supports_check_mode=True
+    )
+    requested_state = module.params['state']
+    requested_zones = module.params['zones']
+    max_concurrent = module.params['max_concurrent']
+    auto_deploy = module.params['auto_deploy']
+    result = BulkResult(module, ['interfaceMode'])
+
+    def validate_zones(zones):
+        """
+        Check every requested security zone before sending anything to the FMC.
+        :param zones: list of requested security zones
+        :return: list of error messages
+        """
+        errors = []
+        names = set()
+        for i in zones:
+            if i['name'] in names:
+                errors.append('{}: duplicate security zone name'.format(i['name']))
+            names.add(i['name'])
+            if requested_state == 'present' and i['interface_mode'] is None:
+                errors.append('{}: interface_mode is required when state = "present"'.format(i['name']))
+        return errors
+
+    if max_concurrent < 1:
+        result.fail('max_concurrent must be at least 1')
+    errors = validate_zones(requested_zones)
+    if errors:
+        result.fail('Invalid security zones: {}'.format('; '.join(errors)))
+
+    with fmc_connection(module, autodeploy=auto_deploy) as fmc1:
+
+        # Fetch the existing security zones once
+        existing = get_all(fmc1, SECURITY_ZONES_PATH, max_workers=max_concurrent)
+        if existing is None:
+            result.fail(error_message(fmc1))
+        existing = index_by_name(existing)
+
+        # Compare the requested security zones with the existing state
+        changes = []
+        for i in requested_zones:
+            _obj = existing.get(i['name'])
+            if requested_state == 'absent':
+                if _obj is None:
+                    result.record('unchanged')
+                else:
+                    changes.append(('deleted', None, _obj))
+            elif _obj is None:
+                obj = dict(name=i['name'], type='SecurityZone', interfaceMode=i['interface_mode'].upper())
+                changes.append(('created', obj, None))
+            elif (_obj.get('interfaceMode') or '').upper() != i['interface_mode'].upper():
+                obj = dict((k, _obj[k]) for k in ('id', 'name', 'type', 'description', 'interfaces') if k in _obj)
+                obj['interfaceMode'] = i['interface_mode'].upper()
+                changes.append(('updated', obj, _obj))
+            else:
+                result.record('unchanged')
+
+        # Perform action to change object state if not in check mode, max_concurrent requests at a time
+        errors = result.apply(fmc1, SECURITY_ZONES_PATH, changes, max_workers=max_concurrent)
+        if errors:
+            result.fail('; '.join(errors))
+
+    result.exit(request_stats=fmc1.request_stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/python
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.bulk import BulkResult
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.fmc import fmc_connection
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.objects import (
+    BULK_CHUNK_SIZE, VLAN_TAGS_PATH, error_message, get_all, index_by_name
+)
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.validation import valid_vlan_range
+
+DOCUMENTATION = r'''
+---
+author: Adelowo David (@amotolani)
+module: amotolani.cisco_fmc.vlan_tags
+short_description: Create, Modify and Delete Cisco FMC vlan objects in bulk
+description:
+  - Create, Modify and Delete many Cisco FMC vlan objects in a single task.
+  - Every requested VLAN range is validated before anything is sent to the FMC. The existing vlan objects are fetched
+    once, compared with the requested ranges and new objects are created through the FMC bulk API.
+options:
+  vlans:
+    description:
+      - The vlan objects to be created, modified or deleted.
+    type: list
+    elements: dict
+    required: true
+    options:
+      name:
+        description:
+          - The name of the cisco_fmc vlan object.
+        type: str
+        required: true
+      vlan_start:
+        description:
+          - Lower VLAN number in range, from 1 to 4094
+          - Required when state = "present"
+        type: int
+        required: false
+      vlan_end:
+        description:
+          - Upper VLAN number in range, from vlan_start to 4094
+          - Set to vlan_start for a single VLAN
+          - Required when state = "present"
+        type: int
+        required: false
+  merge:
+    description:
+      - Merge overlapping and adjacent VLAN ranges into the fewest vlan objects when state = "present".
+      - A merged object takes the name of its range with the lowest VLAN number, the names of the other ranges it
+        covers are not created.
+    type: bool
+    default: False
+    required: false
+  state:
+    description:
+      - Whether to create/modify (C(present)), or remove (C(absent)) the objects.
+    type: str
+    default: present
+    required: false
+  bulk_size:
+    description:
+      - Maximum number of objects created by a single FMC bulk request, from 1 to 1000.
+    type: int
+    default: 1000
+    required: false
+  fmc:
+    description:
+      - IP address or FQDN of Cisco FMC.
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  username:
+    description:
+      - Cisco FMC Username
+      - User should have sufficient permissions to modify objects
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  password:
+    description:
+      - Cisco FMC Password
+      - Not required when using the C(amotolani.cisco_fmc.fmc) httpapi connection
+    type: str
+    required: false
+  check_source:
+    description:
+      - Where the current state is read from in check mode.
+      - C(snapshot) evaluates the task against the on-disk snapshot gathered by C(amotolani.cisco_fmc.fmc_facts) with
+        C(snapshot=true), without sending any request to the FMC. Requires check mode and the C(fmc) option, the
+        collections the task reads must be in the snapshot.
+    type: str
+    choices: ['fmc', 'snapshot']
+    default: fmc
+    required: false
+  auto_deploy:
+    description:
+      - Option to deploy configurations to deployable devices after changes
+    type: bool
+    default: False
+    required: False
+'''
+
+EXAMPLES = r'''
+- name: Create Vlan objects in one task
+  amotolani.cisco_fmc.vlan_tags:
+    state: present
+    fmc: ciscofmc.sample.com
+    username: admin
+    password: Cisco1234
+    vlans:
+      - {name: vlan1, vlan_start: 111, vlan_end: 222}
+      - {name: vlan2, vlan_start: 333, vlan_end: 444}
+
+- name: Create the fewest Vlan objects covering the site VLANs
+  amotolani.cisco_fmc.vlan_tags:
+    state: present
+    merge: True
+    fmc: ciscofmc.sample.com
+    username: admin
+    password: Cisco1234
+    vlans:
+      - {name: site1-users, vlan_start: 100, vlan_end: 149}
+      - {name: site1-voice, vlan_start: 150, vlan_end: 199}
+      - {name: site1-mgmt, vlan_start: 900, vlan_end: 910}
+
+- name: Delete Vlan objects
+  amotolani.cisco_fmc.vlan_tags:
+    state: absent
+    fmc: ciscofmc.sample.com
+    username: admin
+    password: Cisco1234
+    vlans:
+      - {name: vlan1}
+      - {name: vlan2}
+'''
+
+RETURN = r'''
+created:
+  description: Number of objects created.
+  returned: always
+  type: int
+updated:
+  description: Number of existing objects modified.
+  returned: always
+  type: int
+deleted:
+  description: Number of objects deleted.
+  returned: always
+  type: int
+unchanged:
+  description: Number of requested objects already in the requested state.
+  returned: always
+  type: int
+merged:
+  description: Number of requested ranges merged into the range of another object.
+  returned: always
+  type: int
+request_stats:
+  description:
+    - Counters of the requests sent to the FMC by the task, see I(Request counters) in the collection README.
+  returned: success
+  type: dict
+  sample: {"requests": 6, "throttled": 0, "retried": 0, "waited": 0.5}
+'''
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(
+            state=dict(type='str', choices=['present', 'absent'], default='present'),
+            vlans=dict(
+                type='list',
+                elements='dict',
+                required=True,
+                options=dict(
+                    name=dict(type='str', required=True),
+                    vlan_start=dict(type='int'),
+                    vlan_end=dict(type='int')
+                )
+            ),
+            merge=dict(type='bool', default=False),
+            bulk_size=dict(type='int', default=BULK_CHUNK_SIZE),
+            fmc=dict(type='str'),
+            username=dict(type='str'),
+            password=dict(type='str', no_log=True),
+            auto_deploy=dict(type='bool', default=False),
+            check_source=dict(type='str', choices=['fmc', 'snapshot'], default='fmc')
+        ),
+        supports_check_mode=True
+    )
+    requested_state = module.params['state']
+    requested_vlans = module.params['vlans']
+    merge = module.params['merge']
+    bulk_size = module.params['bulk_size']
+    auto_deploy = module.params['auto_deploy']
+
+    def describe(obj):
+        """
+        Show the VLAN range of a vlan object in the diff.
+        :param obj: vlan object
+        :return: dict
+        """
+        return dict(name=obj['name'], vlan_start=obj.get('data', {}).get('startTag'),
+                    vlan_end=obj.get('data', {}).get('endTag'))
+
+    result = BulkResult(module, ['vlan_start', 'vlan_end'], describe=describe, counters=('merged',))
+
+    def validate_vlans(vlans):
+        """
+        Check every requested VLAN range before sending anything to the FMC.
+        :param vlans: list of requested vlan objects
+        :return: list of error messages
+        """
+        errors = []
+        names = set()
+        for i in vlans:
+            if i['name'] in names:
+                errors.append('{}: duplicate object name'.format(i['name']))
+            names.add(i['name'])
+            if requested_state == 'present':
+                if i['vlan_start'] is None or i['vlan_end'] is None:
+                    errors.append('{}: vlan_start and vlan_end are required when state = "present"'.format(i['name']))
+                elif not valid_vlan_range(i['vlan_start'], i['vlan_end']):
+                    errors.append('{}: provided vlan range {}-{} is not valid'.format(
+                        i['name'], i['vlan_start'], i['vlan_end']))
+        return errors
+
+    def merge_ranges(vlans):
+        """
+        Merge overlapping and adjacent VLAN ranges, each merged range keeps the name of its lowest range.
+        :param vlans: list of requested vlan objects
+        :return: list of merged vlan objects sorted by vlan_start
+        """
+        merged = []
+        for i in sorted(vlans, key=lambda x: (x['vlan_start'], x['vlan_end'])):
+            if merged and i['vlan_start'] <= merged[-1]['vlan_end'] + 1:
+                merged[-1]['vlan_end'] = max(merged[-1]['vlan_end'], i['vlan_end'])
+                result.record('merged')
+            else:
+                merged.append(dict(i))
+        return merged
+
+    if not 1 <= bulk_size <= BULK_CHUNK_SIZE:
+        result.fail('bulk_size must be between 1 and {}'.format(BULK_CHUNK_SIZE))
+    errors = validate_vlans(requested_vlans)
+    if errors:
+        result.fail('Invalid vlan objects: {}'.format('; '.join(errors)))
+    if merge and requested_state == 'present':
+        requested_vlans = merge_ranges(requested_vlans)
+
+    with fmc_connection(module, autodeploy=auto_deploy) as fmc1:
+
+        # Fetch the existing vlan objects once
+        existing = get_all(fmc1, VLAN_TAGS_PATH)
+        if existing is None:
+            result.fail(error_message(fmc1))
+        existing = index_by_name(existing)
+
+        # Compare the requested ranges with the existing state
+        changes = []
+        for i in requested_vlans:
+            _obj = existing.get(i['name'])
+            if requested_state == 'absent':
+                if _obj is None:
+                    result.record('unchanged')
+                else:
+                    changes.append(('deleted', None, _obj))
+                continue
+            data = dict(startTag=i['vlan_start'], endTag=i['vlan_end'], type='VlanTagLiteral')
+            if _obj is None:
+                changes.append(('created', dict(name=i['name'], type='VlanTag', data=data), None))
+            elif _obj.get('data', {}).get('startTag') != i['vlan_start'] or \
+                    _obj.get('data', {}).get('endTag') != i['vlan_end']:
+                obj = dict((k, _obj[k]) for k in ('id', 'name', 'type', 'description', 'overridable') if k in _obj)
+                obj['data'] = data
+                changes.append(('updated', obj, _obj))
+            else:
+                result.record('unchanged')
+
+        # Perform action to change object state if not in check mode, new objects are created through the bulk API
+        errors = result.apply(fmc1, VLAN_TAGS_PATH, changes, bulk_size=bulk_size)
+        if errors:
+            result.fail('; '.join(errors))
+
+    result.exit(request_stats=fmc1.request_stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import random
+
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.access_rules import (
+    build_rule, changed_fields, plan_order, stable_rules
+)
+
+OBJECTS = {
+    'object/networkaddresses': [('net1', 'Network'), ('host1', 'Host')],
+    'object/networkgroups': [('group1', 'NetworkGroup')],
+    'object/protocolportobjects': [('https', 'ProtocolPortObject')],
+    'object/portobjectgroups': [('web', 'PortObjectGroup')],
+    'object/securityzones': [('inside', 'SecurityZone'), ('outside', 'SecurityZone')],
+    'object/vlantags': [],
+    'object/applications': [],
+    'object/securitygrouptags': [],
+    'policy/intrusionpolicies': [('Balanced', 'IntrusionPolicy')],
+    'policy/filepolicies': [],
+    'object/variablesets': [('Default-Set', 'VariableSet'), ('DMZ-Set', 'VariableSet')]
+}
+
+
+class Index(object):
+    """
+    ObjectIndex serving fixed collections.
+    """
+
+    def load(self, path):
+        return dict((name, dict(id='{}-id'.format(name), name=name, type=obj_type)) for name, obj_type in OBJECTS[path])
+
+
+def ref(name, obj_type):
+    return dict(id='{}-id'.format(name), name=name, type=obj_type)
+
+
+def existing_rule(**fields):
+    """
+    Access Rule as returned by FMC, with the read-only fields FMC adds.
+    """
+    rule = dict(id='rule-id', name='rule1', type='AccessRule', action='ALLOW', enabled=True, logBegin=False,
+                logEnd=True, sendEventsToFMC=True, enableSyslog=False,
+                variableSet=ref('Default-Set', 'VariableSet'),
+                sourceZones=dict(objects=[ref('inside', 'SecurityZone')]),
+                destinationPorts=dict(objects=[ref('https', 'ProtocolPortObject'), ref('web', 'PortObjectGroup')]),
+                links=dict(self='https://fmc/rule-id'), metadata=dict(ruleIndex=1))
+    rule.update(fields)
+    return rule
+
+
+def apply_steps(current, steps):
+    """
+    Apply the steps of plan_order the way FMC places rules, the rule indexes are those of the order before the step.
+    """
+    current = list(current)
+    for action, names, query in steps:
+        target = None
+        if query is not None:
+            key, index = query.split('=')
+            target = (key, current[int(index) - 1])
+        if action == 'move':
+            current.remove(names[0])
+        if target is None:
+            position = len(current)
+        else:
+            position = current.index(target[1]) + (0 if target[0] == 'insertBefore' else 1)
+        current[position:position] = names
+    return current
+
+
+def test_stable_rules_same_order():
+    assert stable_rules(['a', 'b', 'c'], ['a', 'b', 'c']) == set(['a', 'b', 'c'])
+
+
+def test_stable_rules_longest_run():
+    assert stable_rules(['a', 'b', 'c', 'd', 'e'], ['b', 'c', 'a', 'e', 'd']) in (
+        set(['b', 'c', 'e']), set(['b', 'c', 'd'])
+    )
+
+
+def test_stable_rules_ignores_rules_not_desired():
+    assert stable_rules(['x', 'a', 'y', 'b'], ['a', 'b', 'z']) == set(['a', 'b'])
+
+
+def test_stable_rules_empty():
+    assert stable_rules([], ['a']) == set()
+
+
+def test_plan_order_no_change():
+    assert plan_order(['a', 'b', 'c'], ['a', 'b', 'c']) == []
+
+
+def test_plan_order_move_to_top():
+    assert plan_order(['a', 'b', 'c'], ['c', 'a', 'b']) == [('move', ['c'], 'insertBefore=1')]
+
+
+def test_plan_order_consecutive_new_rules_created_together():
+    steps = plan_order(['a', 'd'], ['a', 'b', 'c', 'd'])
+    assert steps == [('create', ['b', 'c'], 'insertBefore=2')]
+    assert apply_steps(['a', 'd'], steps) == ['a', 'b', 'c', 'd']
+
+
+def test_plan_order_append():
+    assert plan_order(['a'], ['a', 'b']) == [('create', ['b'], 'insertAfter=1')]
+
+
+def test_plan_order_reaches_desired_order():
+    rng = random.Random(0)
+    for _ in range(200):
+        current = ['r{}'.format(i) for i in range(rng.randint(0, 12))]
+        desired = current + ['n{}'.format(i) for i in range(rng.randint(0, 4))]
+        rng.shuffle(current)
+        rng.shuffle(desired)
+        steps = plan_order(current, desired)
+        assert apply_steps(current, steps) == desired
+        moved = [name for action, names, query in steps if action == 'move' for name in names]
+        assert len(moved) == len(current) - len(stable_rules(current, desired))
+
+
+def test_changed_fields_ignores_read_only_fields_and_member_order():
+    current = existing_rule()
+    payload = existing_rule(destinationPorts=dict(objects=[dict(id='web-id'), dict(id='https-id')]))
+    del payload['links'], payload['metadata']
+    assert changed_fields(current, payload) == []
+
+
+def test_changed_fields_reports_differences():
+    payload = existing_rule(action='BLOCK')
+    del payload['sourceZones'], payload['links'], payload['metadata']
+    assert changed_fields(existing_rule(), payload) == ['action', 'sourceZones']
+
+
+def test_build_rule_new_rule():
+    spec = dict(name='rule1', action='ALLOW', source_zones=['inside', 'nowhere'],
+                source_networks=dict(name=['net1', 'group1'], literal=['10.0.0.0/8']))
+    payload, missing = build_rule(Index(), spec)
+    assert payload['name'] == 'rule1'
+    assert payload['action'] == 'ALLOW'
+    assert payload['sourceZones'] == dict(objects=[ref('inside', 'SecurityZone')])
+    assert payload['sourceNetworks'] == dict(
+        objects=[ref('net1', 'Network'), ref('group1', 'NetworkGroup')],
+        literals=[dict(type='Network', value='10.0.0.0/8')]
+    )
+    assert missing == ['source_zones: nowhere']
+
+
+def test_build_rule_keeps_unset_options():
+    payload, missing = build_rule(Index(), dict(name='rule1', action='BLOCK'), existing_rule())
+    assert missing == []
+    assert changed_fields(existing_rule(), payload) == ['action']
+
+
+def test_build_rule_replace_resets_unset_options():
+    spec = dict(name='rule1', action='ALLOW', source_zones=['inside'])
+    payload, missing = build_rule(Index(), spec, existing_rule(), replace=True)
+    assert changed_fields(existing_rule(), payload) == ['destinationPorts', 'logEnd', 'sendEventsToFMC']
+
+
+def test_build_rule_replace_is_idempotent():
+    spec = dict(name='rule1', action='ALLOW', log_end=True, send_events_to_fmc=True, source_zones=['inside'],
+                destination_ports=['https', 'web'])
+    payload, missing = build_rule(Index(), spec, existing_rule(), replace=True)
+    assert missing == []
+    assert changed_fields(existing_rule(), payload) == []
+
+
+def test_build_rule_replace_sets_variable_set():
+    spec = dict(name='rule1', action='ALLOW', log_end=True, send_events_to_fmc=True, source_zones=['inside'],
+                destination_ports=['https', 'web'], variable_set='DMZ-Set')
+    payload, missing = build_rule(Index(), spec, existing_rule(), replace=True)
+    assert payload['variableSet'] == ref('DMZ-Set', 'VariableSet')
+    assert changed_fields(existing_rule(), payload) == ['variableSet']
+
+
+def test_build_rule_replace_removes_policies():
+    current = existing_rule(ipsPolicy=ref('Balanced', 'IntrusionPolicy'))
+    spec = dict(name='rule1', action='ALLOW', log_end=True, send_events_to_fmc=True, source_zones=['inside'],
+                destination_ports=['https', 'web'])
+    payload, missing = build_rule(Index(), spec, current, replace=True)
+    assert changed_fields(current, payload) == ['ipsPolicy']
@@ -0,0 +1,19 @@
+from ansible_collections.amotolani.cisco_fmc.plugins.module_utils.validation import valid_vlan_range
+
+
+def test_valid_vlan_range():
+    assert valid_vlan_range(100, 149)
+    assert valid_vlan_range(1, 4094)
+
+
+def test_valid_vlan_range_single_vlan():
+    assert valid_vlan_range(100, 100)
+
+
+def test_valid_vlan_range_reserved_vlans():
+    assert not valid_vlan_range(0, 10)
+    assert not valid_vlan_range(10, 4095)
+
+
+def test_valid_vlan_range_reversed():
+    assert not valid_vlan_range(149, 100)